@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+CAS Backend Benchmark
+Store/retrieve throughput of the CAS backends on small values
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'runtime'))
+
+from hlx_runtime.cas import CASStore, FileCASStore
+from hlx_runtime.cas_sqlite import SQLiteCASStore
+
+
+def make_values(count: int):
+    return [{"id": i, "name": f"binding_{i}", "stage": "compute"} for i in range(count)]
+
+
+def bench(name: str, cas, values):
+    start = time.perf_counter()
+    handles = [cas.store(v) for v in values]
+    if hasattr(cas, 'flush'):
+        cas.flush()
+    store_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for h in handles:
+        cas.retrieve(h)
+    retrieve_s = time.perf_counter() - start
+
+    n = len(values)
+    print(f"{name:<10} | {n / store_s:>12,.0f} | {n / retrieve_s:>12,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CAS backend benchmark")
+    parser.add_argument('--count', type=int, default=5000, help="Values to store")
+    args = parser.parse_args()
+
+    values = make_values(args.count)
+    print("CAS Backend Benchmark")
+    print(f"{args.count:,} small map values\n")
+    print(f"{'Backend':<10} | {'store/s':>12} | {'retrieve/s':>12}")
+    print("-" * 40)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bench("memory", CASStore(), values)
+        with FileCASStore(os.path.join(tmp, "files")) as cas:
+            bench("file", cas, values)
+        with SQLiteCASStore(os.path.join(tmp, "cas.sqlite")) as cas:
+            bench("sqlite", cas, values)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+CAS Thread Scaling Benchmark
+Store/retrieve throughput from 1-32 threads: ConcurrentCASStore versus a
+plain CASStore behind one global lock.
+
+blake2b releases the GIL for inputs over 2 KiB, so large blobs are where
+striped locking can scale; small values mostly measure lock overhead.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'runtime'))
+
+from hlx_runtime.cas import CASStore, ConcurrentCASStore
+
+THREAD_COUNTS = (1, 2, 4, 8, 16, 32)
+
+
+class GlobalLockCAS:
+    """The previous pattern: every call serialized through one lock."""
+    def __init__(self):
+        self.cas = CASStore()
+        self.lock = threading.Lock()
+
+    def store(self, value):
+        with self.lock:
+            return self.cas.store(value)
+
+    def retrieve(self, handle):
+        with self.lock:
+            return self.cas.retrieve(handle)
+
+
+def make_values(count: int, blob_size: int):
+    if blob_size:
+        return [i.to_bytes(8, 'big') * (blob_size // 8) for i in range(count)]
+    return [{"id": i, "name": f"binding_{i}", "stage": "compute"} for i in range(count)]
+
+
+def run(cas, values, threads: int):
+    slices = [values[i::threads] for i in range(threads)]
+
+    def store_slice(part):
+        return [cas.store(v) for v in part]
+
+    def retrieve_slice(handles):
+        for h in handles:
+            cas.retrieve(h)
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        start = time.perf_counter()
+        handle_slices = list(pool.map(store_slice, slices))
+        store_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        list(pool.map(retrieve_slice, handle_slices))
+        retrieve_s = time.perf_counter() - start
+
+    n = len(values)
+    return n / store_s, n / retrieve_s
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CAS thread scaling benchmark")
+    parser.add_argument('--count', type=int, default=2000, help="Values per run")
+    parser.add_argument('--blob-size', type=int, default=64 * 1024,
+                        help="Bytes per blob value (0 = small maps)")
+    parser.add_argument('--stripes', type=int, default=64, help="ConcurrentCASStore stripes")
+    args = parser.parse_args()
+
+    values = make_values(args.count, args.blob_size)
+    kind = f"{args.blob_size:,}-byte blobs" if args.blob_size else "small map values"
+    print("CAS Thread Scaling Benchmark")
+    print(f"{args.count:,} {kind}, {args.stripes} stripes\n")
+    print(f"{'Threads':>7} | {'global store/s':>14} | {'global get/s':>12} | "
+          f"{'striped store/s':>15} | {'striped get/s':>13}")
+    print("-" * 74)
+
+    for threads in THREAD_COUNTS:
+        g_store, g_get = run(GlobalLockCAS(), values, threads)
+        s_store, s_get = run(ConcurrentCASStore(args.stripes), values, threads)
+        print(f"{threads:>7} | {g_store:>14,.0f} | {g_get:>12,.0f} | "
+              f"{s_store:>15,.0f} | {s_get:>13,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+LC-R Collapse Level Benchmark
+Size/speed curve of encode_lcr/decode_lcr across collapse levels 0-12
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'runtime'))
+
+from hlx_runtime.lc_r_codec import encode_lcr, decode_lcr, MAX_COLLAPSE_LEVEL
+
+
+def make_payload(num_sets: int = 32, bindings_per_set: int = 8):
+    """Pipeline-like payload dominated by repeated descriptor bindings and handles"""
+    shaders = [f"&h_blob_{i:064x}" for i in range(4)]
+    sets = []
+    for s in range(num_sets):
+        bindings = []
+        for b in range(bindings_per_set):
+            bindings.append({
+                'binding': b,
+                'descriptor_type': 'storage_buffer' if b % 2 else 'uniform_buffer',
+                'stage_flags': 'compute',
+                'buffer': f"&h_map_{(b % 4):064x}",
+            })
+        sets.append({'set': s, 'bindings': bindings, 'shader': shaders[s % len(shaders)]})
+    return {'contract_id': 902, 'pipeline_id': 'transformer_forward', 'descriptor_sets': sets}
+
+
+def time_it(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LC-R collapse level benchmark")
+    parser.add_argument('--sets', type=int, default=32, help="Descriptor sets in payload")
+    parser.add_argument('--iterations', type=int, default=20, help="Iterations per level")
+    args = parser.parse_args()
+
+    value = make_payload(args.sets)
+    base_size = len(encode_lcr(value, 0).encode('utf-8'))
+
+    print("LC-R Collapse Level Benchmark")
+    print(f"Payload: {args.sets} descriptor sets, level-0 size {base_size:,} bytes\n")
+    print(f"{'Level':>5} | {'Bytes':>10} | {'Ratio':>7} | {'Encode ms':>9} | {'Decode ms':>9}")
+    print("-" * 53)
+
+    for level in range(MAX_COLLAPSE_LEVEL + 1):
+        encoded = encode_lcr(value, level)
+        size = len(encoded.encode('utf-8'))
+        enc_ms = time_it(lambda: encode_lcr(value, level), args.iterations)
+        dec_ms = time_it(lambda: decode_lcr(encoded), args.iterations)
+        print(f"{level:>5} | {size:>10,} | {size / base_size:>7.2%} | {enc_ms:>9.2f} | {dec_ms:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
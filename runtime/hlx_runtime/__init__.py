@@ -109,14 +109,32 @@ from .contracts import (
 )
 
 # Content-Addressed Storage
-from .cas import CASStore, get_cas_store
+from .cas import CASStore, CASSnapshot, ConcurrentCASStore, FileCASStore, DecodedValueCache, get_cas_store, set_cas_store
+from .cas_sqlite import SQLiteCASStore
+from .cas_pack import PackCASStore
+from .cas_tier import TieredCASStore
+from .cas_sync import sync as sync_cas, serve as serve_cas_sync, sync_unix, make_unix_server
+from .cas_async import AsyncCASStore
+from .cas_gc import CASCollector, collect_garbage
+from .cas_compress import BlobCompressor
+from .cas_chunk import Chunker, ChunkReader
+from .cas_bloom import BloomFilter
+from .cas_index import HandleIndex
+from .handle import Handle
+from .encoded import EncodedValue
+from .cas_trace import AccessTracer, read_trace, simulate as simulate_cache
 
 # Data structures
 from .tables import MerkleTree, StateTable
 
+# Corpus conversion
+from .convert import json_to_lcb, lcb_to_json
+from .record_log import RecordLogWriter, RecordLogReader
+
 # Latent Space operations
 from .ls_ops import (
-    LSContext, ls_collapse, ls_resolve,
+    LSContext, AsyncLSContext, ls_collapse, ls_resolve,
+    ls_collapse_many, ls_resolve_many,
     ls_encode, ls_decode, ls_hash,
     ls_validate, ls_wrap, ls_unwrap,
 )
@@ -170,13 +188,22 @@ __all__ = [
     'wrap_literal', 'unwrap_literal', 'validate_contract',
 
     # CAS
-    'CASStore', 'get_cas_store',
+    'CASStore', 'CASSnapshot', 'ConcurrentCASStore', 'FileCASStore', 'SQLiteCASStore', 'PackCASStore', 'TieredCASStore', 'AsyncCASStore',
+    'DecodedValueCache', 'CASCollector', 'collect_garbage', 'BlobCompressor',
+    'Chunker', 'ChunkReader', 'BloomFilter', 'HandleIndex', 'Handle', 'EncodedValue', 'AccessTracer', 'read_trace', 'simulate_cache',
+    'sync_cas', 'serve_cas_sync', 'sync_unix', 'make_unix_server',
+    'get_cas_store', 'set_cas_store',
 
     # Data structures
     'MerkleTree', 'StateTable',
 
+    # Corpus conversion
+    'json_to_lcb', 'lcb_to_json',
+    'RecordLogWriter', 'RecordLogReader',
+
     # LS Operations
-    'LSContext', 'ls_collapse', 'ls_resolve',
+    'LSContext', 'AsyncLSContext', 'ls_collapse', 'ls_resolve',
+    'ls_collapse_many', 'ls_resolve_many',
     'ls_encode', 'ls_decode', 'ls_hash',
     'ls_validate', 'ls_wrap', 'ls_unwrap',
 ]
@@ -3,47 +3,1162 @@ Content-Addressed Store (CAS) implementation.
 Reference: CONTRACT_802
 """
 
-from typing import Any, Optional, Dict
-from .lc_codec import encode_lcb, decode_lcb, get_type_tag, compute_hash
-from .errors import HandleNotFoundError
+import hashlib
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from collections.abc import Mapping
+from contextlib import contextmanager, nullcontext
+from types import MappingProxyType
+from typing import Any, Callable, Optional, Dict, Iterable, Iterator, List, Tuple
+from .lc_codec import encode_lcb, decode_lcb, get_type_tag, compute_hash, LC_TAGS
+from .errors import HandleNotFoundError, IntegrityError
+from .convert import DEFAULT_CHUNK_SIZE, encode_records, decode_records
+from .cas_compress import BlobCompressor, unpack_blob, blob_lead_byte, blob_size
+from .cas_bloom import BloomFilter, DEFAULT_CAPACITY, DEFAULT_FP_RATE
+from .cas_index import HandleIndex
+from .handle import HANDLE_PREFIX, handle_key, split_handle
+from .encoded import EncodedValue
+from .cas_chunk import (
+    Chunker, ChunkReader, CHUNKED_TAG, is_manifest, encode_manifest, decode_manifest, bytes_header,
+    bytes_payload,
+)
+
+# LC-B leading tag byte -> handle type tag (see get_type_tag)
+_TAG_BY_LEAD_BYTE = {
+    LC_TAGS['NULL']: "null",
+    LC_TAGS['BOOL_TRUE']: "bool", LC_TAGS['BOOL_FALSE']: "bool",
+    LC_TAGS['INT']: "int",
+    LC_TAGS['FLOAT']: "float",
+    LC_TAGS['TEXT']: "str", LC_TAGS['HANDLE_REF']: "str",
+    LC_TAGS['BYTES']: "blob",
+    LC_TAGS['ARR_START']: "list",
+    LC_TAGS['OBJ_START']: "map",
+}
+
+
+# Bytes of a stored blob needed to recover its handle tag
+_TAG_HEAD_SIZE = 16
+
+
+def _tag_of_stored(stored: bytes) -> str:
+    if is_manifest(stored):  # Manifests are never compressed
+        return CHUNKED_TAG
+    return _TAG_BY_LEAD_BYTE.get(blob_lead_byte(stored), "unknown")
+
+
+def _handle_of_stored(key: bytes, stored: bytes) -> str:
+    return f"{HANDLE_PREFIX}{_tag_of_stored(stored)}_{key.hex()}"
+
+
+def _tag_matches(handle: str, stored: bytes) -> bool:
+    """Whether a stored blob (or its first _TAG_HEAD_SIZE bytes) has the
+    type tag its well-formed handle names."""
+    return handle[len(HANDLE_PREFIX):-65] == _tag_of_stored(stored)  # Tag before '_<64 hex>'
+
+
+def _require_key(handle: str) -> bytes:
+    key = handle_key(handle)
+    if key is None:
+        raise HandleNotFoundError(f"Malformed handle: {handle}")
+    return key
+
+
+def handle_for_encoded(encoded: bytes, digest: Optional[str] = None) -> str:
+    """Handle of an LC-B blob, with the type tag taken from its lead byte."""
+    if is_manifest(encoded):
+        tag = CHUNKED_TAG
+    else:
+        tag = _TAG_BY_LEAD_BYTE.get(encoded[0], "unknown") if encoded else "unknown"
+    return f"{HANDLE_PREFIX}{tag}_{digest or compute_hash(encoded)}"
+
+
+def _is_chunked(handle: str) -> bool:
+    return handle.startswith(f"{HANDLE_PREFIX}{CHUNKED_TAG}_")
+
+
+def copy_value(value: Any) -> Any:
+    """Copy the mutable containers of a decoded value (leaves are immutable)."""
+    if isinstance(value, list):
+        return [copy_value(v) for v in value]
+    if isinstance(value, dict):
+        return {k: copy_value(v) for k, v in value.items()}
+    return value
+
+
+def thaw_value(value: Any) -> Any:
+    """Mutable copy of a frozen value (inverse of freeze_value)."""
+    if isinstance(value, (list, tuple)):
+        return [thaw_value(v) for v in value]
+    if isinstance(value, (dict, MappingProxyType)):
+        return {k: thaw_value(v) for k, v in value.items()}
+    return value
+
+
+def freeze_value(value: Any) -> Any:
+    """Immutable view of a decoded value: lists become tuples, dicts read-only mappings."""
+    if isinstance(value, list):
+        return tuple(freeze_value(v) for v in value)
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze_value(v) for k, v in value.items()})
+    return value
+
+
+class DecodedValueCache:
+    """
+    Bounded LRU of decoded values keyed by handle.
+
+    Bounded by entry count and by approximate size (the LC-B length of each
+    value). Content addressing means entries never go stale. Callers get
+    defensive copies, or shared immutable values when frozen=True.
+    """
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 64 * 1024 * 1024,
+                 frozen: bool = False):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.frozen = frozen
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: 'OrderedDict[str, Tuple[Any, int]]' = OrderedDict()
+        self._handles_by_id: Dict[int, str] = {}  # frozen values only
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _export(self, value: Any) -> Any:
+        return value if self.frozen else copy_value(value)
+
+    def get(self, handle: str) -> Tuple[bool, Any]:
+        with self._lock:
+            entry = self._entries.get(handle)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(handle)
+            self.hits += 1
+        return True, self._export(entry[0])
+
+    def put(self, handle: str, value: Any, size: int) -> Any:
+        """Cache a freshly decoded value; returns the value to hand to the caller."""
+        if self.frozen:
+            value = freeze_value(value)
+        if size > self.max_bytes or self.max_entries <= 0:
+            return value
+        with self._lock:
+            old = self._entries.pop(handle, None)
+            if old is not None:
+                self._forget(old[0])
+                self._bytes -= old[1]
+            self._entries[handle] = (value, size)
+            if self.frozen:
+                self._handles_by_id[id(value)] = handle
+            self._bytes += size
+            self._evict()
+        return self._export(value)
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, (evicted, evicted_size) = self._entries.popitem(last=False)
+            self._forget(evicted)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def resize(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        """Change the bounds, evicting down to them at once."""
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max_entries
+            if max_bytes is not None:
+                self.max_bytes = max_bytes
+            self._evict()
+
+    def handle_of(self, value: Any) -> Optional[str]:
+        """Handle of a frozen value handed out by this cache, if still cached."""
+        with self._lock:
+            handle = self._handles_by_id.get(id(value))
+            if handle is None:
+                return None
+            entry = self._entries.get(handle)
+            return handle if entry is not None and entry[0] is value else None
+
+    def _forget(self, value: Any):
+        if self.frozen and self._handles_by_id.get(id(value)) is not None:
+            del self._handles_by_id[id(value)]
+
+    def discard(self, handles: Iterable[str]):
+        """Drop the given handles (e.g. blobs removed by a rollback)."""
+        with self._lock:
+            for handle in handles:
+                entry = self._entries.pop(handle, None)
+                if entry is not None:
+                    self._forget(entry[0])
+                    self._bytes -= entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._handles_by_id.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+            'entries': len(self._entries), 'bytes': self._bytes,
+        }
+
+
+class CASSnapshot(Mapping):
+    """
+    Checkpoint returned by CASStore.snapshot(), taken in O(1).
+
+    Reads as a handle -> LC-B mapping of the store's contents at the time it
+    was taken. It only records a position in the store's write journal; if
+    the store is rolled back past that position, the blobs it still needs
+    are copied into it first, and a wholesale restore() from some other
+    mapping detaches it into a plain copy.
+    """
+    __slots__ = ('_store', '_position', '_extra', '_data', '__weakref__')
+
+    def __init__(self, store: 'CASStore', position: int):
+        self._store: Optional[CASStore] = store
+        self._position = position
+        self._extra: Dict[str, bytes] = {}  # Blobs rolled back since
+        self._data: Optional[Dict[str, bytes]] = None  # Set once detached
+
+    def _detach(self):
+        self._data = {h: self[h] for h in self}
+        self._store = None
+        self._extra = {}
+
+    def __contains__(self, handle: object) -> bool:
+        if self._data is not None:
+            return handle in self._data
+        return handle in self._extra or self._store._in_checkpoint(handle, self._position)
+
+    def __getitem__(self, handle: str) -> bytes:
+        if self._data is not None:
+            return self._data[handle]
+        encoded = self._extra.get(handle)
+        if encoded is None and self._store._in_checkpoint(handle, self._position):
+            encoded = self._store._get_blob(handle)
+        if encoded is None:
+            raise KeyError(handle)
+        return encoded
+
+    def __iter__(self) -> Iterator[str]:
+        if self._data is not None:
+            yield from self._data
+            return
+        yield from self._extra
+        for handle in self._store._iter_handles():
+            if handle not in self._extra and self._store._in_checkpoint(handle, self._position):
+                yield handle
+
+    def __len__(self) -> int:
+        if self._data is not None:
+            return len(self._data)
+        store = self._store
+        return len(store) - (len(store._journal) - self._position) + len(self._extra)
+
 
 class CASStore:
     """
     CONTRACT_802: Content-Addressed Store (CAS)
+
+    Backends override the storage primitives (_get_stored/_put_stored/
+    _has_blob) plus snapshot/_restore_blobs; store/retrieve/exists are
+    shared. _get_blob/_put_blob translate between canonical LC-B and the
+    stored form.
+
+    Assign a DecodedValueCache to `decoded_cache` to skip decode_lcb for
+    hot handles, and a BlobCompressor to `compression` to compress blobs
+    that shrink. Handles are unaffected; compressed blobs are readable
+    whatever the setting. A Chunker in `chunking` stores large BYTES values
+    as content-defined chunks under an `&h_chunked_` manifest handle.
+    enable_bloom() keeps a Bloom filter of stored digests so lookups of
+    absent handles never reach the backend, and enable_index() an index by
+    type tag and digest (iter_by_type, count_by_type, resolve_prefix).
+    An AccessTracer in `tracer`
+    logs store/retrieve/exists calls for cache sizing (see cas_trace.py).
+
+    Storing content that is already present never rewrites the blob; such
+    calls are counted in `dedup_hits`.
+
+    snapshot() is O(1): while checkpoints are alive, newly written handles
+    are appended to a journal, and restore() to a checkpoint deletes only
+    the blobs written after it (O(writes since snapshot)). Backends that
+    support this implement _delete_blob and _iter_handles.
     """
+    decoded_cache: Optional[DecodedValueCache] = None
+    compression: Optional[BlobCompressor] = None
+    chunking: Optional[Chunker] = None
+    bloom: Optional[BloomFilter] = None
+    index: Optional[HandleIndex] = None
+    tracer = None  # cas_trace.AccessTracer
+    dedup_hits = 0
+
+    # Where close() saves the Bloom filter and handle index; None for in-memory stores
+    _bloom_path: Optional[str] = None
+    _handles_path: Optional[str] = None
+
+    # Set by a CASCollector while a GC cycle is running (see cas_gc.py)
+    _gc_barrier: Optional[Callable[[str, Optional[bytes]], None]] = None
+
+    # Write journal, created by the first snapshot()
+    _checkpoints: Optional['weakref.WeakValueDictionary[int, CASSnapshot]'] = None
+    _journal: List[str] = []
+    _journal_index: Dict[str, int] = {}
+
     def __init__(self):
-        self._store: Dict[str, bytes] = {}
+        self._store: Dict[bytes, bytes] = {}  # Raw digest -> stored blob
 
     def store(self, value: Any) -> str:
+        # 0. Values already encoded once (see encoded.py) skip steps 1-3
+        if isinstance(value, EncodedValue):
+            if self.chunking is None or not self.chunking.applies(value.value):
+                handle = value.handle
+                if self.tracer is not None:
+                    self.tracer.on_store(handle, value.size)
+                return self._store_blob(handle, value.data)
+            value = value.value
+        # Frozen values from the decoded cache already know their handle
+        cache = self.decoded_cache
+        if cache is not None and cache.frozen:
+            handle = cache.handle_of(value)
+            if handle is not None:
+                self._gc_shade(handle, None)
+            if handle is not None and self._contains_blob(handle):
+                self._record_dedup(handle)
+                if self.tracer is not None:
+                    self.tracer.on_store(handle)
+                return handle
+        if isinstance(value, (tuple, MappingProxyType)):
+            value = thaw_value(value)
+        if self.chunking is not None and self.chunking.applies(value):
+            handle = self._store_chunked(value)
+            if self.tracer is not None:
+                self.tracer.on_store(handle, len(value))
+            return handle
+
         # 1. Encode to LC-B (canonical)
         encoded = encode_lcb(value)
-        
+
         # 2. Compute Hash
         h = compute_hash(encoded)
-        
+
         # 3. Generate Handle
         tag = get_type_tag(value)
         handle = f"&h_{tag}_{h}"
-        
-        # 4. Store
-        self._store[handle] = encoded
+
+        # 4. Store (unless already present)
+        if self.tracer is not None:
+            self.tracer.on_store(handle, len(encoded))
+        return self._store_blob(handle, encoded)
+
+    def store_encoded(self, encoded: bytes, digest: Optional[str] = None) -> str:
+        """
+        Store an already-encoded canonical LC-B blob without re-encoding.
+
+        Args:
+            encoded: LC-B bytes (must be canonical, e.g. from encode_lcb)
+            digest: Hex hash of `encoded` if already known
+
+        Returns:
+            Handle, identical to store(decode_lcb(encoded))
+        """
+        encoded = bytes(encoded)
+        if not encoded:
+            raise ValueError("Cannot store an empty LC-B blob")
+        handle = handle_for_encoded(encoded, digest)
+        if self.tracer is not None:
+            self.tracer.on_store(handle, len(encoded))
+        return self._store_blob(handle, encoded)
+
+    def _store_blob(self, handle: str, encoded: bytes) -> str:
+        self._gc_shade(handle, encoded)
+        if self._contains_blob(handle):
+            self._record_dedup(handle)
+            return handle
+        self._put_blob(handle, encoded)
+        self._journal_write(handle)
         return handle
 
+    def _store_chunked(self, data) -> str:
+        """Store chunks not already present, then the manifest."""
+        view = memoryview(data).cast('B')
+        handles, sizes = [], []
+        start = 0
+        for end in self.chunking.cut_points(view):
+            piece = view[start:end]
+            header = bytes_header(end - start)
+            digest = hashlib.blake2b(header, digest_size=32)
+            digest.update(piece)
+            handle = f"{HANDLE_PREFIX}blob_{digest.hexdigest()}"
+            self._gc_shade(handle, None)  # Before the lookup, as in _store_blob
+            if self._contains_blob(handle):
+                self._record_dedup(handle)
+            else:
+                self._store_blob(handle, header + piece)
+            handles.append(handle)
+            sizes.append(end - start)
+            start = end
+        encoded = encode_manifest(handles, sizes)
+        return self._store_blob(f"{HANDLE_PREFIX}{CHUNKED_TAG}_{compute_hash(encoded)}", encoded)
+
+    def _gc_shade(self, handle: str, encoded: Optional[bytes]):
+        """Report a write to the running GC cycle, if any (its write barrier)."""
+        barrier = self._gc_barrier  # Read once: the collector clears it when a cycle ends
+        if barrier is not None:
+            barrier(handle, encoded)
+
+    def _journal_write(self, handle: str):
+        if self._checkpoints:
+            self._journal_index[handle] = len(self._journal)
+            self._journal.append(handle)
+
+    def _record_dedup(self, handle: str):
+        self.dedup_hits += 1
+
+    # Bloom filter
+
+    def enable_bloom(self, fp_rate: float = DEFAULT_FP_RATE,
+                     capacity: Optional[int] = None) -> BloomFilter:
+        """
+        Attach a Bloom filter of the stored digests; returns it.
+
+        The filter saved by the last close() is reused if the store still
+        holds the same number of blobs, otherwise it is rebuilt from the
+        store. Call this right after opening the store, before other threads
+        or processes write to it: writes made without the filter are not in it.
+        """
+        count = len(self)
+        bloom = None
+        path = self._bloom_path
+        if path is not None:
+            bloom = BloomFilter.load(path, stamp=count)
+            if bloom is not None:
+                os.remove(path)  # Written again on close; a crash forces a rebuild
+                if bloom.fp_rate != fp_rate:
+                    bloom = None
+        if bloom is None:
+            bloom = self._build_bloom(fp_rate, capacity or max(DEFAULT_CAPACITY, 2 * count))
+        self.bloom = bloom
+        return bloom
+
+    def _build_bloom(self, fp_rate: float, capacity: int) -> BloomFilter:
+        bloom = BloomFilter(capacity, fp_rate)
+        for digest in self._iter_digests():
+            bloom.add(digest)
+        return bloom
+
+    def save_bloom(self):
+        """Save the Bloom filter next to the store (done by close())."""
+        if self.bloom is not None and self._bloom_path is not None:
+            self.bloom.save(self._bloom_path, stamp=len(self))
+
+    def _contains_blob(self, handle: str) -> bool:
+        """_has_blob, answered by the Bloom filter when it rules the handle out."""
+        bloom = self.bloom
+        if bloom is None:
+            return self._has_blob(handle)
+        if handle not in bloom:
+            return False
+        if self._has_blob(handle):
+            return True
+        bloom.false_positives += 1
+        return False
+
+    def _blob_added(self, handle: str):
+        """Record a newly written blob in the Bloom filter and handle index."""
+        if self.bloom is not None:
+            self.bloom.add(handle)
+        if self.index is not None:
+            self.index.add(handle)
+
+    def _blob_removed(self, handle: str):
+        """Drop a deleted blob from the handle index (Bloom filters keep it)."""
+        if self.index is not None:
+            self.index.discard(handle)
+
+    def _iter_digests(self) -> Iterable[str]:
+        """Hex digest of every stored blob (used to build the Bloom filter)."""
+        for handle in self._iter_handles():
+            parts = split_handle(handle)
+            yield parts[1] if parts is not None else handle
+
+    # Handle index
+
+    def enable_index(self) -> HandleIndex:
+        """
+        Attach an index of the stored handles by type tag and digest;
+        returns it. Like enable_bloom(), the index saved by the last close()
+        is reused if the store still holds the same number of blobs, and
+        writes made before this call by other processes are not in it.
+        """
+        index = None
+        path = self._handles_path
+        if path is not None:
+            index = HandleIndex.load(path, stamp=len(self))
+            if index is not None:
+                os.remove(path)  # Written again on close; a crash forces a rebuild
+        if index is None:
+            index = self._build_index()
+        self.index = index
+        return index
+
+    def _build_index(self) -> HandleIndex:
+        index = HandleIndex()
+        for handle in self._iter_handles():
+            index.add(handle)
+        return index
+
+    def save_index(self):
+        """Save the handle index next to the store (done by close())."""
+        if self.index is not None and self._handles_path is not None:
+            self.index.save(self._handles_path, stamp=len(self))
+
+    def _handle_index(self) -> HandleIndex:
+        return self.index if self.index is not None else self.enable_index()
+
+    def iter_by_type(self, tag: str) -> Iterator[str]:
+        """Handles of blobs with type tag `tag` ('map', 'list', ...), in digest order."""
+        return self._handle_index().iter_by_type(tag)
+
+    def count_by_type(self) -> Dict[str, int]:
+        """Number of blobs per type tag."""
+        return self._handle_index().count_by_type()
+
+    def resolve_prefix(self, prefix: str) -> str:
+        """
+        Expand an abbreviated handle ('&h_map_3fa', '&h_3fa' or '3fa') to
+        the one stored handle it matches; raises HandleNotFoundError if none
+        does and HandleError if it is ambiguous.
+        """
+        return self._handle_index().resolve_prefix(prefix)
+
+    # Batch API
+
+    def store_many(self, values: Iterable[Any], workers: int = 0, threads: bool = False,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[str]:
+        """
+        Store many values; returns handles in input order.
+
+        Encoding and hashing run in chunks of `chunk_size` on `workers`
+        processes (or threads when threads=True); workers=0 encodes in the
+        calling thread.
+        """
+        values = (thaw_value(v) if isinstance(v, (tuple, MappingProxyType)) else v
+                  for v in values)
+        chunking = self.chunking
+        if chunking is not None:
+            values = [v.value if isinstance(v, EncodedValue) and chunking.applies(v.value) else v
+                      for v in values]
+            large = [i for i, v in enumerate(values) if chunking.applies(v)]
+            if large:
+                handles = self.store_many([v for v in values if not chunking.applies(v)],
+                                          workers=workers, threads=threads, chunk_size=chunk_size)
+                for i in large:
+                    handles.insert(i, self._store_chunked(values[i]))
+                    if self.tracer is not None:
+                        self.tracer.on_store(handles[i], len(values[i]))
+                return handles
+        entries = [(handle_for_encoded(data, h), data)
+                   for data, h in encode_records(values, with_hash=True, workers=workers,
+                                                 threads=threads, chunk_size=chunk_size)]
+        if self.tracer is not None:
+            for handle, data in entries:
+                self.tracer.on_store(handle, len(data))
+        return self._store_entries(entries)
+
+    def retrieve_many(self, handles: Iterable[str], workers: int = 0, threads: bool = False,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE) -> List[Any]:
+        """
+        Retrieve many values in input order; raises HandleNotFoundError if
+        any handle is missing. Decoding is chunked like store_many.
+        """
+        handles = list(handles)
+        cache = self.decoded_cache
+        values: Dict[str, Any] = {}
+        missing = []
+        for handle in dict.fromkeys(handles):
+            if cache is not None:
+                found, value = cache.get(handle)
+                if found:
+                    values[handle] = value
+                    continue
+            if _is_chunked(handle):
+                values[handle] = self.retrieve(handle)
+                continue
+            missing.append(handle)
+
+        blobs = self._get_blobs(missing)
+        if self.tracer is not None:
+            for handle in handles:
+                if not _is_chunked(handle):  # Traced by retrieve()
+                    self.tracer.on_retrieve(handle, len(blobs[handle]) if handle in blobs else 0)
+        for handle in missing:
+            if handle not in blobs:
+                raise HandleNotFoundError(f"Handle not found: {handle}")
+        decoded = decode_records((blobs[h] for h in missing), workers=workers,
+                                 threads=threads, chunk_size=chunk_size)
+        for handle, value in zip(missing, decoded):
+            values[handle] = cache.put(handle, value, len(blobs[handle])) if cache is not None else value
+
+        result, seen = [], set()
+        for handle in handles:
+            # Repeated handles get their own copy
+            result.append(copy_value(values[handle]) if handle in seen else values[handle])
+            seen.add(handle)
+        return result
+
+    def _store_entries(self, entries: List[Tuple[str, bytes]]) -> List[str]:
+        return [self._store_blob(handle, encoded) for handle, encoded in entries]
+
+    def _get_blobs(self, handles: List[str]) -> Dict[str, bytes]:
+        found = {}
+        for handle in handles:
+            encoded = self._get_blob(handle)
+            if encoded is not None:
+                found[handle] = encoded
+        return found
+
     def retrieve(self, handle: str) -> Any:
-        if handle not in self._store:
+        cache = self.decoded_cache
+        if cache is not None:
+            found, value = cache.get(handle)
+            if found:
+                if self.tracer is not None:
+                    self.tracer.on_retrieve(handle)
+                return value
+        encoded = self._get_blob_view(handle)
+        if self.tracer is not None:
+            self.tracer.on_retrieve(handle, len(encoded) if encoded is not None else 0)
+        if encoded is None:
+            raise HandleNotFoundError(f"Handle not found: {handle}")
+        if _is_chunked(handle):
+            value = b"".join(self._iter_manifest(decode_manifest(encoded)))
+            size = len(value)
+        else:
+            value = decode_lcb(encoded)
+            size = len(encoded)
+        if cache is not None:
+            return cache.put(handle, value, size)
+        return value
+
+    # Chunked values
+
+    def iter_chunks(self, handle: str) -> Iterator[memoryview]:
+        """
+        Yield the bytes of a chunked (or plain BYTES) value piece by piece,
+        as views into the stored chunks, without joining them.
+        """
+        if not _is_chunked(handle):
+            yield self._chunk_payload(handle)
+            return
+        encoded = self._get_blob(handle)
+        if encoded is None:
+            raise HandleNotFoundError(f"Handle not found: {handle}")
+        yield from self._iter_manifest(decode_manifest(encoded))
+
+    def open_blob(self, handle: str) -> ChunkReader:
+        """Seekable binary stream over a chunked (or plain BYTES) value."""
+        if _is_chunked(handle):
+            encoded = self._get_blob(handle)
+            if encoded is None:
+                raise HandleNotFoundError(f"Handle not found: {handle}")
+            manifest = decode_manifest(encoded)
+            return ChunkReader(manifest["chunks"], manifest["sizes"], self._chunk_payload)
+        payload = self._chunk_payload(handle)
+        return ChunkReader([handle], [len(payload)], lambda _: payload)
+
+    def _iter_manifest(self, manifest: Dict[str, Any]) -> Iterator[memoryview]:
+        for chunk in manifest["chunks"]:
+            yield self._chunk_payload(chunk)
+
+    def _chunk_payload(self, handle: str) -> memoryview:
+        encoded = self._get_blob(handle)
+        if encoded is None:
             raise HandleNotFoundError(f"Handle not found: {handle}")
-        return decode_lcb(self._store[handle])
+        return bytes_payload(encoded)
 
     def exists(self, handle: str) -> bool:
-        return handle in self._store
+        if self.tracer is not None:
+            self.tracer.on_exists(handle)
+        return self._contains_blob(handle)
+
+    def blob_size(self, handle: str) -> int:
+        """Size of the canonical LC-B blob, without decompressing it."""
+        stored = self._get_stored(handle)
+        if stored is None:
+            raise HandleNotFoundError(f"Handle not found: {handle}")
+        return blob_size(stored)
+
+    def snapshot(self) -> CASSnapshot:
+        with self._exclusive():
+            if not self._checkpoints:
+                # No live checkpoint depends on the old journal
+                self._checkpoints = weakref.WeakValueDictionary()
+                self._journal = []
+                self._journal_index = {}
+            checkpoint = CASSnapshot(self, len(self._journal))
+            self._checkpoints[id(checkpoint)] = checkpoint
+            return checkpoint
+
+    def restore(self, snapshot: Mapping):
+        """
+        Roll back to a snapshot.
+
+        A CASSnapshot of this store is restored in O(writes since it was
+        taken); any other mapping of handle -> LC-B replaces the contents.
+        """
+        with self._exclusive():
+            if isinstance(snapshot, CASSnapshot) and snapshot._store is self:
+                removed = self._rollback(snapshot._position)
+                for handle, encoded in snapshot._extra.items():
+                    self._store_blob(handle, encoded)
+                if self.decoded_cache is not None:
+                    self.decoded_cache.discard(removed)
+                return
+
+            blobs = dict(snapshot)
+            for checkpoint in self._live_checkpoints():
+                if checkpoint._store is self:
+                    checkpoint._detach()
+            self._checkpoints = None
+            self._restore_blobs(blobs)
+            if self.decoded_cache is not None:
+                self.decoded_cache.clear()
+            # Drop the replaced contents
+            if self.bloom is not None:
+                self.bloom = self._build_bloom(self.bloom.fp_rate, self.bloom.capacity)
+            if self.index is not None:
+                self.index = self._build_index()
+
+    def _rollback(self, position: int) -> List[str]:
+        """Delete blobs journaled at or after `position`; returns their handles."""
+        removed = self._journal[position:]
+        for checkpoint in self._live_checkpoints():
+            if checkpoint._store is self and checkpoint._position > position:
+                # Keep what later checkpoints still need
+                for handle in self._journal[position:checkpoint._position]:
+                    if handle not in checkpoint._extra:
+                        checkpoint._extra[handle] = self._get_blob(handle)
+                checkpoint._position = position
+        for handle in removed:
+            del self._journal_index[handle]
+            self._delete_blob(handle)
+            self._blob_removed(handle)
+        del self._journal[position:]
+        return removed
+
+    def _keep_in_checkpoints(self, handle: str):
+        """Copy a blob about to be deleted outside a rollback into the live checkpoints holding it."""
+        encoded = None
+        for checkpoint in self._live_checkpoints():
+            if (checkpoint._store is self and handle not in checkpoint._extra
+                    and self._in_checkpoint(handle, checkpoint._position)):
+                if encoded is None:
+                    encoded = self._get_blob(handle)
+                checkpoint._extra[handle] = encoded
+
+    def _live_checkpoints(self) -> List[CASSnapshot]:
+        return list(self._checkpoints.values()) if self._checkpoints else []
+
+    def _in_checkpoint(self, handle: str, position: int) -> bool:
+        index = self._journal_index.get(handle)
+        return (index is None or index < position) and self._has_blob(handle)
+
+    def _exclusive(self):
+        """Context that excludes concurrent writers (none for this class)."""
+        return nullcontext()
+
+    def _restore_blobs(self, snapshot: Dict[str, bytes]):
+        self._store = {_require_key(handle): self._pack(encoded) for handle, encoded in snapshot.items()}
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    # Blob primitives
+
+    def _pack(self, encoded: bytes) -> bytes:
+        compression = self.compression
+        if compression is None or is_manifest(encoded):
+            return encoded  # Manifests stay plain so their tag is readable
+        return compression.pack(encoded)
+
+    def _get_blob(self, handle: str) -> Optional[bytes]:
+        stored = self._get_stored(handle)
+        return unpack_blob(stored) if stored is not None else None
+
+    def _get_blob_view(self, handle: str) -> Optional[bytes]:
+        """Canonical LC-B to decode in retrieve(); backends may return a view instead of a copy."""
+        return self._get_blob(handle)
+
+    def _put_blob(self, handle: str, encoded: bytes):
+        self._put_stored(handle, self._pack(encoded))
+        self._blob_added(handle)
+
+    # In-memory stores key blobs by raw digest (see handle.py); the tag is
+    # recovered from the blob's lead byte, as FileCASStore does, and a
+    # handle naming another tag does not match
+
+    def _get_stored(self, handle: str) -> Optional[bytes]:
+        stored = self._store.get(handle_key(handle))
+        return stored if stored is not None and _tag_matches(handle, stored) else None
+
+    def _put_stored(self, handle: str, stored: bytes):
+        self._store[_require_key(handle)] = stored
+
+    def _has_blob(self, handle: str) -> bool:
+        return self._get_stored(handle) is not None
+
+    def _delete_blob(self, handle: str):
+        if self._get_stored(handle) is not None:
+            self._store.pop(handle_key(handle), None)
+
+    def _iter_handles(self) -> List[str]:
+        return [_handle_of_stored(key, stored) for key, stored in list(self._store.items())]
+
+
+class ConcurrentCASStore(CASStore):
+    """
+    CONTRACT_802 in-memory CAS safe to share between threads.
+
+    Blobs are sharded into `stripes` dicts by hash prefix, each guarded by
+    its own lock, so writers of different content rarely contend. Encoding
+    and hashing happen outside any lock. Reads take no lock: they look up a
+    single dict item, which is atomic. snapshot() and restore() hold every
+    stripe lock, so they are atomic with respect to writers; readers racing
+    a rollback may see the rolled-back blobs disappear one at a time.
+    """
+    def __init__(self, stripes: int = 64):
+        if stripes < 1:
+            raise ValueError(f"stripes must be >= 1, got {stripes}")
+        self.stripes = stripes
+        # Reentrant: restore() re-stores blobs while holding every stripe
+        self._locks = [threading.RLock() for _ in range(stripes)]
+        self._shards: List[Dict[bytes, bytes]] = [{} for _ in range(stripes)]
+        self._dedup_counts = [0] * stripes
+        self._journal_lock = threading.Lock()
+
+    def _stripe(self, key: Optional[bytes]) -> int:
+        # The first two digest bytes pick the stripe
+        return ((key[0] << 8) | key[1]) % self.stripes if key is not None else 0
+
+    @property
+    def dedup_hits(self) -> int:
+        return sum(self._dedup_counts)
+
+    def _record_dedup(self, handle: str):
+        i = self._stripe(handle_key(handle))
+        with self._locks[i]:
+            self._dedup_counts[i] += 1
+
+    # Blob primitives
+
+    def _get_stored(self, handle: str) -> Optional[bytes]:
+        key = handle_key(handle)
+        stored = self._shards[self._stripe(key)].get(key)
+        return stored if stored is not None and _tag_matches(handle, stored) else None
 
-    def snapshot(self) -> Dict[str, bytes]:
-        return self._store.copy()
+    def _has_blob(self, handle: str) -> bool:
+        return self._get_stored(handle) is not None
 
-    def restore(self, snapshot: Dict[str, bytes]):
-        self._store = snapshot.copy()
+    def _put_stored(self, handle: str, stored: bytes):
+        key = _require_key(handle)
+        i = self._stripe(key)
+        with self._locks[i]:
+            self._shards[i][key] = stored
 
-_global_cas = CASStore()
+    def _store_blob(self, handle: str, encoded: bytes) -> str:
+        self._gc_shade(handle, encoded)
+        key = _require_key(handle)
+        i = self._stripe(key)
+        # Compress outside the lock; skipped for content already present
+        stored = self._pack(encoded) if key not in self._shards[i] else None
+        with self._locks[i]:
+            shard = self._shards[i]
+            if key in shard:
+                self._dedup_counts[i] += 1
+            else:
+                shard[key] = stored if stored is not None else self._pack(encoded)
+                self._blob_added(handle)
+                if self._checkpoints:
+                    with self._journal_lock:
+                        self._journal_write(handle)
+        return handle
+
+    def _delete_blob(self, handle: str):
+        key = handle_key(handle)
+        i = self._stripe(key)
+        with self._locks[i]:
+            stored = self._shards[i].get(key)
+            if stored is not None and _tag_matches(handle, stored):
+                del self._shards[i][key]
+
+    def _iter_handles(self) -> List[str]:
+        handles = []
+        for shard in self._shards:
+            handles.extend(_handle_of_stored(key, stored) for key, stored in list(shard.items()))
+        return handles
+
+    def _iter_digests(self) -> Iterable[str]:
+        return [key.hex() for shard in self._shards for key in list(shard)]
+
+    # Enumeration / snapshots
+
+    @contextmanager
+    def _exclusive(self):
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    def _restore_blobs(self, snapshot: Dict[str, bytes]):
+        # Caller holds every stripe lock
+        shards: List[Dict[bytes, bytes]] = [{} for _ in range(self.stripes)]
+        for handle, encoded in snapshot.items():
+            key = _require_key(handle)
+            shards[self._stripe(key)][key] = self._pack(encoded)
+        self._shards = shards
+
+
+class FileCASStore(CASStore):
+    """
+    CONTRACT_802 CAS persisted on the filesystem.
+
+    Layout: <root>/objects/<2-hex>/<remaining 62 hex> holding the LC-B blob.
+    The type tag is not stored; it is recovered from the blob's lead byte.
+
+    Writes go to a temp file in the same directory and are renamed into
+    place, so readers never see partial blobs. fsync is batched: every
+    `fsync_batch` writes (and on flush()/close()) the written files and their
+    directories are synced. fsync_batch=1 syncs each blob before its rename;
+    fsync_batch=0 never syncs.
+
+    memory_cache > 0 keeps that many recently used blobs in a read-through
+    LRU tier.
+    """
+    def __init__(self, root: str, fsync_batch: int = 64, memory_cache: int = 0,
+                 verify: bool = False):
+        self.root = os.path.abspath(root)
+        self.objects_dir = os.path.join(self.root, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.fsync_batch = fsync_batch
+        self.memory_cache = memory_cache
+        self.verify = verify
+        self._cache: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._unsynced: List[str] = []
+        self._tmp_counter = 0
+
+    def _path(self, handle: str) -> Optional[str]:
+        parts = split_handle(handle)
+        if parts is None:
+            return None
+        h = parts[1]
+        return os.path.join(self.objects_dir, h[:2], h[2:])
+
+    # Blob primitives
+
+    def _get_blob(self, handle: str) -> Optional[bytes]:
+        encoded = super()._get_blob(handle)
+        if encoded is not None and self.verify and compute_hash(encoded) != split_handle(handle)[1]:
+            raise IntegrityError(f"Blob hash mismatch for {handle}")
+        return encoded
+
+    def _get_stored(self, handle: str) -> Optional[bytes]:
+        cached = self._cache.get(handle)
+        if cached is not None:
+            self._cache.move_to_end(handle)
+            return cached
+
+        path = self._path(handle)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                stored = f.read()
+        except FileNotFoundError:
+            return None
+        if not _tag_matches(handle, stored):
+            return None  # Files are named by digest alone
+        self._cache_put(handle, stored)
+        return stored
+
+    def _put_stored(self, handle: str, stored: bytes):
+        path = self._path(handle)
+        if path is None:
+            raise HandleNotFoundError(f"Malformed handle: {handle}")
+        if handle in self._cache or os.path.exists(path):
+            return  # Content-addressed: already stored
+
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        self._tmp_counter += 1
+        tmp = os.path.join(directory, f".tmp-{os.getpid()}-{self._tmp_counter}")
+        with open(tmp, 'wb') as f:
+            f.write(stored)
+            if self.fsync_batch == 1:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+        self._cache_put(handle, stored)
+        if self.fsync_batch > 1:
+            self._unsynced.append(path)
+            if len(self._unsynced) >= self.fsync_batch:
+                self.flush()
+        elif self.fsync_batch == 1:
+            _fsync_dir(directory)
+
+    def _has_blob(self, handle: str) -> bool:
+        if handle in self._cache:
+            return True
+        path = self._path(handle)
+        if path is None:
+            return False
+        try:
+            with open(path, 'rb') as f:
+                return _tag_matches(handle, f.read(_TAG_HEAD_SIZE))
+        except FileNotFoundError:
+            return False
+
+    def _delete_blob(self, handle: str):
+        self._cache.pop(handle, None)
+        path = self._path(handle)
+        if path is not None and self._has_blob(handle):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    @property
+    def _bloom_path(self) -> str:
+        return os.path.join(self.root, "bloom")
+
+    @property
+    def _handles_path(self) -> str:
+        return os.path.join(self.root, "handles")
+
+    def _iter_digests(self) -> Iterator[str]:
+        # Digests are the file names; no blob is opened
+        for h, _ in self._iter_paths():
+            yield h
+
+    def _iter_handles(self) -> List[str]:
+        handles = []
+        for h, path in self._iter_paths():
+            with open(path, 'rb') as f:
+                head = f.read(_TAG_HEAD_SIZE)
+            handles.append(f"{HANDLE_PREFIX}{_tag_of_stored(head)}_{h}")
+        return handles
+
+    def _cache_put(self, handle: str, stored: bytes):
+        if self.memory_cache <= 0:
+            return
+        self._cache[handle] = stored
+        self._cache.move_to_end(handle)
+        while len(self._cache) > self.memory_cache:
+            self._cache.popitem(last=False)
+
+    # Durability
+
+    def flush(self):
+        """fsync blobs written since the last flush, then their directories."""
+        if not self._unsynced:
+            return
+        directories = set()
+        for path in self._unsynced:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except FileNotFoundError:
+                continue  # Removed by restore()
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            directories.add(os.path.dirname(path))
+        for directory in directories:
+            _fsync_dir(directory)
+        self._unsynced = []
+
+    def close(self):
+        self.flush()
+        self.save_bloom()
+        self.save_index()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Enumeration / snapshots
+
+    def _iter_paths(self) -> Iterator[Tuple[str, str]]:
+        """Yield (hash, path) for every stored blob."""
+        for prefix in sorted(os.listdir(self.objects_dir)):
+            directory = os.path.join(self.objects_dir, prefix)
+            if len(prefix) != 2 or not os.path.isdir(directory):
+                continue
+            for rest in sorted(os.listdir(directory)):
+                if rest.startswith('.tmp-'):
+                    continue
+                yield prefix + rest, os.path.join(directory, rest)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self._iter_paths())
+
+    def _restore_blobs(self, snapshot: Dict[str, bytes]):
+        keep = {split_handle(h)[1] for h in snapshot if split_handle(h) is not None}
+        for h, path in list(self._iter_paths()):
+            if h not in keep:
+                os.remove(path)
+        self._cache.clear()
+        for handle, encoded in snapshot.items():
+            if not self._has_blob(handle):
+                self._put_blob(handle, encoded)
+        for handle, encoded in snapshot.items():
+            self._put_blob(handle, encoded)
+        self.flush()
+
+
+def _fsync_dir(directory: str):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass  # Not supported on this platform/filesystem
+    finally:
+        os.close(fd)
+
+
+def _default_cas() -> CASStore:
+    # HLX_CAS_DIR selects a persistent store for the process-wide CAS
+    root = os.environ.get("HLX_CAS_DIR")
+    return FileCASStore(root) if root else ConcurrentCASStore()
+
+_global_cas = _default_cas()
 
 def get_cas_store() -> CASStore:
-    return _global_cas
\ No newline at end of file
+    return _global_cas
+
+def set_cas_store(store: CASStore) -> CASStore:
+    """Replace the process-wide CAS used by collapse/resolve; returns the previous one."""
+    global _global_cas
+    previous = _global_cas
+    _global_cas = store
+    return previous
@@ -0,0 +1,271 @@
+"""
+asyncio front end for the Content-Addressed Store.
+Reference: CONTRACT_802
+
+AsyncCASStore wraps any CASStore so request handlers never block the event
+loop: encoding, hashing and decoding run on a codec executor (threads by
+default, or a process pool), and backend I/O runs on a thread executor.
+Concurrent retrieves of the same handle share one read. Stores are
+buffered and written to the backend in grouped flushes.
+"""
+
+import asyncio
+from concurrent.futures import Executor
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .cas import CASStore, copy_value, get_cas_store, _is_chunked
+from .lc_codec import encode_lcb, decode_lcb, get_type_tag, compute_hash
+from .encoded import EncodedValue
+from .errors import HandleNotFoundError
+
+DEFAULT_FLUSH_INTERVAL = 0.05
+DEFAULT_FLUSH_BATCH = 256
+
+
+def _encode_values(values: List[Any]) -> List[Tuple[str, bytes, str]]:
+    """(handle, LC-B, hash) per value; module-level so process pools can run it."""
+    out = []
+    for value in values:
+        if isinstance(value, EncodedValue):
+            out.append((value.handle, value.data, value.digest))
+            continue
+        encoded = encode_lcb(value)
+        h = compute_hash(encoded)
+        out.append((f"&h_{get_type_tag(value)}_{h}", encoded, h))
+    return out
+
+
+def _decode_blobs(blobs: List[bytes]) -> List[Any]:
+    return [decode_lcb(encoded) for encoded in blobs]
+
+
+class AsyncCASStore:
+    """
+    Awaitable CAS over a synchronous backend.
+
+    store()/store_many() return as soon as the values are encoded; the blobs
+    are visible to this store's retrieves immediately and are written to the
+    backend every `flush_interval` seconds, or once `flush_batch` blobs are
+    buffered. Await flush() (or close()) for them to reach the backend.
+
+    Args:
+        backend: Synchronous store (default: the process-wide CAS)
+        codec_executor: Executor for encode/hash/decode (None = the loop's
+            default thread pool). With a process pool, decoding bypasses the
+            backend's decoded_cache.
+        io_executor: Executor for backend calls (None = default thread pool)
+    """
+    def __init__(self, backend: Optional[CASStore] = None,
+                 codec_executor: Optional[Executor] = None,
+                 io_executor: Optional[Executor] = None,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 flush_batch: int = DEFAULT_FLUSH_BATCH):
+        self.backend = backend if backend is not None else get_cas_store()
+        self.codec_executor = codec_executor
+        self.io_executor = io_executor
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self.coalesced_reads = 0
+        self._pending: Dict[str, Tuple[bytes, str]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._reads: Set[asyncio.Task] = set()
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._flush_timer: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_error: Optional[BaseException] = None
+
+    # Executors
+
+    async def _codec(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.codec_executor, fn, *args)
+
+    async def _io(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.io_executor, fn, *args)
+
+    # Writes
+
+    async def store(self, value: Any) -> str:
+        return (await self.store_many([value]))[0]
+
+    async def store_many(self, values: List[Any]) -> List[str]:
+        """Encode values in one executor call; returns handles in input order."""
+        values = list(values)
+        chunking = self.backend.chunking
+        large: Dict[int, Any] = {}
+        if chunking is not None:
+            large = {i: v for i, v in enumerate(values)
+                     if chunking.applies(v.value if isinstance(v, EncodedValue) else v)}
+        small = [v for i, v in enumerate(values) if i not in large] if large else values
+        encoded = await self._codec(_encode_values, small) if small else []
+        for handle, data, h in encoded:
+            self._pending.setdefault(handle, (data, h))
+        self._schedule_flush()
+        handles = [handle for handle, _, _ in encoded]
+        # Chunked by the backend itself (written at once), so the handle is
+        # the one backend.store gives
+        for i, value in large.items():
+            handles.insert(i, await self._io(self.backend.store, value))
+        return handles
+
+    def _schedule_flush(self):
+        if not self._pending or self._flush_task is not None:
+            return
+        if len(self._pending) >= self.flush_batch:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            self._start_flush()
+        elif self._flush_timer is None:
+            self._flush_timer = asyncio.get_running_loop().call_later(
+                self.flush_interval, self._start_flush)
+
+    def _start_flush(self):
+        self._flush_timer = None
+        if self._flush_task is None:
+            self._flush_task = asyncio.ensure_future(self._background_flush())
+
+    async def _background_flush(self):
+        try:
+            await self._flush_pending()
+        except Exception as e:
+            self._flush_error = e  # Re-raised by the next flush()
+        finally:
+            self._flush_task = None
+        self._schedule_flush()
+
+    async def _flush_pending(self):
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch = list(self._pending.items())
+            await self._io(self._write_batch, batch)
+            for handle, entry in batch:
+                if self._pending.get(handle) is entry:
+                    del self._pending[handle]
+
+    def _write_batch(self, batch: List[Tuple[str, Tuple[bytes, str]]]):
+        backend = self.backend
+        for _, (data, h) in batch:
+            backend.store_encoded(data, h)
+        if hasattr(backend, 'flush'):
+            backend.flush()
+
+    async def flush(self):
+        """Write all buffered blobs to the backend."""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        if self._flush_task is not None:
+            await asyncio.shield(self._flush_task)
+        await self._flush_pending()
+        error, self._flush_error = self._flush_error, None
+        if error is not None:
+            raise error
+
+    async def close(self):
+        """Flush buffered writes. The backend is left open."""
+        await self.flush()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    # Reads
+
+    async def retrieve(self, handle: str) -> Any:
+        return (await self.retrieve_many([handle]))[0]
+
+    async def retrieve_many(self, handles: List[str]) -> List[Any]:
+        """
+        Retrieve values in input order; raises HandleNotFoundError if any is
+        missing. Handles already being read by another call join that read.
+        """
+        loop = asyncio.get_running_loop()
+        futures: Dict[str, asyncio.Future] = {}
+        buffered: Dict[str, bytes] = {}
+        to_read: List[str] = []
+        for handle in handles:
+            if handle in futures or handle in buffered:
+                continue
+            entry = self._pending.get(handle)
+            if entry is not None:
+                buffered[handle] = entry[0]
+            elif handle in self._inflight:
+                futures[handle] = self._inflight[handle]
+                self.coalesced_reads += 1
+            else:
+                future = loop.create_future()
+                self._inflight[handle] = futures[handle] = future
+                to_read.append(handle)
+
+        if to_read:
+            task = asyncio.ensure_future(self._read(to_read))
+            self._reads.add(task)  # Keep a strong reference until done
+            task.add_done_callback(self._reads.discard)
+
+        values: Dict[str, Any] = {}
+        if buffered:
+            decoded = await self._codec(_decode_blobs, list(buffered.values()))
+            values.update(zip(buffered, decoded))
+        for handle, future in futures.items():
+            # Reads are shared between callers: each gets its own copy
+            values[handle] = copy_value(await asyncio.shield(future))
+
+        result, seen = [], set()
+        for handle in handles:
+            result.append(copy_value(values[handle]) if handle in seen else values[handle])
+            seen.add(handle)
+        return result
+
+    async def _read(self, handles: List[str]):
+        try:
+            if self.codec_executor is None or any(_is_chunked(h) for h in handles):
+                # Chunked values are reassembled by the backend, not decoded here
+                results = await self._io(self._retrieve_sync, handles)
+            else:
+                blobs = await self._io(self._read_blobs, handles)
+                found = [b for b in blobs if not isinstance(b, Exception)]
+                decoded = iter(await self._codec(_decode_blobs, found))
+                results = [b if isinstance(b, Exception) else next(decoded) for b in blobs]
+        except Exception as e:
+            results = [e] * len(handles)
+        for handle, result in zip(handles, results):
+            future = self._inflight.pop(handle)
+            if isinstance(result, Exception):
+                future.set_exception(result)
+                future.exception()  # Waiters re-raise it; don't log as unretrieved
+            else:
+                future.set_result(result)
+
+    def _retrieve_sync(self, handles: List[str]) -> List[Any]:
+        """Values in order, with a HandleNotFoundError in place of each missing one."""
+        backend = self.backend
+        if len(handles) > 1 and hasattr(backend, 'retrieve_many'):
+            try:
+                return backend.retrieve_many(handles)
+            except HandleNotFoundError:
+                pass  # Retry one by one to fail only the missing handles
+        results = []
+        for handle in handles:
+            try:
+                results.append(backend.retrieve(handle))
+            except HandleNotFoundError as e:
+                results.append(e)
+        return results
+
+    def _read_blobs(self, handles: List[str]) -> List[Any]:
+        blobs = []
+        for handle in handles:
+            encoded = self.backend._get_blob(handle)
+            blobs.append(encoded if encoded is not None
+                         else HandleNotFoundError(f"Handle not found: {handle}"))
+        return blobs
+
+    async def exists(self, handle: str) -> bool:
+        if handle in self._pending:
+            return True
+        return await self._io(self.backend.exists, handle)
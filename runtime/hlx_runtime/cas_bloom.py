@@ -0,0 +1,194 @@
+"""
+Bloom filter over the digests of a Content-Addressed Store.
+Reference: CONTRACT_802
+
+A CAS with a filter (CASStore.enable_bloom) answers exists() for absent
+handles, and skips the dedup lookup when storing new content, without
+touching its backend. Only positive answers are checked against the store.
+
+Positions come from the handle's digest, which is already uniformly
+distributed: its first 128 bits give the two halves of a double hash. When
+the filter fills up it adds a layer of twice the capacity and half the
+false-positive rate (a scalable Bloom filter), so the combined rate stays
+below `fp_rate` however many blobs are added.
+
+Saved form (see save/load):
+
+    MAGIC | fp_rate (f64) | capacity | count | stamp | layer count (u32)
+    per layer: capacity | count | bits | hashes (u32) | bit array
+"""
+
+import hashlib
+import math
+import os
+import struct
+import threading
+from typing import Dict, List, Optional, Tuple
+
+BLOOM_MAGIC = b'HLXBLOM1'
+DEFAULT_CAPACITY = 1 << 16
+DEFAULT_FP_RATE = 0.01
+
+_HEADER = struct.Struct('>8sdQQQI')
+_LAYER = struct.Struct('>QQQI')
+_MASK64 = (1 << 64) - 1
+
+
+def _hashes(handle: str) -> Tuple[int, int]:
+    """Double-hash seeds from the digest at the end of a handle."""
+    try:
+        value = int(handle[-64:-32], 16)
+    except ValueError:
+        # Not a well-formed handle; hash it so lookups still behave
+        value = int.from_bytes(hashlib.blake2b(handle.encode('utf-8'), digest_size=16).digest(), 'big')
+    return value >> 64, (value & _MASK64) | 1
+
+
+class _Layer:
+    __slots__ = ('capacity', 'count', 'size', 'hashes', 'bits')
+
+    def __init__(self, capacity: int, fp_rate: float, size: Optional[int] = None,
+                 hashes: Optional[int] = None, bits: Optional[bytearray] = None):
+        self.capacity = capacity
+        self.count = 0
+        if size is None:
+            size = max(8, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+            hashes = max(1, round(size / capacity * math.log(2)))
+        self.size = size
+        self.hashes = hashes
+        self.bits = bits if bits is not None else bytearray((size + 7) // 8)
+
+    def add(self, h1: int, h2: int):
+        bits, size = self.bits, self.size
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % size
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, seeds: Tuple[int, int]) -> bool:
+        h1, h2 = seeds
+        bits, size = self.bits, self.size
+        for i in range(self.hashes):
+            position = (h1 + i * h2) % size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def estimated_fp_rate(self) -> float:
+        return (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes
+
+
+class BloomFilter:
+    """
+    Set of handle digests with no false negatives and a bounded rate of
+    false positives. Adds are thread-safe; lookups take no lock.
+
+    `negatives` counts lookups answered "absent"; callers that check a
+    positive answer against the store count the misses in `false_positives`.
+    """
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, fp_rate: float = DEFAULT_FP_RATE):
+        if capacity < 1:
+            raise ValueError(f"capacity must be >= 1, got {capacity}")
+        if not 0 < fp_rate < 1:
+            raise ValueError(f"fp_rate must be between 0 and 1, got {fp_rate}")
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.count = 0
+        self.negatives = 0
+        self.false_positives = 0
+        self._layers: List[_Layer] = [_Layer(capacity, fp_rate / 2)]
+        self._lock = threading.Lock()
+
+    def add(self, handle: str):
+        seeds = _hashes(handle)
+        with self._lock:
+            layer = self._layers[-1]
+            if layer.count >= layer.capacity:
+                layer = _Layer(layer.capacity * 2, self.fp_rate / 2 ** (len(self._layers) + 1))
+                self._layers = self._layers + [layer]  # Copy: lookups iterate without the lock
+            layer.add(*seeds)
+            self.count += 1
+
+    def __contains__(self, handle: str) -> bool:
+        seeds = _hashes(handle)
+        for layer in self._layers:
+            if seeds in layer:
+                return True
+        self.negatives += 1
+        return False
+
+    def __len__(self) -> int:
+        return self.count
+
+    def estimated_fp_rate(self) -> float:
+        """False-positive rate implied by the current fill of every layer."""
+        miss = 1.0
+        for layer in self._layers:
+            miss *= 1 - layer.estimated_fp_rate()
+        return 1 - miss
+
+    def stats(self) -> Dict[str, float]:
+        checked = self.negatives + self.false_positives
+        return {
+            'count': self.count, 'layers': len(self._layers),
+            'capacity': sum(layer.capacity for layer in self._layers),
+            'bytes': sum(len(layer.bits) for layer in self._layers),
+            'fp_rate': self.fp_rate, 'estimated_fp_rate': self.estimated_fp_rate(),
+            'negatives': self.negatives, 'false_positives': self.false_positives,
+            'observed_fp_rate': self.false_positives / checked if checked else 0.0,
+        }
+
+    # Persistence
+
+    def save(self, path: str, stamp: int = 0):
+        """
+        Write the filter to `path` (atomically, via rename). `stamp` is
+        stored for load() to compare, e.g. the store's blob count.
+        """
+        with self._lock:
+            parts = [_HEADER.pack(BLOOM_MAGIC, self.fp_rate, self.capacity, self.count,
+                                  stamp, len(self._layers))]
+            for layer in self._layers:
+                parts.append(_LAYER.pack(layer.capacity, layer.count, layer.size, layer.hashes))
+                parts.append(bytes(layer.bits))
+        tmp = f"{path}.tmp-{os.getpid()}"
+        with open(tmp, 'wb') as f:
+            f.write(b''.join(parts))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, stamp: Optional[int] = None) -> Optional['BloomFilter']:
+        """
+        Read a filter written by save(). Returns None if the file is
+        missing, damaged, or was saved with a different `stamp`.
+        """
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        if len(data) < _HEADER.size:
+            return None
+        magic, fp_rate, capacity, count, saved_stamp, n_layers = _HEADER.unpack_from(data)
+        if magic != BLOOM_MAGIC or (stamp is not None and saved_stamp != stamp):
+            return None
+        bloom = cls(capacity, fp_rate)
+        layers = []
+        pos = _HEADER.size
+        for _ in range(n_layers):
+            if pos + _LAYER.size > len(data):
+                return None
+            layer_capacity, layer_count, size, hashes = _LAYER.unpack_from(data, pos)
+            pos += _LAYER.size
+            end = pos + (size + 7) // 8
+            if end > len(data) or size == 0 or hashes == 0:
+                return None
+            layer = _Layer(layer_capacity, fp_rate, size, hashes, bytearray(data[pos:end]))
+            layer.count = layer_count
+            layers.append(layer)
+            pos = end
+        if pos != len(data) or not layers:
+            return None
+        bloom._layers = layers
+        bloom.count = count
+        return bloom
@@ -0,0 +1,203 @@
+"""
+Content-defined chunking of large BYTES values in the Content-Addressed Store.
+Reference: CONTRACT_802
+
+With a Chunker assigned to `cas.chunking`, BYTES values of at least
+`threshold` bytes are split at content-defined boundaries (a gear rolling
+hash, FastCDC-style normalised chunking) and each chunk is stored as an
+ordinary `&h_blob_` value. The value itself is stored as a manifest under
+an `&h_chunked_` handle: the MANIFEST_MARKER byte, then the LC-B encoding of
+
+    {"$chunked": 1, "chunks": [chunk handles], "size": total, "sizes": [chunk sizes]}
+
+No LC-B value starts with the marker, so a manifest can never be mistaken
+for a stored map of the same shape.
+
+An edit moves only the boundaries near it, so a new revision of a large
+value shares most of its chunks with the old one, and only the chunks that
+changed are written. Chunk handles are HANDLE_REF values, so garbage
+collection traces them like any other reference.
+"""
+
+import bisect
+import hashlib
+import io
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .lc_codec import LC_TAGS, encode_lcb, decode_lcb, encode_uleb128, decode_uleb128, LCDecodeError
+
+CHUNKED_TAG = "chunked"
+MANIFEST_VERSION = 1
+
+# Lead byte of every manifest: not an LC-B tag, and without the
+# compression flag (0x80) set
+MANIFEST_MARKER = b'\x7f'
+
+_BYTES = LC_TAGS['BYTES']
+_MASK64 = (1 << 64) - 1
+# Fixed pseudo-random table so boundaries are identical across processes
+_GEAR = [int.from_bytes(hashlib.blake2b(bytes((i,)), digest_size=8).digest(), 'big')
+         for i in range(256)]
+
+
+def is_manifest(encoded: bytes) -> bool:
+    return encoded[:1] == MANIFEST_MARKER
+
+
+def make_manifest(handles: List[str], sizes: List[int]) -> Dict[str, Any]:
+    return {"$chunked": MANIFEST_VERSION, "chunks": handles, "size": sum(sizes), "sizes": sizes}
+
+
+def encode_manifest(handles: List[str], sizes: List[int]) -> bytes:
+    """Stored form of a manifest: the marker, then its LC-B encoding."""
+    return MANIFEST_MARKER + encode_lcb(make_manifest(handles, sizes))
+
+
+def decode_manifest(encoded: bytes) -> Dict[str, Any]:
+    if not is_manifest(encoded):
+        raise LCDecodeError("Blob is not a chunk manifest")
+    return decode_lcb(encoded[1:])
+
+
+def bytes_header(size: int) -> bytes:
+    """LC-B prefix of a BYTES value of `size` bytes."""
+    return bytes((_BYTES,)) + encode_uleb128(size)
+
+
+def bytes_payload(encoded: bytes) -> memoryview:
+    """Zero-copy view of the payload of an LC-B BYTES blob."""
+    if not encoded or encoded[0] != _BYTES:
+        raise LCDecodeError("Blob is not a BYTES value")
+    length, size = decode_uleb128(encoded, 1)
+    if 1 + size + length != len(encoded):
+        raise LCDecodeError("BYTES blob length mismatch")
+    return memoryview(encoded)[1 + size:]
+
+
+class Chunker:
+    """
+    Content-defined chunking parameters.
+
+    Assign to a store's `chunking` attribute. Chunks are between `min_size`
+    and `max_size` bytes and average about `avg_size`; BYTES values shorter
+    than `threshold` are stored whole.
+
+    Args:
+        avg_size: Target chunk size in bytes (a power of two)
+        min_size: Smallest chunk (default avg_size // 4)
+        max_size: Largest chunk (default avg_size * 8)
+        threshold: Smallest value to chunk (default avg_size * 4)
+    """
+    def __init__(self, avg_size: int = 64 * 1024, min_size: Optional[int] = None,
+                 max_size: Optional[int] = None, threshold: Optional[int] = None):
+        if avg_size < 64 or avg_size & (avg_size - 1):
+            raise ValueError(f"avg_size must be a power of two >= 64, got {avg_size}")
+        self.avg_size = avg_size
+        self.min_size = avg_size // 4 if min_size is None else min_size
+        self.max_size = avg_size * 8 if max_size is None else max_size
+        self.threshold = avg_size * 4 if threshold is None else threshold
+        if not 0 < self.min_size <= avg_size <= self.max_size:
+            raise ValueError("Chunk sizes must satisfy 0 < min_size <= avg_size <= max_size")
+
+        # Normalised chunking: a stricter mask before avg_size, a looser one after
+        bits = avg_size.bit_length() - 1
+        self._mask_small = ((1 << (bits + 1)) - 1) << (64 - bits - 1)
+        self._mask_large = ((1 << (bits - 1)) - 1) << (64 - bits + 1)
+
+    def applies(self, value: Any) -> bool:
+        return isinstance(value, (bytes, bytearray, memoryview)) and len(value) >= self.threshold
+
+    def cut_points(self, data) -> Iterator[int]:
+        """Yield the end offset of each chunk of `data`."""
+        view = memoryview(data).cast('B')
+        n = len(view)
+        start = 0
+        while start < n:
+            start = self._next_cut(view, start, n)
+            yield start
+
+    def _next_cut(self, view: memoryview, start: int, n: int) -> int:
+        if n - start <= self.min_size:
+            return n
+        limit = min(n, start + self.max_size)
+        normal = min(limit, start + self.avg_size)
+        gear = _GEAR
+        h = 0
+        i = start + self.min_size
+        mask = self._mask_small
+        for b in view[i:normal]:
+            h = ((h << 1) + gear[b]) & _MASK64
+            i += 1
+            if not h & mask:
+                return i
+        mask = self._mask_large
+        for b in view[i:limit]:
+            h = ((h << 1) + gear[b]) & _MASK64
+            i += 1
+            if not h & mask:
+                return i
+        return limit
+
+
+class ChunkReader(io.RawIOBase):
+    """
+    Seekable read-only stream over a chunked (or plain BYTES) value.
+
+    Chunks are fetched one at a time as the position reaches them; only the
+    current chunk is held in memory.
+    """
+    def __init__(self, handles: List[str], sizes: List[int],
+                 fetch: Callable[[str], memoryview]):
+        super().__init__()
+        self._handles = handles
+        self._starts = [0]
+        for size in sizes:
+            self._starts.append(self._starts[-1] + size)
+        self._fetch = fetch
+        self._pos = 0
+        self._index = -1
+        self._chunk: Optional[memoryview] = None
+
+    @property
+    def size(self) -> int:
+        return self._starts[-1]
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += self.size
+        elif whence != io.SEEK_SET:
+            raise ValueError(f"Invalid whence: {whence}")
+        if offset < 0:
+            raise ValueError(f"Negative seek position: {offset}")
+        self._pos = offset
+        return offset
+
+    def readinto(self, buffer) -> int:
+        out = memoryview(buffer).cast('B')
+        written = 0
+        while written < len(out) and self._pos < self.size:
+            index = bisect.bisect_right(self._starts, self._pos) - 1
+            if index != self._index:
+                self._chunk = self._fetch(self._handles[index])
+                self._index = index
+            offset = self._pos - self._starts[index]
+            n = min(len(out) - written, len(self._chunk) - offset)
+            out[written:written + n] = self._chunk[offset:offset + n]
+            written += n
+            self._pos += n
+        return written
+
+    def close(self):
+        self._chunk = None
+        super().close()
@@ -0,0 +1,137 @@
+"""
+Per-blob compression for the Content-Addressed Store.
+Reference: CONTRACT_802
+
+Handles are always computed over the canonical (uncompressed) LC-B bytes;
+compression only changes how a blob is stored. A compressed blob carries a
+small header:
+
+    0x80 | codec id (1) | canonical lead byte (1) | ULEB128(canonical size) | payload
+
+Canonical LC-B always starts with a tag byte below 0x80, so stored blobs
+without the high bit set are uncompressed. The header keeps the type tag
+and size readable without decompressing.
+"""
+
+import bz2
+import lzma
+import zlib
+from typing import Dict, Optional, Tuple
+
+from .lc_codec import encode_uleb128, decode_uleb128, LCDecodeError
+
+COMPRESSED_FLAG = 0x80
+
+# name -> (codec id, default level, valid levels)
+_CODECS = {
+    'zlib': (1, 6, range(0, 10)),
+    'lzma': (2, 6, range(0, 10)),
+    'bz2': (3, 9, range(1, 10)),
+}
+_CODEC_NAMES = {codec_id: name for name, (codec_id, _, _) in _CODECS.items()}
+
+COMPRESSION_CODECS = tuple(_CODECS)
+
+
+def _compress(codec: str, data: bytes, level: int) -> bytes:
+    if codec == 'zlib':
+        return zlib.compress(data, level)
+    if codec == 'lzma':
+        return lzma.compress(data, preset=level)
+    return bz2.compress(data, level)
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == 'zlib':
+        return zlib.decompress(data)
+    if codec == 'lzma':
+        return lzma.decompress(data)
+    return bz2.decompress(data)
+
+
+def is_compressed(stored: bytes) -> bool:
+    return bool(stored) and stored[0] & COMPRESSED_FLAG != 0
+
+
+def _read_header(stored: bytes) -> Tuple[str, int, int, int]:
+    """(codec, canonical lead byte, canonical size, payload offset)"""
+    codec = _CODEC_NAMES.get(stored[0] & ~COMPRESSED_FLAG)
+    if codec is None or len(stored) < 3:
+        raise LCDecodeError(f"Unknown compressed blob header: 0x{stored[0]:02x}")
+    size, n = decode_uleb128(stored, 2)
+    return codec, stored[1], size, 2 + n
+
+
+def unpack_blob(stored: bytes) -> bytes:
+    """Canonical LC-B bytes of a stored blob."""
+    if not is_compressed(stored):
+        return stored
+    codec, _, size, offset = _read_header(stored)
+    try:
+        encoded = _decompress(codec, stored[offset:])
+    except (zlib.error, lzma.LZMAError, OSError, EOFError) as e:
+        raise LCDecodeError(f"Corrupt {codec} blob: {e}") from None
+    if len(encoded) != size:
+        raise LCDecodeError(f"Compressed blob size mismatch: {len(encoded)} != {size}")
+    return encoded
+
+
+def blob_lead_byte(stored: bytes) -> Optional[int]:
+    """First byte of the canonical blob (its LC-B tag), read from the header."""
+    if not stored:
+        return None
+    return stored[1] if is_compressed(stored) else stored[0]
+
+
+def blob_size(stored: bytes) -> int:
+    """Size of the canonical blob, read from the header."""
+    return _read_header(stored)[2] if is_compressed(stored) else len(stored)
+
+
+class BlobCompressor:
+    """
+    Compresses blobs on write when that saves space.
+
+    Assign to a store's `compression` attribute. Blobs smaller than
+    `min_size`, or that would not shrink, are stored uncompressed. Reading
+    never depends on this setting: compressed blobs are recognised by their
+    header.
+    """
+    def __init__(self, codec: str = 'zlib', level: Optional[int] = None, min_size: int = 64):
+        if codec not in _CODECS:
+            raise ValueError(f"Unknown compression codec: {codec} (expected one of {COMPRESSION_CODECS})")
+        codec_id, default_level, levels = _CODECS[codec]
+        if level is None:
+            level = default_level
+        if level not in levels:
+            raise ValueError(f"Invalid {codec} level: {level}")
+        self.codec = codec
+        self.level = level
+        self.min_size = min_size
+        self._flag = COMPRESSED_FLAG | codec_id
+        self.compressed = 0
+        self.skipped = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+
+    def pack(self, encoded: bytes) -> bytes:
+        """Stored form of a canonical blob."""
+        stored = encoded
+        if len(encoded) >= self.min_size:
+            payload = _compress(self.codec, encoded, self.level)
+            header = bytes((self._flag, encoded[0])) + encode_uleb128(len(encoded))
+            if len(header) + len(payload) < len(encoded):
+                stored = header + payload
+        if stored is encoded:
+            self.skipped += 1
+        else:
+            self.compressed += 1
+        self.raw_bytes += len(encoded)
+        self.stored_bytes += len(stored)
+        return stored
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'compressed': self.compressed, 'skipped': self.skipped,
+            'raw_bytes': self.raw_bytes, 'stored_bytes': self.stored_bytes,
+        }
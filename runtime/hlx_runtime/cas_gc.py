@@ -0,0 +1,260 @@
+"""
+Mark-and-sweep garbage collection for the Content-Addressed Store.
+Reference: CONTRACT_802
+
+A blob is live if it is reachable from a root handle through HANDLE_REF
+values (strings beginning '&h_') embedded in LC-B. References are found by
+scanning the encoded bytes, skipping over everything else, so blobs are
+never fully decoded.
+
+CASCollector.collect() runs a whole cycle; step(budget) runs at most
+`budget` seconds of one, so a service can interleave collection with its
+own work. While a cycle is in progress the store reports every write to
+the collector (a write barrier), so content stored or deduplicated
+mid-cycle, and everything it references, survives the sweep.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from .cas import CASStore, HANDLE_PREFIX
+from .cas_chunk import is_manifest
+from .lc_codec import LC_TAGS, decode_uleb128, LCDecodeError
+
+_NULL = LC_TAGS['NULL']
+_INT = LC_TAGS['INT']
+_FLOAT = LC_TAGS['FLOAT']
+_TEXT = LC_TAGS['TEXT']
+_BYTES = LC_TAGS['BYTES']
+_ARR_START = LC_TAGS['ARR_START']
+_ARR_END = LC_TAGS['ARR_END']
+_OBJ_START = LC_TAGS['OBJ_START']
+_OBJ_END = LC_TAGS['OBJ_END']
+_HANDLE_REF = LC_TAGS['HANDLE_REF']
+_BOOLS = (LC_TAGS['BOOL_TRUE'], LC_TAGS['BOOL_FALSE'])
+
+def iter_handle_refs(data: bytes) -> Iterator[str]:
+    """Yield the HANDLE_REF strings embedded in an LC-B blob, without decoding it."""
+    if is_manifest(data):
+        data = data[1:]  # Marker, then the manifest's LC-B (see cas_chunk.py)
+    try:
+        yield from _scan_refs(data)
+    except IndexError:
+        raise LCDecodeError("Unexpected end of data") from None
+
+
+def _scan_refs(data: bytes) -> Iterator[str]:
+    view = memoryview(data)
+    end = len(data)
+    pos = 0
+    # Open containers as [is_object, items left]
+    stack: List[List] = []
+    while pos < end:
+        if stack:
+            top = stack[-1]
+            if top[1] == 0:
+                if data[pos] != (_OBJ_END if top[0] else _ARR_END):
+                    raise LCDecodeError(f"Expected container end at offset {pos}")
+                pos += 1
+                stack.pop()
+                continue
+            top[1] -= 1
+            if top[0]:  # Object: skip the untagged key
+                length, size = decode_uleb128(data, pos)
+                pos += size + length
+
+        tag = data[pos]
+        pos += 1
+        if tag == _NULL or tag in _BOOLS:
+            pass
+        elif tag == _INT:
+            while data[pos] & 0x80:
+                pos += 1
+            pos += 1
+        elif tag == _FLOAT:
+            pos += 8
+        elif tag == _TEXT or tag == _BYTES:
+            length, size = decode_uleb128(data, pos)
+            pos += size + length
+        elif tag == _HANDLE_REF:
+            length, size = decode_uleb128(data, pos)
+            pos += size
+            if pos + length > end:
+                break
+            yield str(view[pos:pos + length], 'utf-8')
+            pos += length
+        elif tag == _ARR_START or tag == _OBJ_START:
+            count, size = decode_uleb128(data, pos)
+            pos += size
+            stack.append([tag == _OBJ_START, count])
+        else:
+            raise LCDecodeError(f"Unknown tag: 0x{tag:02x}")
+
+    if stack or pos != end:
+        raise LCDecodeError("Unexpected end of data")
+
+
+def handles_in(value: Any) -> Set[str]:
+    """Handles referenced by a decoded value (strings beginning '&h_')."""
+    found = set()
+    pending = [value]
+    while pending:
+        item = pending.pop()
+        if isinstance(item, str):
+            if item.startswith(HANDLE_PREFIX):
+                found.add(item)
+        elif isinstance(item, (list, tuple)):
+            pending.extend(item)
+        elif isinstance(item, dict):
+            pending.extend(item.values())
+    return found
+
+
+def state_table_roots(table) -> Set[str]:
+    """Root set for a StateTable: its handle keys plus handles held in its values."""
+    roots = {h for h in table.entries if h.startswith(HANDLE_PREFIX)}
+    for value, _ in table.entries.values():
+        roots |= handles_in(value)
+    return roots
+
+
+class CASCollector:
+    """
+    Mark-and-sweep collector for one CASStore.
+
+    The backend must implement _iter_handles and _delete_blob. Handles
+    written since the oldest live snapshot are never swept, and blobs a
+    live snapshot holds are copied into it before they are swept, so
+    pending transactions can still roll back.
+    """
+
+    def __init__(self, cas: CASStore, roots: Iterable[str] = ()):
+        self.cas = cas
+        self.roots: Set[str] = set(roots)
+        self.cycles = 0
+        self.last_stats: Dict[str, int] = {}
+        self._phase = 'idle'
+        self._lock = threading.RLock()
+        self._marked: Set[str] = set()
+        self._grey: List[str] = []
+        self._candidates: List[str] = []
+        self._sweep_pos = 0
+        self._freed: List[str] = []
+
+    @property
+    def running(self) -> bool:
+        return self._phase != 'idle'
+
+    def collect(self, roots: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """Run a full cycle (finishing any cycle in progress); returns its stats."""
+        if roots is not None:
+            self.roots = set(roots)
+        while not self.step(None):
+            pass
+        return self.last_stats
+
+    def step(self, budget: Optional[float] = 0.005) -> bool:
+        """
+        Do up to `budget` seconds of collection (None = no limit), starting
+        a cycle if none is running. Returns True when a cycle completes.
+        """
+        deadline = None if budget is None else time.perf_counter() + budget
+        with self._lock:
+            if self._phase == 'idle':
+                self._start()
+            if self._phase == 'mark' and self._drain(deadline):
+                self._phase = 'sweep'
+            if self._phase == 'sweep' and self._sweep(deadline):
+                self._finish()
+                return True
+        return False
+
+    # Cycle
+
+    def _start(self):
+        self._marked = set()
+        self._grey = list(self.roots)
+        self._freed = []
+        self._sweep_pos = 0
+        self.cas._gc_barrier = self._shade
+        # Blobs stored after this point are not sweep candidates
+        self._candidates = self.cas._iter_handles()
+        self._phase = 'mark'
+
+    def _shade(self, handle: str, encoded: Optional[bytes] = None):
+        """Write barrier: keep `handle` (and what it references) this cycle."""
+        with self._lock:
+            if handle in self._marked:
+                return
+            self._marked.add(handle)
+            data = encoded if encoded is not None else self.cas._get_blob(handle)
+            if data is not None:
+                self._grey.extend(iter_handle_refs(data))
+
+    def _drain(self, deadline: Optional[float]) -> bool:
+        """Trace grey handles; False if the deadline hit first."""
+        cas, marked, grey = self.cas, self._marked, self._grey
+        n = 0
+        while grey:
+            n += 1
+            if deadline is not None and n > 1 and time.perf_counter() >= deadline:
+                return False
+            handle = grey.pop()
+            if handle in marked:
+                continue
+            data = cas._get_blob(handle)
+            if data is None:
+                continue  # Dangling reference
+            marked.add(handle)
+            for ref in iter_handle_refs(data):
+                if ref not in marked:
+                    grey.append(ref)
+        return True
+
+    def _sweep(self, deadline: Optional[float]) -> bool:
+        cas, marked, candidates = self.cas, self._marked, self._candidates
+        n = 0
+        while self._sweep_pos < len(candidates):
+            n += 1
+            if deadline is not None and n > 1 and time.perf_counter() >= deadline:
+                return False
+            # Trace anything the write barrier shaded since the last check
+            if self._grey:
+                self._drain(None)
+            handle = candidates[self._sweep_pos]
+            self._sweep_pos += 1
+            if handle in marked:
+                continue
+            with cas._exclusive():  # No snapshot is taken between copy and delete
+                if cas._checkpoints:
+                    if handle in cas._journal_index:
+                        continue  # Written inside a live snapshot; rollback owns it
+                    cas._keep_in_checkpoints(handle)
+                cas._delete_blob(handle)
+            cas._blob_removed(handle)
+            self._freed.append(handle)
+        return True
+
+    def _finish(self):
+        cas = self.cas
+        cas._gc_barrier = None
+        if cas.decoded_cache is not None:
+            cas.decoded_cache.discard(self._freed)
+        if hasattr(cas, 'flush'):
+            cas.flush()
+        self.cycles += 1
+        self.last_stats = {
+            'scanned': len(self._candidates),
+            'marked': len(self._marked),
+            'freed': len(self._freed),
+        }
+        self._phase = 'idle'
+        self._marked = set()
+        self._candidates = []
+        self._freed = []
+
+
+def collect_garbage(cas: CASStore, roots: Iterable[str]) -> Dict[str, int]:
+    """Free every blob in `cas` unreachable from `roots`; returns cycle stats."""
+    return CASCollector(cas, roots).collect()
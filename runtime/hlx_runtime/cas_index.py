@@ -0,0 +1,236 @@
+"""
+Secondary index of CAS handles by type tag and digest.
+Reference: CONTRACT_802
+
+A store with an index (CASStore.enable_index) lists the blobs of one type,
+counts blobs per type, and expands abbreviated handles ('&h_map_3fa', or
+just '3fa') the way git expands abbreviated object names, without
+scanning the store.
+
+Each type tag keeps its digests in a sorted list, so a prefix is a binary
+search followed by a short walk. New digests collect in a pending set and
+deletions in a removed set; both are merged into the sorted list by the
+next query, which replaces the list rather than changing it in place.
+
+Saved form (see save/load):
+
+    MAGIC | stamp (u64) | tag count (u32)
+    per tag: tag length (u8) | tag | digest count (u64) | 32-byte digests, sorted
+"""
+
+import bisect
+import os
+import struct
+import threading
+from typing import Dict, Iterator, List, Optional, Set
+
+from .errors import HandleError, HandleNotFoundError, E_HANDLE_COLLISION, E_HANDLE_FORMAT
+from .handle import HANDLE_PREFIX, split_handle
+
+INDEX_MAGIC = b'HLXHIDX1'
+
+_HEADER = struct.Struct('>8sQI')
+_COUNT = struct.Struct('>Q')
+_DIGEST_SIZE = 32
+_HEX = frozenset('0123456789abcdef')
+
+
+class _TagIndex:
+    __slots__ = ('digests', 'pending', 'removed')
+
+    def __init__(self, digests: Optional[List[str]] = None):
+        self.digests: List[str] = digests if digests is not None else []  # Sorted
+        self.pending: Set[str] = set()
+        self.removed: Set[str] = set()
+
+    def _indexed(self, digest: str) -> bool:
+        i = bisect.bisect_left(self.digests, digest)
+        return i < len(self.digests) and self.digests[i] == digest
+
+    def add(self, digest: str):
+        if digest in self.removed:
+            self.removed.discard(digest)
+        elif digest not in self.pending and not self._indexed(digest):
+            self.pending.add(digest)
+
+    def discard(self, digest: str):
+        if digest in self.pending:
+            self.pending.discard(digest)
+        elif self._indexed(digest):
+            self.removed.add(digest)
+
+    def settle(self) -> List[str]:
+        """Merge pending adds and removals; returns the sorted digests."""
+        if self.pending or self.removed:
+            digests = self.digests + sorted(self.pending)
+            digests.sort()  # Two sorted runs: a linear merge
+            if self.removed:
+                removed = self.removed
+                digests = [d for d in digests if d not in removed]
+            self.digests = digests
+            self.pending = set()
+            self.removed = set()
+        return self.digests
+
+    def __len__(self) -> int:
+        return len(self.digests) + len(self.pending) - len(self.removed)
+
+
+class HandleIndex:
+    """
+    Handles of a store grouped by type tag, each group sorted by digest.
+    Thread-safe; malformed handles are not indexed.
+    """
+    def __init__(self):
+        self._tags: Dict[str, _TagIndex] = {}
+        self._lock = threading.Lock()
+
+    def add(self, handle: str):
+        parts = split_handle(handle)
+        if parts is None:
+            return
+        tag, digest = parts
+        with self._lock:
+            group = self._tags.get(tag)
+            if group is None:
+                group = self._tags[tag] = _TagIndex()
+            group.add(digest)
+
+    def discard(self, handle: str):
+        parts = split_handle(handle)
+        if parts is None:
+            return
+        with self._lock:
+            group = self._tags.get(parts[0])
+            if group is not None:
+                group.discard(parts[1])
+
+    def __contains__(self, handle: str) -> bool:
+        parts = split_handle(handle)
+        if parts is None:
+            return False
+        with self._lock:
+            group = self._tags.get(parts[0])
+            if group is None:
+                return False
+            digest = parts[1]
+            return digest in group.pending or (group._indexed(digest) and digest not in group.removed)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(group) for group in self._tags.values())
+
+    # Queries
+
+    def _sorted(self, tag: str) -> List[str]:
+        with self._lock:
+            group = self._tags.get(tag)
+            return group.settle() if group is not None else []
+
+    def iter_by_type(self, tag: str) -> Iterator[str]:
+        """Handles with type tag `tag`, in digest order."""
+        head = f"{HANDLE_PREFIX}{tag}_"
+        for digest in self._sorted(tag):
+            yield head + digest
+
+    def count_by_type(self) -> Dict[str, int]:
+        with self._lock:
+            return {tag: len(group) for tag, group in sorted(self._tags.items()) if len(group)}
+
+    def match_prefix(self, prefix: str, limit: Optional[int] = None) -> List[str]:
+        """
+        Handles matching an abbreviated handle, in tag then digest order.
+
+        `prefix` is '&h_<tag>_<hex>', '&h_<hex>' or bare '<hex>'; without a
+        tag every type is searched. At most `limit` handles are returned.
+        """
+        tag, digest = self._parse_prefix(prefix)
+        with self._lock:
+            tags = [tag] if tag is not None else sorted(self._tags)
+        found: List[str] = []
+        for name in tags:
+            digests = self._sorted(name)
+            i = bisect.bisect_left(digests, digest)
+            while i < len(digests) and digests[i].startswith(digest):
+                found.append(f"{HANDLE_PREFIX}{name}_{digests[i]}")
+                if limit is not None and len(found) >= limit:
+                    return found
+                i += 1
+        return found
+
+    def resolve_prefix(self, prefix: str) -> str:
+        """
+        The one handle an abbreviated handle names. Raises
+        HandleNotFoundError if none matches and HandleError
+        (E_HANDLE_COLLISION) if several do.
+        """
+        found = self.match_prefix(prefix, limit=5)
+        if not found:
+            raise HandleNotFoundError(f"No handle matches prefix: {prefix}")
+        if len(found) > 1:
+            shown = ", ".join(found[:4]) + (", ..." if len(found) > 4 else "")
+            raise HandleError(f"Ambiguous handle prefix {prefix}: matches {shown}", E_HANDLE_COLLISION)
+        return found[0]
+
+    @staticmethod
+    def _parse_prefix(prefix: str):
+        rest = prefix[len(HANDLE_PREFIX):] if prefix.startswith(HANDLE_PREFIX) else prefix
+        tag, _, digest = rest.rpartition('_')
+        digest = digest.lower()
+        if not digest or not _HEX.issuperset(digest) or len(digest) > 2 * _DIGEST_SIZE:
+            raise HandleError(f"Not a handle prefix: {prefix}", E_HANDLE_FORMAT)
+        return tag or None, digest
+
+    # Persistence
+
+    def save(self, path: str, stamp: int = 0):
+        """
+        Write the index to `path` (atomically, via rename). `stamp` is
+        stored for load() to compare, e.g. the store's blob count.
+        """
+        with self._lock:
+            groups = [(tag, group.settle()) for tag, group in sorted(self._tags.items())]
+        parts = [_HEADER.pack(INDEX_MAGIC, stamp, len(groups))]
+        for tag, digests in groups:
+            name = tag.encode('utf-8')
+            parts.append(bytes((len(name),)) + name + _COUNT.pack(len(digests)))
+            parts.append(bytes.fromhex("".join(digests)))
+        tmp = f"{path}.tmp-{os.getpid()}"
+        with open(tmp, 'wb') as f:
+            f.write(b''.join(parts))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, stamp: Optional[int] = None) -> Optional['HandleIndex']:
+        """
+        Read an index written by save(). Returns None if the file is
+        missing, damaged, or was saved with a different `stamp`.
+        """
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        if len(data) < _HEADER.size:
+            return None
+        magic, saved_stamp, n_tags = _HEADER.unpack_from(data)
+        if magic != INDEX_MAGIC or (stamp is not None and saved_stamp != stamp):
+            return None
+        index = cls()
+        pos = _HEADER.size
+        try:
+            for _ in range(n_tags):
+                length = data[pos]
+                tag = data[pos + 1:pos + 1 + length].decode('utf-8')
+                pos += 1 + length
+                count = _COUNT.unpack_from(data, pos)[0]
+                pos += _COUNT.size
+                end = pos + count * _DIGEST_SIZE
+                if end > len(data):
+                    return None
+                text = data[pos:end].hex()
+                index._tags[tag] = _TagIndex([text[i:i + 64] for i in range(0, len(text), 64)])
+                pos = end
+        except (IndexError, struct.error, UnicodeDecodeError):
+            return None
+        return index if pos == len(data) else None
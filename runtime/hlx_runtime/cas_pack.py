@@ -0,0 +1,550 @@
+"""
+Packfile Content-Addressed Store.
+Reference: CONTRACT_802
+
+Blobs are appended to pack files; a pack is sealed once it reaches
+`pack_size` bytes (or on close) and gets a sorted index. Sealed packs and
+their indexes are memory-mapped and never modified. Layout (all integers
+big-endian):
+
+    pack-<n>.pack  PACK_MAGIC (8) | records
+                   record: digest (32) | ULEB128(length) | stored blob
+    pack-<n>.idx   INDEX_MAGIC (8) | pack size (u64) | fanout (256 x u32) |
+                   entries sorted by digest: digest (32) | offset (u64) | length (u32)
+
+fanout[b] is the number of entries whose digest's first byte is <= b, so a
+lookup binary-searches only entries sharing the first byte. Deleted blobs
+(garbage collection, snapshot rollback) are recorded in a tombstone file
+until repack() rewrites the live blobs into fresh packs.
+"""
+
+import mmap
+import os
+import re
+import struct
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from .cas import CASStore, HANDLE_PREFIX, _tag_of_stored, _tag_matches, _TAG_HEAD_SIZE, _fsync_dir
+from .handle import handle_key
+from .cas_compress import is_compressed, unpack_blob
+from .cas_chunk import bytes_payload
+from .lc_codec import encode_uleb128, decode_uleb128, LCDecodeError
+from .errors import HandleNotFoundError
+
+PACK_MAGIC = b'HLXPACK1'
+INDEX_MAGIC = b'HLXPIDX1'
+DIGEST_SIZE = 32
+DEFAULT_PACK_SIZE = 256 * 1024 * 1024
+
+_INDEX_HEADER = struct.Struct('>8sQ')
+_FANOUT = struct.Struct('>256I')
+_ENTRY = struct.Struct('>32sQI')
+_TOMBSTONE = struct.Struct('>32sIQ')
+_FANOUT_OFFSET = _INDEX_HEADER.size
+_ENTRIES_OFFSET = _FANOUT_OFFSET + _FANOUT.size
+
+_PACK_NAME = re.compile(r'^pack-(\d{6,})\.pack$')
+
+# Location of a stored blob: (pack id, offset of the blob, length)
+Location = Tuple[int, int, int]
+
+
+def _scan_pack(data, end: int) -> Tuple[List[Tuple[bytes, int, int]], int]:
+    """(digest, offset, length) of each complete record, and the end of the last one."""
+    records = []
+    pos = len(PACK_MAGIC)
+    while pos + DIGEST_SIZE < end:
+        try:
+            length, size = decode_uleb128(data, pos + DIGEST_SIZE)
+        except (LCDecodeError, IndexError):
+            break
+        start = pos + DIGEST_SIZE + size
+        if size == 0 or start + length > end:
+            break  # Torn final record
+        records.append((bytes(data[pos:pos + DIGEST_SIZE]), start, length))
+        pos = start + length
+    return records, pos
+
+
+class _SealedPack:
+    """A memory-mapped, immutable pack and its index."""
+
+    def __init__(self, pack_id: int, pack_path: str, index_path: str):
+        self.id = pack_id
+        self.pack_path = pack_path
+        self.index_path = index_path
+        self._pack_file = open(pack_path, 'rb')
+        self._index_file = open(index_path, 'rb')
+        self.data = mmap.mmap(self._pack_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.index = mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, pack_size = _INDEX_HEADER.unpack_from(self.index, 0)
+        if magic != INDEX_MAGIC or pack_size != len(self.data):
+            self.close()
+            raise LCDecodeError(f"Pack index does not match its pack: {index_path}")
+        self.fanout = (0,) + _FANOUT.unpack_from(self.index, _FANOUT_OFFSET)
+        self.count = self.fanout[-1]
+        if _ENTRIES_OFFSET + self.count * _ENTRY.size != len(self.index):
+            self.close()
+            raise LCDecodeError(f"Truncated pack index: {index_path}")
+        self.view = memoryview(self.data)
+
+    def find(self, digest: bytes) -> Optional[Tuple[int, int]]:
+        """(offset, length) of `digest` in this pack, by binary search."""
+        index = self.index
+        lo, hi = self.fanout[digest[0]], self.fanout[digest[0] + 1]
+        while lo < hi:
+            mid = (lo + hi) // 2
+            pos = _ENTRIES_OFFSET + mid * _ENTRY.size
+            key = index[pos:pos + DIGEST_SIZE]
+            if key < digest:
+                lo = mid + 1
+            elif key > digest:
+                hi = mid
+            else:
+                return struct.unpack_from('>QI', index, pos + DIGEST_SIZE)
+        return None
+
+    def entries(self) -> Iterator[Tuple[bytes, int, int]]:
+        """(digest, offset, length) in pack order."""
+        found = [_ENTRY.unpack_from(self.index, _ENTRIES_OFFSET + i * _ENTRY.size)
+                 for i in range(self.count)]
+        found.sort(key=lambda entry: entry[1])
+        return iter(found)
+
+    def close(self):
+        try:
+            if hasattr(self, 'view'):
+                self.view.release()
+            self.data.close()
+        except BufferError:
+            pass  # Views handed out by read_raw keep the mapping alive
+        self.index.close()
+        self._pack_file.close()
+        self._index_file.close()
+
+
+class PackCASStore(CASStore):
+    """
+    CONTRACT_802 CAS in append-only pack files under `root`.
+
+    New blobs are appended to the active pack with one write per blob (or
+    per store_many batch) and are readable immediately; flush() fsyncs them.
+    Reads from sealed packs come straight from the mapping: read_raw() and
+    the chunk readers return views without copying.
+    """
+    def __init__(self, root: str, pack_size: int = DEFAULT_PACK_SIZE, fsync: bool = True):
+        self.root = root
+        self.pack_size = pack_size
+        self.fsync = fsync
+        self._lock = threading.RLock()
+        self._packs: List[_SealedPack] = []  # Newest first
+        self._retired: List[_SealedPack] = []  # Replaced by repack(), still mapped for readers
+        self._readers = 0  # Lock-free reads in progress
+        self._readers_lock = threading.Lock()
+        self._active_id = 0
+        self._active_fd: Optional[int] = None
+        self._active_size = 0
+        self._active: Dict[bytes, Tuple[int, int]] = {}
+        self._dead: Set[Tuple[int, int]] = set()  # (pack id, offset)
+        self._dirty = False
+        os.makedirs(root, exist_ok=True)
+        self._open()
+
+    # Paths
+
+    def _pack_path(self, pack_id: int) -> str:
+        return os.path.join(self.root, f"pack-{pack_id:06d}.pack")
+
+    def _index_path(self, pack_id: int) -> str:
+        return os.path.join(self.root, f"pack-{pack_id:06d}.idx")
+
+    @property
+    def _tombstone_path(self) -> str:
+        return os.path.join(self.root, "tombstones")
+
+    @property
+    def _bloom_path(self) -> str:
+        return os.path.join(self.root, "bloom")
+
+    @property
+    def _handles_path(self) -> str:
+        return os.path.join(self.root, "handles")
+
+    def _pack_ids(self) -> List[int]:
+        ids = []
+        for name in os.listdir(self.root):
+            match = _PACK_NAME.match(name)
+            if match:
+                ids.append(int(match.group(1)))
+        return sorted(ids)
+
+    # Opening and sealing
+
+    def _open(self):
+        ids = self._pack_ids()
+        # An unsealed newest pack is resumed as the active pack
+        active = ids[-1] if ids and not os.path.exists(self._index_path(ids[-1])) else None
+        for pack_id in ids:
+            if pack_id == active:
+                continue
+            if not os.path.exists(self._index_path(pack_id)):
+                self._seal_existing(pack_id)  # Left unsealed by a crash
+            self._packs.insert(0, _SealedPack(pack_id, self._pack_path(pack_id),
+                                              self._index_path(pack_id)))
+        if active is not None:
+            self._resume_active(active)
+        else:
+            self._active_id = ids[-1] if ids else 0  # Next pack is created on first write
+        self._load_tombstones()
+
+    def _seal_existing(self, pack_id: int):
+        path = self._pack_path(pack_id)
+        with open(path, 'r+b') as f:
+            data = f.read()
+            if data[:len(PACK_MAGIC)] != PACK_MAGIC:
+                raise LCDecodeError(f"Not a pack file: {path}")
+            records, end = _scan_pack(data, len(data))
+            f.truncate(end)
+        self._write_index(pack_id, {digest: (offset, length) for digest, offset, length in records}, end)
+
+    def _resume_active(self, pack_id: int):
+        path = self._pack_path(pack_id)
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data[:len(PACK_MAGIC)] != PACK_MAGIC:
+            raise LCDecodeError(f"Not a pack file: {path}")
+        records, end = _scan_pack(data, len(data))
+        self._active_id = pack_id
+        self._active = {digest: (offset, length) for digest, offset, length in records}
+        os.truncate(path, end)
+        self._active_fd = os.open(path, os.O_RDWR | os.O_APPEND)
+        self._active_size = end
+
+    def _new_active(self, pack_id: int):
+        path = self._pack_path(pack_id)
+        self._active_fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT | os.O_TRUNC, 0o644)
+        os.write(self._active_fd, PACK_MAGIC)
+        self._active_id = pack_id
+        self._active = {}
+        self._active_size = len(PACK_MAGIC)
+
+    def _write_index(self, pack_id: int, entries: Dict[bytes, Tuple[int, int]], pack_size: int):
+        counts = [0] * 256
+        for digest in entries:
+            counts[digest[0]] += 1
+        fanout, total = [], 0
+        for count in counts:
+            total += count
+            fanout.append(total)
+        parts = [_INDEX_HEADER.pack(INDEX_MAGIC, pack_size), _FANOUT.pack(*fanout)]
+        parts.extend(_ENTRY.pack(digest, *entries[digest]) for digest in sorted(entries))
+        path = self._index_path(pack_id)
+        tmp = path + ".tmp"
+        with open(tmp, 'wb') as f:
+            f.write(b''.join(parts))
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+        if self.fsync:
+            _fsync_dir(self.root)
+
+    def _seal_active(self):
+        """Index the active pack, map it, and start a new one."""
+        with self._lock:
+            if self._active_fd is None:
+                return
+            if self.fsync:
+                os.fsync(self._active_fd)
+            os.close(self._active_fd)
+            self._active_fd = None
+            pack_id = self._active_id
+            if self._active:
+                self._write_index(pack_id, self._active, self._active_size)
+                # Copy on write: lock-free readers may be iterating the list
+                self._packs = [_SealedPack(pack_id, self._pack_path(pack_id),
+                                           self._index_path(pack_id))] + self._packs
+            else:
+                os.remove(self._pack_path(pack_id))
+            self._active = {}
+            self._dirty = False
+
+    # Tombstones
+
+    def _load_tombstones(self):
+        try:
+            with open(self._tombstone_path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+        whole = len(data) - len(data) % _TOMBSTONE.size
+        for _, pack_id, offset in _TOMBSTONE.iter_unpack(data[:whole]):
+            self._dead.add((pack_id, offset))
+
+    # Lookup
+
+    def _locate(self, handle: str) -> Optional[Location]:
+        digest = handle_key(handle)
+        if digest is None:
+            return None
+        dead = self._dead
+        found = self._active.get(digest)
+        if found is not None and (self._active_id, found[0]) not in dead:
+            return self._check_tag(handle, (self._active_id, found[0], found[1]))
+        for pack in self._packs:
+            found = pack.find(digest)
+            if found is not None and (pack.id, found[0]) not in dead:
+                return self._check_tag(handle, (pack.id, found[0], found[1]))
+        return None
+
+    def _check_tag(self, handle: str, location: Location) -> Optional[Location]:
+        """`location`, unless the blob there has a different type tag than `handle`."""
+        pack_id, offset, length = location
+        head = self._view((pack_id, offset, min(length, _TAG_HEAD_SIZE)))
+        return location if _tag_matches(handle, head) else None
+
+    def _view(self, location: Location) -> memoryview:
+        pack_id, offset, length = location
+        for pack in self._packs:
+            if pack.id == pack_id:
+                return pack.view[offset:offset + length]
+        # Active pack: not mapped yet. The lock keeps a writer from sealing
+        # it (closing the fd) mid-read; if that already happened, it is mapped
+        with self._lock:
+            if pack_id == self._active_id and self._active_fd is not None:
+                return memoryview(os.pread(self._active_fd, length, offset))
+            for pack in self._packs + self._retired:
+                if pack.id == pack_id:
+                    return pack.view[offset:offset + length]
+        raise HandleNotFoundError(f"Pack {pack_id} is gone")
+
+    @contextmanager
+    def _reading(self):
+        """Keep packs retired by repack() mapped until the read finishes."""
+        with self._readers_lock:
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._readers_lock:
+                self._readers -= 1
+                retired = self._retired if self._readers == 0 else []
+                if retired:
+                    self._retired = []
+            for pack in retired:
+                pack.close()
+
+    # Blob primitives
+
+    def _get_stored(self, handle: str) -> Optional[bytes]:
+        with self._reading():
+            location = self._locate(handle)
+            return bytes(self._view(location)) if location is not None else None
+
+    def _put_stored(self, handle: str, stored: bytes):
+        self._append([(handle, stored)])
+
+    def _store_blob(self, handle: str, encoded: bytes) -> str:
+        # The GC write barrier reads blobs under the collector's lock, and the
+        # collector reads and deletes under ours: call it before taking ours
+        self._gc_shade(handle, encoded)
+        with self._lock:
+            if self._contains_blob(handle):
+                self._record_dedup(handle)
+                return handle
+            self._put_blob(handle, encoded)
+            self._journal_write(handle)
+        return handle
+
+    def _has_blob(self, handle: str) -> bool:
+        with self._reading():
+            return self._locate(handle) is not None
+
+    def _delete_blob(self, handle: str):
+        with self._lock:
+            location = self._locate(handle)
+            if location is None:
+                return
+            pack_id, offset, _ = location
+            self._dead.add((pack_id, offset))
+            digest = handle_key(handle)
+            with open(self._tombstone_path, 'ab') as f:
+                f.write(_TOMBSTONE.pack(digest, pack_id, offset))
+
+    def _store_entries(self, entries: List[Tuple[str, bytes]]) -> List[str]:
+        """Append every new blob of a batch with a single write."""
+        barrier = self._gc_barrier  # Read once: the collector clears it when a cycle ends
+        if barrier is not None:
+            for handle, encoded in entries:
+                barrier(handle, encoded)
+        new = []
+        with self._lock:
+            seen = set()
+            for handle, encoded in entries:
+                if handle in seen or self._contains_blob(handle):
+                    self._record_dedup(handle)
+                    continue
+                seen.add(handle)
+                new.append((handle, self._pack(encoded)))
+            self._append(new)
+            for handle, _ in new:
+                self._blob_added(handle)
+                self._journal_write(handle)
+        return [handle for handle, _ in entries]
+
+    def _append(self, blobs: List[Tuple[str, bytes]]):
+        """Append blobs with one write per pack, sealing packs as they fill."""
+        with self._lock:
+            i = 0
+            while i < len(blobs):
+                if self._active_fd is None:
+                    self._new_active(self._active_id + 1)
+                parts = []
+                located = []
+                pos = self._active_size
+                while i < len(blobs) and pos < self.pack_size:
+                    handle, stored = blobs[i]
+                    digest = handle_key(handle)
+                    header = digest + encode_uleb128(len(stored))
+                    parts.append(header)
+                    parts.append(stored)
+                    located.append((digest, pos + len(header), len(stored)))
+                    pos += len(header) + len(stored)
+                    i += 1
+                os.write(self._active_fd, b''.join(parts))
+                self._active_size = pos
+                for digest, offset, length in located:
+                    self._active[digest] = (offset, length)
+                self._dirty = True
+                if self._active_size >= self.pack_size:
+                    self._seal_active()
+
+    def _live(self) -> Iterator[Tuple[bytes, Location]]:
+        """(digest, location) of every live blob, oldest pack first, without duplicates."""
+        seen = set()
+        dead = self._dead
+        for pack in reversed(self._packs):
+            for digest, offset, length in pack.entries():
+                if (pack.id, offset) not in dead and digest not in seen:
+                    seen.add(digest)
+                    yield digest, (pack.id, offset, length)
+        for digest, (offset, length) in sorted(self._active.items(), key=lambda item: item[1]):
+            if (self._active_id, offset) not in dead and digest not in seen:
+                seen.add(digest)
+                yield digest, (self._active_id, offset, length)
+
+    def _iter_handles(self) -> List[str]:
+        with self._lock:
+            return [f"{HANDLE_PREFIX}{_tag_of_stored(self._view((p, o, min(n, _TAG_HEAD_SIZE))))}_{d.hex()}"
+                    for d, (p, o, n) in self._live()]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(1 for _ in self._live())
+
+    def _iter_digests(self) -> List[str]:
+        with self._lock:
+            return [digest.hex() for digest, _ in self._live()]
+
+    # Zero-copy reads
+
+    def _get_blob_view(self, handle: str) -> Optional[memoryview]:
+        with self._reading():
+            location = self._locate(handle)
+            if location is None:
+                return None
+            view = self._view(location)
+        return memoryview(unpack_blob(bytes(view))) if is_compressed(view) else view
+
+    def read_raw(self, handle: str) -> memoryview:
+        """Canonical LC-B bytes of `handle`; a view into the pack unless compressed."""
+        view = self._get_blob_view(handle)
+        if view is None:
+            raise HandleNotFoundError(f"Handle not found: {handle}")
+        return view
+
+    def _chunk_payload(self, handle: str) -> memoryview:
+        with self._reading():
+            location = self._locate(handle)
+            if location is None:
+                raise HandleNotFoundError(f"Handle not found: {handle}")
+            view = self._view(location)
+        return bytes_payload(unpack_blob(bytes(view)) if is_compressed(view) else view)
+
+    def _restore_blobs(self, snapshot: Dict[str, bytes]):
+        with self._lock:
+            for handle in self._iter_handles():
+                if handle not in snapshot:
+                    self._delete_blob(handle)
+            self._store_entries(list(snapshot.items()))
+
+    # Maintenance
+
+    def repack(self) -> Dict[str, int]:
+        """
+        Rewrite every live blob into new packs and remove the old packs and
+        tombstones. Returns {packs_before, packs_after, blobs, bytes_before, bytes_after}.
+        """
+        with self._lock:
+            self._seal_active()
+            old = self._packs
+            bytes_before = sum(len(pack.data) for pack in old)
+            live = list(self._live())
+            first_new = self._active_id + 1
+            # New packs are sealed and indexed before any old pack is removed
+            for digest, location in live:
+                self._append([(f"{HANDLE_PREFIX}blob_{digest.hex()}", bytes(self._view(location)))])
+            self._seal_active()
+            new = [pack for pack in self._packs if pack.id >= first_new]
+            # Readers that picked up the old list may still be in an old pack:
+            # the last of them closes it (see _reading)
+            with self._readers_lock:
+                self._retired = self._retired + old
+                self._packs = new
+                retired = self._retired if self._readers == 0 else []
+                if retired:
+                    self._retired = []
+            self._dead = set()
+            for pack in retired:
+                pack.close()
+            for pack in old:
+                os.remove(pack.index_path)
+                os.remove(pack.pack_path)
+            try:
+                os.remove(self._tombstone_path)
+            except FileNotFoundError:
+                pass
+            if self.fsync:
+                _fsync_dir(self.root)
+            return {
+                'packs_before': len(old), 'packs_after': len(new), 'blobs': len(live),
+                'bytes_before': bytes_before, 'bytes_after': sum(len(pack.data) for pack in new),
+            }
+
+    # Durability
+
+    def flush(self):
+        """fsync blobs appended since the last flush."""
+        with self._lock:
+            if self._dirty and self._active_fd is not None and self.fsync:
+                os.fsync(self._active_fd)
+            self._dirty = False
+
+    def close(self):
+        """Seal the active pack, save the Bloom filter and handle index, and unmap everything."""
+        with self._lock:
+            self._seal_active()
+            self.save_bloom()
+            self.save_index()
+            for pack in self._packs + self._retired:
+                pack.close()
+            self._packs = []
+            self._retired = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,223 @@
+"""
+SQLite-backed Content-Addressed Store.
+Reference: CONTRACT_802
+
+One row per LC-B blob in a WAL-mode database. Each reading thread gets its
+own connection; writes are buffered and committed in grouped transactions.
+"""
+
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Set, Tuple
+
+from .cas import CASStore
+from .cas_compress import unpack_blob
+
+# Max handles per IN (...) query, below SQLITE_MAX_VARIABLE_NUMBER on old builds
+_IN_CHUNK = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    handle TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+) WITHOUT ROWID
+"""
+
+
+class SQLiteCASStore(CASStore):
+    """
+    CONTRACT_802 CAS stored in SQLite (WAL mode).
+
+    Writes are buffered and committed together every `batch_size` blobs (and
+    on flush()/close()); buffered blobs are visible to all threads of this
+    store immediately. Readers use one connection per thread.
+    """
+    def __init__(self, path: str, batch_size: int = 256, synchronous: str = "NORMAL"):
+        self.path = path
+        self.batch_size = batch_size
+        self.synchronous = synchronous
+        self._lock = threading.RLock()
+        self._pending: Dict[str, bytes] = {}
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+
+        self._writer = self._connect(check_same_thread=False)
+        self._writer.execute(_SCHEMA)
+        self._writer.commit()
+
+    def _connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=check_same_thread,
+                               isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        return conn
+
+    # Blob primitives
+
+    def _get_stored(self, handle: str) -> Optional[bytes]:
+        stored = self._pending.get(handle)
+        if stored is not None:
+            return stored
+        row = self._reader().execute(
+            "SELECT data FROM blobs WHERE handle = ?", (handle,)).fetchone()
+        return row[0] if row else None
+
+    def _put_stored(self, handle: str, stored: bytes):
+        with self._lock:
+            self._pending[handle] = stored
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+
+    def _delete_blob(self, handle: str):
+        with self._lock:
+            self._pending.pop(handle, None)
+            self._writer.execute("DELETE FROM blobs WHERE handle = ?", (handle,))
+
+    def _iter_handles(self) -> List[str]:
+        self.flush()
+        return [row[0] for row in self._reader().execute("SELECT handle FROM blobs")]
+
+    def _has_blob(self, handle: str) -> bool:
+        if handle in self._pending:
+            return True
+        row = self._reader().execute(
+            "SELECT 1 FROM blobs WHERE handle = ?", (handle,)).fetchone()
+        return row is not None
+
+    # Batch primitives
+
+    def _store_entries(self, entries: List[Tuple[str, bytes]]) -> List[str]:
+        # One grouped INSERT OR IGNORE instead of a dedup check per blob
+        barrier = self._gc_barrier  # Read once: the collector clears it when a cycle ends
+        if barrier is not None:
+            for handle, encoded in entries:
+                barrier(handle, encoded)
+        with self._lock:
+            self.flush()
+            # Handles already stored, found up front so only new rows are
+            # packed, inserted and reported
+            existing = self._select_handles([handle for handle, _ in entries])
+            new: Dict[str, bytes] = {}
+            for handle, encoded in entries:
+                if handle not in existing and handle not in new:
+                    new[handle] = encoded
+            inserted = self._write_rows([(handle, self._pack(encoded))
+                                         for handle, encoded in new.items()])
+            self.dedup_hits += len(entries) - inserted
+            for handle in new:
+                self._journal_write(handle)
+        for handle in new:
+            self._blob_added(handle)
+        return [handle for handle, _ in entries]
+
+    def _select_handles(self, handles: List[str]) -> Set[str]:
+        """Which of `handles` are in the database (one query per _IN_CHUNK handles)."""
+        found: Set[str] = set()
+        unique = list(dict.fromkeys(handles))
+        for i in range(0, len(unique), _IN_CHUNK):
+            chunk = unique[i:i + _IN_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            found.update(row[0] for row in self._writer.execute(
+                f"SELECT handle FROM blobs WHERE handle IN ({placeholders})", chunk))
+        return found
+
+    def _get_blobs(self, handles: List[str]) -> Dict[str, bytes]:
+        found: Dict[str, bytes] = {}
+        missing = []
+        for handle in handles:
+            stored = self._pending.get(handle)
+            if stored is not None:
+                found[handle] = unpack_blob(stored)
+            else:
+                missing.append(handle)
+
+        conn = self._reader()
+        for i in range(0, len(missing), _IN_CHUNK):
+            chunk = missing[i:i + _IN_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            for handle, data in conn.execute(
+                    f"SELECT handle, data FROM blobs WHERE handle IN ({placeholders})", chunk):
+                found[handle] = unpack_blob(data)
+        return found
+
+    # Durability
+
+    def _write_rows(self, rows) -> int:
+        """INSERT OR IGNORE rows in one transaction; returns how many were inserted."""
+        if not rows:
+            return 0
+        before = self._writer.total_changes
+        self._writer.execute("BEGIN")
+        try:
+            self._writer.executemany(
+                "INSERT OR IGNORE INTO blobs (handle, data) VALUES (?, ?)", rows)
+            self._writer.execute("COMMIT")
+        except Exception:
+            self._writer.execute("ROLLBACK")
+            raise
+        return self._writer.total_changes - before
+
+    def flush(self):
+        """Commit buffered writes in a single transaction."""
+        with self._lock:
+            if not self._pending:
+                return
+            rows = list(self._pending.items())
+            self._write_rows(rows)
+            self._pending = {}
+
+    def close(self):
+        self.flush()
+        self.save_bloom()
+        self.save_index()
+        with self._lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.ProgrammingError:
+                    pass  # Owned by another thread; closed when it exits
+            self._connections = []
+        self._local = threading.local()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Enumeration / snapshots
+
+    @property
+    def _bloom_path(self) -> str:
+        return self.path + ".bloom"
+
+    @property
+    def _handles_path(self) -> str:
+        return self.path + ".handles"
+
+    def __len__(self) -> int:
+        self.flush()
+        return self._reader().execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+
+    def _restore_blobs(self, snapshot: Dict[str, bytes]):
+        with self._lock:
+            self._pending = {}
+            self._writer.execute("BEGIN")
+            try:
+                self._writer.execute("DELETE FROM blobs")
+                self._writer.executemany(
+                    "INSERT INTO blobs (handle, data) VALUES (?, ?)",
+                    [(handle, self._pack(encoded)) for handle, encoded in snapshot.items()])
+                self._writer.execute("COMMIT")
+            except Exception:
+                self._writer.execute("ROLLBACK")
+                raise
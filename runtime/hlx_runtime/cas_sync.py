@@ -0,0 +1,279 @@
+"""
+Have/want synchronization between two Content-Addressed Stores.
+Reference: CONTRACT_802
+
+The client walks a 16-way tree over the hex digests of both stores. For
+each digest prefix it sends a summary (the number of blobs under it and
+the XOR of their digests); the server answers only for prefixes whose
+summary differs from its own, either with its handles under the prefix
+(once there are at most `leaf_size`) or by asking for the prefix to be
+split. Each level of the tree costs one round trip and only the prefixes
+that differ are sent. The client then pulls the blobs
+it lacks ("want") and pushes the ones the server lacks ("have").
+
+Messages are LC-B maps framed as records (see convert.write_record), so
+any pair of binary streams works as a transport: a Unix socket
+(sync_unix / make_unix_server), a pipe to a subprocess, or a socketpair.
+"""
+
+import bisect
+import functools
+import operator
+import socket
+import socketserver
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+from .cas import CASStore, split_handle
+from .convert import write_record, iter_records
+from .lc_codec import encode_lcb, decode_lcb, compute_hash, encode_uleb128
+from .errors import HLXError, IntegrityError, E_CAS_READ_FAIL
+
+HEX_DIGITS = "0123456789abcdef"
+DEFAULT_LEAF_SIZE = 32
+DEFAULT_BATCH_SIZE = 256
+
+
+class _Channel:
+    """Framed LC-B messages over a reader/writer pair, counting wire bytes."""
+
+    def __init__(self, reader: BinaryIO, writer: BinaryIO):
+        self._records = iter_records(reader)
+        self._writer = writer
+        self.sent = 0
+        self.received = 0
+
+    def send(self, message: Dict[str, Any]):
+        self.sent += write_record(self._writer, encode_lcb(message))
+        self._writer.flush()
+
+    def recv(self) -> Optional[Dict[str, Any]]:
+        data = next(self._records, None)
+        if data is None:
+            return None
+        self.received += len(encode_uleb128(len(data))) + len(data)
+        return decode_lcb(data)
+
+    def call(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        self.send(message)
+        reply = self.recv()
+        if reply is None:
+            raise HLXError(E_CAS_READ_FAIL, "Sync peer closed the connection")
+        if "error" in reply:
+            raise HLXError(E_CAS_READ_FAIL, f"Sync peer error: {reply['error']}")
+        return reply
+
+
+class _DigestIndex:
+    """Handles of a store sorted by digest, with per-prefix summaries."""
+
+    def __init__(self, handles: List[str]):
+        pairs = []
+        for handle in handles:
+            parts = split_handle(handle)
+            if parts is not None:
+                pairs.append((parts[1], handle))
+        pairs.sort()
+        self.digests = [d for d, _ in pairs]
+        self.handles = [h for _, h in pairs]
+        self._ints = [int(d, 16) for d in self.digests]
+
+    @classmethod
+    def of(cls, cas: CASStore) -> '_DigestIndex':
+        return cls(cas._iter_handles())
+
+    def _range(self, prefix: str) -> Tuple[int, int]:
+        lo = bisect.bisect_left(self.digests, prefix)
+        hi = bisect.bisect_left(self.digests, prefix + "g", lo) if prefix else len(self.digests)
+        return lo, hi
+
+    def summary(self, prefix: str) -> Tuple[int, bytes]:
+        """(count, XOR of digests) of the blobs whose digest starts with prefix."""
+        lo, hi = self._range(prefix)
+        fingerprint = functools.reduce(operator.xor, self._ints[lo:hi], 0)
+        return hi - lo, fingerprint.to_bytes(32, 'big')
+
+    def under(self, prefix: str) -> List[str]:
+        lo, hi = self._range(prefix)
+        return self.handles[lo:hi]
+
+
+# ============================================================================
+# Server
+# ============================================================================
+
+def serve(cas: CASStore, reader: BinaryIO, writer: BinaryIO,
+          leaf_size: int = DEFAULT_LEAF_SIZE):
+    """Answer one sync client on a reader/writer pair until it finishes."""
+    channel = _Channel(reader, writer)
+    index = None
+    while True:
+        request = channel.recv()
+        if request is None or request.get("op") == "done":
+            return
+        try:
+            op = request.get("op")
+            if op == "compare":
+                if index is None:
+                    index = _DigestIndex.of(cas)
+                reply = {"diffs": [_compare(index, r, leaf_size) for r in request["ranges"]]}
+            elif op == "list":
+                if index is None:
+                    index = _DigestIndex.of(cas)
+                reply = {"handles": [index.under(p) for p in request["prefixes"]]}
+            elif op == "sizes":
+                reply = {"sizes": [cas.blob_size(h) for h in request["handles"]]}
+            elif op == "get":
+                blobs = cas._get_blobs(request["handles"])
+                reply = {"blobs": [[h, blobs[h]] for h in request["handles"] if h in blobs]}
+            elif op == "put":
+                reply = {"stored": _store_received(cas, request["blobs"])}
+            else:
+                reply = {"error": f"Unknown sync op: {op}"}
+        except Exception as e:
+            reply = {"error": str(e)}
+        channel.send(reply)
+
+
+# _compare results besides a handle list
+_SAME = 0
+_SPLIT = 1
+
+
+def _compare(index: _DigestIndex, summary: List[Any], leaf_size: int) -> Any:
+    prefix, count, fingerprint = summary
+    mine = index.summary(prefix)
+    if mine == (count, fingerprint):
+        return _SAME
+    if mine[0] <= leaf_size:
+        return index.under(prefix)  # Small subtrees are listed outright
+    return _SPLIT
+
+
+def _store_received(cas: CASStore, blobs: List[List[Any]]) -> int:
+    entries = []
+    for handle, encoded in blobs:
+        parts = split_handle(handle)
+        if parts is None or compute_hash(encoded) != parts[1]:
+            raise IntegrityError(f"Received blob does not match its handle: {handle}")
+        entries.append((handle, encoded))
+    cas._store_entries(entries)
+    return len(entries)
+
+
+# ============================================================================
+# Client
+# ============================================================================
+
+def sync(cas: CASStore, reader: BinaryIO, writer: BinaryIO, pull: bool = True,
+         push: bool = True, dry_run: bool = False, batch_size: int = DEFAULT_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Converge `cas` with the server at the other end of reader/writer.
+
+    pull fetches blobs only the server has, push sends blobs only `cas` has.
+    With dry_run nothing is transferred; want_bytes/have_bytes report the
+    canonical size of what would be.
+
+    Returns:
+        {rounds, want, have, want_bytes, have_bytes, sent_bytes, received_bytes}
+    """
+    channel = _Channel(reader, writer)
+    try:
+        index = _DigestIndex.of(cas)
+        want, have, rounds = _reconcile(channel, index)
+        stats = {'rounds': rounds, 'want': len(want) if pull else 0, 'have': len(have) if push else 0,
+                 'want_bytes': 0, 'have_bytes': 0}
+        if pull:
+            for batch in _batches(want, batch_size):
+                if dry_run:
+                    stats['want_bytes'] += sum(channel.call({"op": "sizes", "handles": batch})["sizes"])
+                else:
+                    blobs = channel.call({"op": "get", "handles": batch})["blobs"]
+                    _store_received(cas, blobs)
+                    stats['want_bytes'] += sum(len(encoded) for _, encoded in blobs)
+        if push:
+            for batch in _batches(have, batch_size):
+                if dry_run:
+                    stats['have_bytes'] += sum(cas.blob_size(h) for h in batch)
+                else:
+                    blobs = cas._get_blobs(batch)
+                    channel.call({"op": "put", "blobs": [[h, blobs[h]] for h in batch if h in blobs]})
+                    stats['have_bytes'] += sum(len(encoded) for encoded in blobs.values())
+        if hasattr(cas, 'flush') and not dry_run:
+            cas.flush()
+    finally:
+        try:
+            channel.send({"op": "done"})
+        except OSError:
+            pass  # Peer already gone; the original error matters more
+    stats['sent_bytes'] = channel.sent
+    stats['received_bytes'] = channel.received
+    return stats
+
+
+def _reconcile(channel: _Channel, index: _DigestIndex) -> Tuple[List[str], List[str], int]:
+    """(handles only the server has, handles only the client has, round trips)"""
+    want: List[str] = []
+    have: List[str] = []
+    rounds = 0
+    pending = [""]
+    while pending:
+        rounds += 1
+        summaries = [[prefix, *index.summary(prefix)] for prefix in pending]
+        diffs = channel.call({"op": "compare", "ranges": summaries})["diffs"]
+        split, listed = [], []
+        for (prefix, count, _), diff in zip(summaries, diffs):
+            if diff == _SAME:
+                continue
+            if isinstance(diff, list):
+                _diff(diff, index.under(prefix), want, have)
+            elif count == 0:
+                listed.append(prefix)  # Nothing to compare against: fetch the listing
+            else:
+                split.extend(prefix + c for c in HEX_DIGITS)
+        if listed:
+            rounds += 1
+            for handles in channel.call({"op": "list", "prefixes": listed})["handles"]:
+                want.extend(handles)
+        pending = split
+    return want, have, rounds
+
+
+def _diff(theirs: List[str], mine: List[str], want: List[str], have: List[str]):
+    theirs_set, mine_set = set(theirs), set(mine)
+    want.extend(h for h in theirs if h not in mine_set)
+    have.extend(h for h in mine if h not in theirs_set)
+
+
+def _batches(items: List[str], size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+# ============================================================================
+# Unix sockets
+# ============================================================================
+
+class _SyncHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        serve(self.server.cas, self.rfile, self.wfile, self.server.leaf_size)
+
+
+def make_unix_server(cas: CASStore, path: str,
+                     leaf_size: int = DEFAULT_LEAF_SIZE) -> socketserver.UnixStreamServer:
+    """
+    Sync server listening on a Unix socket at `path`; run it with
+    serve_forever() or handle_request(). Each client gets its own thread.
+    """
+    server = socketserver.ThreadingUnixStreamServer(path, _SyncHandler)
+    server.daemon_threads = True
+    server.cas = cas
+    server.leaf_size = leaf_size
+    return server
+
+
+def sync_unix(cas: CASStore, path: str, **kwargs) -> Dict[str, int]:
+    """sync() with the server listening on the Unix socket at `path`."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        with sock.makefile('rb') as reader, sock.makefile('wb') as writer:
+            return sync(cas, reader, writer, **kwargs)
@@ -0,0 +1,353 @@
+"""
+Memory tier over a persistent Content-Addressed Store.
+Reference: CONTRACT_802
+
+TieredCASStore keeps recently used LC-B blobs in memory, bounded by a byte
+budget, in front of any CASStore backend that holds the full corpus. Hot
+handles resolve from a dict; misses read the backend and are admitted to
+the tier. A DecodedValueCache (decoded_bytes > 0) adds a second tier of
+decoded values on top.
+
+Writes either go straight to the backend (write-through) or stay dirty in
+memory until a background thread writes them in batches with the
+backend's grouped write (write-back). Dirty and pinned blobs are never
+evicted. flush() writes every dirty blob and flushes the backend; close()
+does the same and stops the flusher.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .cas import CASStore, DecodedValueCache, split_handle
+from .errors import HandleNotFoundError
+
+DEFAULT_MEMORY_BYTES = 64 * 1024 * 1024
+DEFAULT_FLUSH_INTERVAL = 0.05
+DEFAULT_FLUSH_BATCH = 256
+
+
+class TieredCASStore(CASStore):
+    """
+    CONTRACT_802 CAS with a bounded memory tier over a backend store.
+
+    Args:
+        backend: Store holding the full corpus (FileCASStore, PackCASStore, ...)
+        memory_bytes: Byte budget of the LC-B tier. Dirty and pinned blobs
+            count towards it but are not evicted, so they can exceed it.
+        decoded_bytes: Byte budget of a decoded-value tier (0 = none)
+        write_back: Buffer new blobs in memory and write them from a
+            background thread, instead of writing each one through
+        flush_interval: Seconds a dirty blob may wait for the flusher
+        flush_batch: Dirty blobs that wake the flusher early
+
+    Resize either tier at runtime with resize(). The backend must not be
+    written to directly while dirty blobs are pending, and a collector
+    (cas_gc) should run on this store rather than on its backend. close()
+    leaves the backend open.
+    """
+    def __init__(self, backend: CASStore, memory_bytes: int = DEFAULT_MEMORY_BYTES,
+                 decoded_bytes: int = 0, write_back: bool = False,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+                 flush_batch: int = DEFAULT_FLUSH_BATCH):
+        self.backend = backend
+        self.memory_bytes = memory_bytes
+        self.write_back = write_back
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        if decoded_bytes > 0:
+            self.decoded_cache = DecodedValueCache(max_bytes=decoded_bytes)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.flushes = 0
+        self._lru: 'OrderedDict[str, bytes]' = OrderedDict()  # Clean, unpinned
+        self._held: Dict[str, bytes] = {}  # Dirty or pinned; never evicted
+        self._dirty: Dict[str, None] = {}  # In write order
+        self._pinned: Set[str] = set()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._wake = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._flush_error: Optional[BaseException] = None
+        self._flusher: Optional[threading.Thread] = None
+        self._closed = False
+
+    # Memory tier
+
+    def _lookup(self, handle: str) -> Optional[bytes]:
+        with self._lock:
+            encoded = self._held.get(handle)
+            if encoded is None:
+                encoded = self._lru.get(handle)
+                if encoded is None:
+                    return None
+                self._lru.move_to_end(handle)
+            self.hits += 1
+            return encoded
+
+    def _admit(self, handle: str, encoded: bytes, dirty: bool = False):
+        """Add a blob to the tier (caller holds the lock)."""
+        if handle in self._held or handle in self._lru:
+            return
+        if dirty:
+            self._held[handle] = encoded
+            self._dirty[handle] = None
+        elif len(encoded) <= self.memory_bytes:
+            self._lru[handle] = encoded
+        else:
+            return  # Larger than the whole tier
+        self._bytes += len(encoded)
+        self._evict()
+
+    def _hold(self, handle: str):
+        """Move a tier entry out of the LRU so it cannot be evicted."""
+        encoded = self._lru.pop(handle, None)
+        if encoded is not None:
+            self._held[handle] = encoded
+
+    def _release(self, handle: str):
+        """Return a held entry to the LRU once it is clean and unpinned."""
+        if handle in self._dirty or handle in self._pinned:
+            return
+        encoded = self._held.pop(handle, None)
+        if encoded is not None:
+            self._lru[handle] = encoded
+
+    def _evict(self):
+        while self._bytes > self.memory_bytes and self._lru:
+            _, encoded = self._lru.popitem(last=False)
+            self._bytes -= len(encoded)
+            self.evictions += 1
+
+    def resize(self, memory_bytes: Optional[int] = None, decoded_bytes: Optional[int] = None):
+        """Change the tier budgets, evicting down to them at once."""
+        if memory_bytes is not None:
+            with self._lock:
+                self.memory_bytes = memory_bytes
+                self._evict()
+        if decoded_bytes is not None:
+            if self.decoded_cache is None:
+                if decoded_bytes > 0:
+                    self.decoded_cache = DecodedValueCache(max_bytes=decoded_bytes)
+            else:
+                self.decoded_cache.resize(max_bytes=decoded_bytes)
+
+    def pin(self, handles: Iterable[str]):
+        """
+        Keep blobs (e.g. root handles) in memory until unpinned, reading
+        them from the backend if needed.
+        """
+        for handle in handles:
+            encoded = self._get_blob(handle)
+            if encoded is None:
+                raise HandleNotFoundError(f"Handle not found: {handle}")
+            with self._lock:
+                self._pinned.add(handle)
+                if handle not in self._held and handle not in self._lru:
+                    self._held[handle] = encoded
+                    self._bytes += len(encoded)
+                self._hold(handle)
+
+    def unpin(self, handles: Iterable[str]):
+        with self._lock:
+            for handle in handles:
+                self._pinned.discard(handle)
+                self._release(handle)
+            self._evict()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'entries': len(self._lru) + len(self._held), 'bytes': self._bytes,
+                'dirty': len(self._dirty), 'pinned': len(self._pinned), 'flushes': self.flushes,
+            }
+
+    # Blob primitives
+
+    def _get_blob(self, handle: str) -> Optional[bytes]:
+        encoded = self._lookup(handle)
+        if encoded is not None:
+            return encoded
+        encoded = self.backend._get_blob(handle)
+        with self._lock:
+            self.misses += 1
+            if encoded is not None:
+                self._admit(handle, encoded)
+        return encoded
+
+    def _get_blobs(self, handles: List[str]) -> Dict[str, bytes]:
+        found: Dict[str, bytes] = {}
+        missing = []
+        for handle in handles:
+            encoded = self._lookup(handle)
+            if encoded is not None:
+                found[handle] = encoded
+            else:
+                missing.append(handle)
+        if missing:
+            loaded = self.backend._get_blobs(missing)
+            with self._lock:
+                self.misses += len(missing)
+                for handle, encoded in loaded.items():
+                    self._admit(handle, encoded)
+            found.update(loaded)
+        return found
+
+    def _get_stored(self, handle: str) -> Optional[bytes]:
+        encoded = self._lookup(handle)
+        return encoded if encoded is not None else self.backend._get_stored(handle)
+
+    def _put_blob(self, handle: str, encoded: bytes):
+        if not self.write_back:
+            self.backend._store_entries([(handle, encoded)])
+        with self._lock:
+            self._admit(handle, encoded, dirty=self.write_back)
+        self._blob_added(handle)
+        if self.write_back:
+            self._dirtied()
+
+    def _has_blob(self, handle: str) -> bool:
+        return handle in self._held or handle in self._lru or self.backend._contains_blob(handle)
+
+    def _delete_blob(self, handle: str):
+        # Not while the flusher is writing: a batch taken before the delete
+        # would write the blob back after it
+        with self._flush_lock:
+            with self._lock:
+                encoded = self._held.pop(handle, None) or self._lru.pop(handle, None)
+                if encoded is not None:
+                    self._bytes -= len(encoded)
+                self._dirty.pop(handle, None)
+                self._pinned.discard(handle)
+            self.backend._delete_blob(handle)
+
+    def _iter_handles(self) -> List[str]:
+        with self._lock:
+            dirty = list(self._dirty)
+        return self.backend._iter_handles() + [h for h in dirty if not self.backend._has_blob(h)]
+
+    def _iter_digests(self) -> Iterator[str]:
+        with self._lock:
+            dirty = list(self._dirty)
+        yield from self.backend._iter_digests()
+        for handle in dirty:
+            if not self.backend._has_blob(handle):
+                parts = split_handle(handle)
+                yield parts[1] if parts is not None else handle
+
+    # Batch primitives
+
+    def _store_entries(self, entries: List[Tuple[str, bytes]]) -> List[str]:
+        if self.write_back:
+            return super()._store_entries(entries)
+        # Write-through: one grouped backend write for the new blobs
+        new: Dict[str, bytes] = {}
+        for handle, encoded in entries:
+            self._gc_shade(handle, encoded)
+            if handle in new or self._contains_blob(handle):
+                self._record_dedup(handle)
+            else:
+                new[handle] = encoded
+        if new:
+            self.backend._store_entries(list(new.items()))
+            with self._lock:
+                for handle, encoded in new.items():
+                    self._admit(handle, encoded)
+            for handle in new:
+                self._blob_added(handle)
+                self._journal_write(handle)
+        return [handle for handle, _ in entries]
+
+    # Write-back
+
+    def _dirtied(self):
+        with self._lock:
+            if self._flusher is None and not self._closed:
+                self._flusher = threading.Thread(target=self._run_flusher, daemon=True,
+                                                 name="cas-tier-flusher")
+                self._flusher.start()
+            if len(self._dirty) == 1 or len(self._dirty) >= self.flush_batch:
+                self._wake.notify()
+            # Nothing left to evict: the writer waits for the backend instead
+            overfull = self._bytes > self.memory_bytes and not self._lru
+        if overfull:
+            self._write_dirty()
+
+    def _run_flusher(self):
+        while True:
+            with self._lock:
+                self._wake.wait_for(lambda: self._dirty or self._closed)
+                if self._closed:
+                    return
+                # Give the batch flush_interval seconds to fill
+                self._wake.wait_for(lambda: len(self._dirty) >= self.flush_batch or self._closed,
+                                    timeout=self.flush_interval)
+                if self._closed:
+                    return
+            try:
+                self._write_dirty()
+            except Exception as e:
+                self._flush_error = e  # Re-raised by the next flush()
+                with self._lock:
+                    self._wake.wait(self.flush_interval)  # Retry after a pause
+
+    def _write_dirty(self):
+        """Write every dirty blob to the backend in one grouped write."""
+        with self._flush_lock:
+            with self._lock:
+                batch = [(handle, self._held[handle]) for handle in self._dirty]
+            if not batch:
+                return
+            self.backend._store_entries(batch)
+            with self._lock:
+                for handle, _ in batch:
+                    if handle in self._dirty:  # Not deleted meanwhile
+                        del self._dirty[handle]
+                        self._release(handle)
+                self._evict()
+                self.flushes += 1
+
+    def flush(self):
+        """Write dirty blobs to the backend, then flush the backend."""
+        self._write_dirty()
+        if hasattr(self.backend, 'flush'):
+            self.backend.flush()
+        error, self._flush_error = self._flush_error, None
+        if error is not None:
+            raise error
+
+    def close(self):
+        """Stop the flusher and flush. The backend is left open."""
+        with self._lock:
+            self._closed = True
+            self._wake.notify_all()
+            flusher, self._flusher = self._flusher, None
+        if flusher is not None:
+            flusher.join()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Enumeration / snapshots
+
+    def __len__(self) -> int:
+        with self._lock:
+            dirty = list(self._dirty)
+        return len(self.backend) + sum(1 for h in dirty if not self.backend._has_blob(h))
+
+    def _restore_blobs(self, snapshot: Dict[str, bytes]):
+        with self._flush_lock:  # Not while the flusher is writing
+            with self._lock:
+                self._lru.clear()
+                self._held.clear()
+                self._dirty.clear()
+                self._bytes = 0
+                pinned, self._pinned = self._pinned, set()
+            self.backend.restore(snapshot)
+        self.pin(h for h in pinned if h in snapshot)
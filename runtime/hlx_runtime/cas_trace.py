@@ -0,0 +1,372 @@
+"""
+CAS access traces and an offline cache simulator.
+Reference: CONTRACT_802
+
+Assign an AccessTracer to `cas.tracer` (a CASStore or a SimpleCAS) to log
+every store/retrieve/exists call to a compact binary file; replay it with
+simulate() (or `python -m hlx_runtime.cli simulate <trace>`) to see the hit
+ratio an LRU, LFU, ARC or 2Q memory tier of a given size would have had.
+
+Trace layout:
+
+    MAGIC | start time (f64, Unix seconds)
+    per access: op (1) | key (8) | ULEB128(size) | ULEB128(µs since previous)
+
+The key is the first 64 bits of the handle's digest. A size of 0 means it
+was not known at the call (decoded-cache hits, exists, SimpleCAS.get); the
+simulator uses the last size seen for the key.
+"""
+
+import hashlib
+import heapq
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Union
+
+from .lc_codec import encode_uleb128, decode_uleb128, LCDecodeError
+
+TRACE_MAGIC = b'HLXTRAC1'
+TRACE_STORE = 1
+TRACE_RETRIEVE = 2
+TRACE_EXISTS = 3
+
+_START = struct.Struct('>d')
+_KEY_SIZE = 8
+
+
+def _trace_key(handle: str) -> bytes:
+    digest = handle.rpartition('_')[2]
+    try:
+        return bytes.fromhex(digest[:2 * _KEY_SIZE]) if len(digest) >= 2 * _KEY_SIZE else _hashed_key(handle)
+    except ValueError:
+        return _hashed_key(handle)
+
+
+def _hashed_key(handle: str) -> bytes:
+    return hashlib.blake2b(handle.encode('utf-8'), digest_size=_KEY_SIZE).digest()
+
+
+class TraceRecord(NamedTuple):
+    op: int
+    key: str  # 16 hex digits
+    size: int
+    timestamp: float  # Unix seconds
+
+
+class AccessTracer:
+    """
+    Appends one record per CAS access to a trace file. Thread-safe; writes
+    are buffered, so call close() (or use it as a context manager) to make
+    sure the tail reaches the file.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.records = 0
+        self._lock = threading.Lock()
+        self._file = open(path, 'wb')
+        self._file.write(TRACE_MAGIC + _START.pack(time.time()))
+        self._last = time.monotonic_ns() // 1000
+
+    def record(self, op: int, handle: str, size: int = 0):
+        key = _trace_key(handle)
+        with self._lock:
+            if self._file is None:
+                return
+            now = time.monotonic_ns() // 1000
+            self._file.write(bytes((op,)) + key + encode_uleb128(size) + encode_uleb128(now - self._last))
+            self._last = now
+            self.records += 1
+
+    # Hooks called by CASStore and SimpleCAS
+
+    def on_store(self, handle: str, size: int = 0):
+        self.record(TRACE_STORE, handle, size)
+
+    def on_retrieve(self, handle: str, size: int = 0):
+        self.record(TRACE_RETRIEVE, handle, size)
+
+    def on_exists(self, handle: str):
+        self.record(TRACE_EXISTS, handle)
+
+    def flush(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_trace(source: Union[str, bytes]) -> Iterator[TraceRecord]:
+    """Yield the records of a trace file (path) or trace bytes."""
+    if isinstance(source, str):
+        with open(source, 'rb') as f:
+            data = f.read()
+    else:
+        data = source
+    header = len(TRACE_MAGIC) + _START.size
+    if data[:len(TRACE_MAGIC)] != TRACE_MAGIC or len(data) < header:
+        raise LCDecodeError("Not a CAS access trace")
+    micros = _START.unpack_from(data, len(TRACE_MAGIC))[0] * 1e6
+    pos = header
+    end = len(data)
+    while pos < end:
+        if pos + 1 + _KEY_SIZE > end:
+            raise LCDecodeError(f"Truncated trace record at offset {pos}")
+        op = data[pos]
+        key = data[pos + 1:pos + 1 + _KEY_SIZE].hex()
+        pos += 1 + _KEY_SIZE
+        size, n = decode_uleb128(data, pos)
+        pos += n
+        delta, n = decode_uleb128(data, pos)
+        pos += n
+        micros += delta
+        yield TraceRecord(op, key, size, micros / 1e6)
+
+
+# ============================================================================
+# Replacement policies (capacity in entries)
+# ============================================================================
+
+class _LRU:
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._entries: 'OrderedDict[str, None]' = OrderedDict()
+
+    def access(self, key: str) -> bool:
+        entries = self._entries
+        if key in entries:
+            entries.move_to_end(key)
+            return True
+        entries[key] = None
+        if len(entries) > self.capacity:
+            entries.popitem(last=False)
+        return False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class _LFU:
+    """Least frequently used; ties go to the least recently used."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._counts: Dict[str, int] = {}
+        self._heap: List[Any] = []  # (count, tick, key); stale entries skipped
+        self._tick = 0
+
+    def access(self, key: str) -> bool:
+        self._tick += 1
+        count = self._counts.get(key)
+        hit = count is not None
+        if not hit:
+            if len(self._counts) >= self.capacity:
+                self._evict()
+            count = 0
+        self._counts[key] = count + 1
+        heapq.heappush(self._heap, (count + 1, self._tick, key))
+        if len(self._heap) > 4 * self.capacity + 64:
+            self._compact()
+        return hit
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def _evict(self):
+        while True:
+            count, _, key = heapq.heappop(self._heap)
+            if self._counts.get(key) == count:
+                del self._counts[key]
+                return
+
+    def _compact(self):
+        latest: Dict[str, Any] = {}
+        for entry in self._heap:
+            if self._counts.get(entry[2]) == entry[0]:
+                previous = latest.get(entry[2])
+                if previous is None or previous[1] < entry[1]:
+                    latest[entry[2]] = entry
+        self._heap = list(latest.values())
+        heapq.heapify(self._heap)
+
+
+class _ARC:
+    """Adaptive Replacement Cache (Megiddo & Modha)."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.p = 0
+        self.t1: 'OrderedDict[str, None]' = OrderedDict()
+        self.t2: 'OrderedDict[str, None]' = OrderedDict()
+        self.b1: 'OrderedDict[str, None]' = OrderedDict()
+        self.b2: 'OrderedDict[str, None]' = OrderedDict()
+
+    def _replace(self, in_b2: bool):
+        if self.t1 and (len(self.t1) > self.p or (in_b2 and len(self.t1) == self.p)):
+            key, _ = self.t1.popitem(last=False)
+            self.b1[key] = None
+        else:
+            key, _ = self.t2.popitem(last=False)
+            self.b2[key] = None
+
+    def access(self, key: str) -> bool:
+        c = self.capacity
+        if key in self.t1:
+            del self.t1[key]
+            self.t2[key] = None
+            return True
+        if key in self.t2:
+            self.t2.move_to_end(key)
+            return True
+        if key in self.b1:
+            self.p = min(c, self.p + max(len(self.b2) // len(self.b1), 1))
+            self._replace(False)
+            del self.b1[key]
+            self.t2[key] = None
+            return False
+        if key in self.b2:
+            self.p = max(0, self.p - max(len(self.b1) // len(self.b2), 1))
+            self._replace(True)
+            del self.b2[key]
+            self.t2[key] = None
+            return False
+        l1 = len(self.t1) + len(self.b1)
+        if l1 == c:
+            if len(self.t1) < c:
+                self.b1.popitem(last=False)
+                self._replace(False)
+            else:
+                self.t1.popitem(last=False)
+        elif l1 < c and l1 + len(self.t2) + len(self.b2) >= c:
+            if l1 + len(self.t2) + len(self.b2) == 2 * c:
+                self.b2.popitem(last=False)
+            self._replace(False)
+        self.t1[key] = None
+        return False
+
+    def __len__(self) -> int:
+        return len(self.t1) + len(self.t2)
+
+
+class _TwoQ:
+    """Full 2Q (Johnson & Shasha): A1in FIFO, A1out ghost list, Am LRU."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.kin = max(1, capacity // 4)
+        self.kout = max(1, capacity // 2)
+        self.a1in: 'OrderedDict[str, None]' = OrderedDict()
+        self.a1out: 'OrderedDict[str, None]' = OrderedDict()
+        self.am: 'OrderedDict[str, None]' = OrderedDict()
+
+    def access(self, key: str) -> bool:
+        if key in self.am:
+            self.am.move_to_end(key)
+            return True
+        if key in self.a1in:
+            return True
+        if len(self.a1in) + len(self.am) >= self.capacity:
+            self._reclaim()
+        if key in self.a1out:
+            del self.a1out[key]
+            self.am[key] = None
+        else:
+            self.a1in[key] = None
+        return False
+
+    def __len__(self) -> int:
+        return len(self.a1in) + len(self.am)
+
+    def _reclaim(self):
+        if len(self.a1in) > self.kin or not self.am:
+            key, _ = self.a1in.popitem(last=False)
+            self.a1out[key] = None
+            if len(self.a1out) > self.kout:
+                self.a1out.popitem(last=False)
+        else:
+            self.am.popitem(last=False)
+
+
+POLICIES = {'lru': _LRU, 'lfu': _LFU, 'arc': _ARC, '2q': _TwoQ}
+
+
+# ============================================================================
+# Simulation
+# ============================================================================
+
+def simulate(trace: Union[str, Iterable[TraceRecord]], capacities: Optional[Sequence[int]] = None,
+             policies: Sequence[str] = ('lru', 'lfu', 'arc', '2q'),
+             admit_writes: bool = True) -> Dict[str, List[Dict[str, float]]]:
+    """
+    Replay a trace against each policy at each capacity (in entries).
+
+    Retrieves are the requests being measured; stores also populate the
+    cache when admit_writes is set (as FileCASStore's memory tier does) and
+    exists calls are ignored. Capacities default to powers of two up to the
+    number of distinct keys retrieved.
+
+    Returns:
+        {policy: [{capacity, hit_ratio, byte_hit_ratio}, ...]} in capacity order
+    """
+    unknown = [p for p in policies if p not in POLICIES]
+    if unknown:
+        raise ValueError(f"Unknown cache policies: {unknown}; choose from {sorted(POLICIES)}")
+    records = list(read_trace(trace) if isinstance(trace, str) else trace)
+
+    # Resolve unknown sizes from the last size seen for the key
+    events = []
+    sizes: Dict[str, int] = {}
+    for record in records:
+        if record.size:
+            sizes[record.key] = record.size
+        if record.op == TRACE_RETRIEVE or (admit_writes and record.op == TRACE_STORE):
+            events.append((record.op == TRACE_RETRIEVE, record.key, record.size or sizes.get(record.key, 0)))
+    requests = [e for e in events if e[0]]
+    if capacities is None:
+        distinct = len({key for _, key, _ in requests})
+        capacities = [1 << i for i in range(max(distinct - 1, 0).bit_length() + 1)]
+    total_bytes = sum(size for _, _, size in requests)
+
+    curves: Dict[str, List[Dict[str, float]]] = {}
+    for name in policies:
+        curve = []
+        for capacity in sorted(capacities):
+            if capacity < 1:
+                raise ValueError(f"capacity must be >= 1, got {capacity}")
+            cache = POLICIES[name](capacity)
+            hits = hit_bytes = 0
+            for measured, key, size in events:
+                hit = cache.access(key)
+                if measured and hit:
+                    hits += 1
+                    hit_bytes += size
+            curve.append({
+                'capacity': capacity,
+                'hit_ratio': hits / len(requests) if requests else 0.0,
+                'byte_hit_ratio': hit_bytes / total_bytes if total_bytes else 0.0,
+            })
+        curves[name] = curve
+    return curves
+
+
+def format_curves(curves: Dict[str, List[Dict[str, float]]]) -> str:
+    """Hit ratios as a text table: one row per capacity, one column per policy."""
+    names = list(curves)
+    lines = ["capacity " + " ".join(f"{name:>8}" for name in names)]
+    if names:
+        for i, point in enumerate(curves[names[0]]):
+            lines.append(f"{point['capacity']:>8} " +
+                         " ".join(f"{curves[name][i]['hit_ratio']:>8.3f}" for name in names))
+    return "\n".join(lines)
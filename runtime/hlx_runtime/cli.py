@@ -3,17 +3,44 @@ import argparse
 import os
 from .lc_codec import LCTParser, decode_lcb, encode_runic
 from .ls_ops import collapse, resolve
-from .errors import HLXError
+from .errors import HLXError, E_MISSING_PARAMETER
+from .convert import json_to_lcb, lcb_to_json, json_to_record_log, record_log_to_json, JSON_FORMATS
+from .record_log import is_record_log
+from .cas import get_cas_store, split_handle
+from .cas_pack import PackCASStore
+from .cas_trace import simulate as simulate_trace, format_curves, POLICIES
 
 def main():
     parser = argparse.ArgumentParser(description="HLX Runtime CLI")
-    parser.add_argument('command', choices=['run', 'collapse', 'resolve'])
-    parser.add_argument('file', help="Input file")
+    parser.add_argument('command', choices=['run', 'collapse', 'resolve', 'convert', 'repack', 'simulate'])
+    parser.add_argument('file', help="Input file (repack: pack directory, simulate: access trace)")
     parser.add_argument('--format', choices=['lct', 'lcb'], default='lct', help="Input format")
+    parser.add_argument('--to', choices=['lcb', 'rlog', 'json'], default='lcb',
+                        help="convert: output format (lcb = record stream, rlog = indexed record log)")
+    parser.add_argument('--json-format', choices=JSON_FORMATS, default='jsonl', help="convert: JSON input layout")
+    parser.add_argument('-o', '--output', help="convert: output file")
+    parser.add_argument('--hashes', help="convert: write one canonical hash per record to this file")
+    parser.add_argument('--normalize', action='store_true', help="convert: apply CONTRACT_804 normalization")
+    parser.add_argument('--workers', type=int, default=0, help="convert: worker processes (0 = single process)")
+    parser.add_argument('--policies', default=",".join(POLICIES),
+                        help="simulate: comma-separated cache policies")
+    parser.add_argument('--capacities', help="simulate: comma-separated cache sizes in entries")
     
     args = parser.parse_args()
     
     try:
+        if args.command == 'convert':
+            convert(args)
+            return
+
+        if args.command == 'repack':
+            repack(args)
+            return
+
+        if args.command == 'simulate':
+            simulate(args)
+            return
+
         with open(args.file, 'rb') as f:
             data = f.read()
 
@@ -32,6 +59,8 @@ def main():
         elif args.command == 'resolve':
             # Resolve a handle (file contains handle string?)
             handle = data.decode('utf-8').strip()
+            if split_handle(handle) is None:  # Abbreviated: expand like a git short hash
+                handle = get_cas_store().resolve_prefix(handle)
             val = resolve(handle)
             print(f"Resolved: {val}")
             print(f"Runic: {encode_runic(val)}")
@@ -40,5 +69,49 @@ def main():
         print(f"Error: {e}")
         sys.exit(1)
 
+def convert(args):
+    if not args.output:
+        raise HLXError(E_MISSING_PARAMETER, "convert requires --output")
+
+    if args.to == 'json':
+        with open(args.output, 'w', encoding='utf-8') as dst:
+            if is_record_log(args.file):
+                count = record_log_to_json(args.file, dst)
+            else:
+                with open(args.file, 'rb') as src:
+                    count = lcb_to_json(src, dst)
+        print(f"Converted {count} records to {args.output}")
+        return
+
+    if args.to == 'rlog':
+        with open(args.file, 'r', encoding='utf-8') as src:
+            count = json_to_record_log(src, args.output, json_format=args.json_format,
+                                       normalize=args.normalize, workers=args.workers)
+        print(f"Converted {count} records to {args.output}")
+        return
+
+    hashes = open(args.hashes, 'w', encoding='utf-8') if args.hashes else None
+    try:
+        with open(args.file, 'r', encoding='utf-8') as src, open(args.output, 'wb') as dst:
+            count = json_to_lcb(src, dst, json_format=args.json_format, hashes=hashes,
+                                normalize=args.normalize, workers=args.workers)
+    finally:
+        if hashes is not None:
+            hashes.close()
+    print(f"Converted {count} records to {args.output}")
+
+def repack(args):
+    if not os.path.isdir(args.file):
+        raise HLXError(E_MISSING_PARAMETER, f"repack requires a pack directory, got {args.file}")
+    with PackCASStore(args.file) as cas:
+        stats = cas.repack()
+    print(f"Repacked {stats['blobs']} blobs: {stats['packs_before']} packs "
+          f"({stats['bytes_before']} bytes) -> {stats['packs_after']} packs ({stats['bytes_after']} bytes)")
+
+def simulate(args):
+    capacities = [int(c) for c in args.capacities.split(",")] if args.capacities else None
+    curves = simulate_trace(args.file, capacities=capacities, policies=args.policies.split(","))
+    print(format_curves(curves))
+
 if __name__ == '__main__':
     main()
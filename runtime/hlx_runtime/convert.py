@@ -0,0 +1,333 @@
+"""
+HLX Corpus Converter
+Streaming JSON/JSONL ⇄ LC-B record stream conversion.
+
+Record stream layout: each record is ULEB128(length) followed by `length`
+bytes of canonical LC-B. Records are read and written one at a time, so
+memory stays bounded regardless of corpus size. For seekable shards, the
+same records can be written to a record log (see record_log.py).
+
+Encoding can be spread over a worker-process (or thread) pool; output order
+always matches input order and at most `max_in_flight` chunks are pending.
+The same chunked pipeline backs the CAS bulk APIs (store_many/retrieve_many).
+"""
+
+import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from .lc_codec import (
+    encode_lcb, decode_lcb, compute_hash, encode_uleb128,
+    LCDecodeError,
+)
+from .record_log import RecordLogWriter, RecordLogReader
+from .encoded import EncodedValue
+
+JSON_FORMATS = ('jsonl', 'array')
+
+DEFAULT_CHUNK_SIZE = 256
+DEFAULT_MAX_IN_FLIGHT = 8
+
+_READ_SIZE = 1 << 16
+
+
+# ============================================================================
+# Framing
+# ============================================================================
+
+def write_record(fp: BinaryIO, data: bytes) -> int:
+    """Write one length-prefixed record; returns bytes written"""
+    prefix = encode_uleb128(len(data))
+    fp.write(prefix)
+    fp.write(data)
+    return len(prefix) + len(data)
+
+
+def _read_uleb128_stream(fp: BinaryIO) -> Optional[int]:
+    result, shift = 0, 0
+    while True:
+        byte = fp.read(1)
+        if not byte:
+            if shift == 0:
+                return None  # Clean end of stream
+            raise LCDecodeError("Truncated record length")
+        result |= (byte[0] & 0x7F) << shift
+        if (byte[0] & 0x80) == 0:
+            return result
+        shift += 7
+
+
+def iter_records(fp: BinaryIO) -> Iterator[bytes]:
+    """Iterate raw LC-B records from a record stream"""
+    while True:
+        length = _read_uleb128_stream(fp)
+        if length is None:
+            return
+        data = fp.read(length)
+        if len(data) != length:
+            raise LCDecodeError(f"Truncated record: expected {length} bytes, got {len(data)}")
+        yield data
+
+
+# ============================================================================
+# JSON Readers
+# ============================================================================
+
+def iter_jsonl_lines(fp: TextIO) -> Iterator[str]:
+    """Iterate non-blank lines of a JSONL stream (unparsed)"""
+    for line in fp:
+        line = line.strip()
+        if line:
+            yield line
+
+
+def iter_json_array(fp: TextIO) -> Iterator[Any]:
+    """
+    Iterate elements of a top-level JSON array without loading the whole file.
+
+    While an element is incomplete, each refill reads as much as is already
+    buffered for it, so a large element costs O(log n) decode attempts.
+    """
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+    eof = False
+
+    def fill(size: int = 0) -> bool:
+        nonlocal buf, pos, eof
+        chunk = fp.read(max(size, _READ_SIZE))
+        if not chunk:
+            eof = True
+            return False
+        buf = buf[pos:] + chunk
+        pos = 0
+        return True
+
+    def skip_ws() -> Optional[str]:
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\r\n':
+                pos += 1
+            if pos < len(buf):
+                return buf[pos]
+            if not fill():
+                return None
+
+    if skip_ws() != '[':
+        raise LCDecodeError("Expected JSON array")
+    pos += 1
+
+    if skip_ws() == ']':
+        return
+
+    while True:
+        if skip_ws() is None:
+            raise LCDecodeError("Unterminated JSON array")
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof or not fill(len(buf) - pos):
+                    raise LCDecodeError(f"Invalid JSON array element at offset {pos}")
+                continue
+            # A scalar ending exactly at the buffer edge may be cut short
+            if end == len(buf) and not eof and fill(len(buf) - pos):
+                continue
+            break
+        pos = end
+        yield value
+
+        sep = skip_ws()
+        if sep == ',':
+            pos += 1
+        elif sep == ']':
+            return
+        else:
+            raise LCDecodeError(f"Expected ',' or ']' in JSON array, got {sep!r}")
+
+
+# ============================================================================
+# Encoding
+# ============================================================================
+
+def _encode_chunk(items: List[Any], parse: bool, normalize: bool,
+                  with_hash: bool) -> List[Tuple[bytes, Optional[str]]]:
+    out = []
+    for item in items:
+        if isinstance(item, EncodedValue):
+            if not normalize:
+                out.append((item.data, item.digest if with_hash else None))
+                continue
+            item = item.value
+        value = json.loads(item) if parse else item
+        data = encode_lcb(value, normalize=normalize)
+        out.append((data, compute_hash(data) if with_hash else None))
+    return out
+
+
+def _decode_chunk(blobs: List[bytes]) -> List[Any]:
+    return [decode_lcb(data) for data in blobs]
+
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def map_chunks(fn: Callable[..., List[Any]], items: Iterable[Any], *args: Any,
+               workers: int = 0, threads: bool = False,
+               chunk_size: int = DEFAULT_CHUNK_SIZE,
+               max_in_flight: int = DEFAULT_MAX_IN_FLIGHT) -> Iterator[Any]:
+    """
+    Apply fn(chunk, *args) -> results to chunks of items, yielding results
+    in input order.
+
+    Args:
+        workers: Pool size (0 = run in this thread)
+        threads: Use a thread pool instead of a process pool (fn and its
+            arguments then need not be picklable)
+        max_in_flight: Max pending chunks (bounds memory)
+    """
+    if workers <= 0:
+        for chunk in _chunks(items, chunk_size):
+            yield from fn(chunk, *args)
+        return
+
+    pool_class = ThreadPoolExecutor if threads else ProcessPoolExecutor
+    with pool_class(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in _chunks(items, chunk_size):
+            pending.append(pool.submit(fn, chunk, *args))
+            if len(pending) >= max_in_flight:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def encode_records(items: Iterable[Any], parse: bool = False, normalize: bool = False,
+                   with_hash: bool = False, workers: int = 0,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                   threads: bool = False) -> Iterator[Tuple[bytes, Optional[str]]]:
+    """
+    Encode items to LC-B, yielding (lcb_bytes, hash_or_None) in input order.
+
+    Args:
+        items: Values, or JSON texts when parse=True
+        parse: json.loads each item first (done in the workers)
+        normalize: Apply CONTRACT_804 normalization while encoding
+        with_hash: Also compute each record's canonical hash
+        workers: Worker processes (0 = encode in this process)
+        chunk_size: Items per worker task
+        max_in_flight: Max pending chunks (bounds memory)
+        threads: Use worker threads instead of processes
+    """
+    return map_chunks(_encode_chunk, items, parse, normalize, with_hash,
+                      workers=workers, threads=threads, chunk_size=chunk_size,
+                      max_in_flight=max_in_flight)
+
+
+def decode_records(blobs: Iterable[bytes], workers: int = 0, threads: bool = False,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   max_in_flight: int = DEFAULT_MAX_IN_FLIGHT) -> Iterator[Any]:
+    """Decode LC-B blobs, yielding values in input order."""
+    return map_chunks(_decode_chunk, blobs, workers=workers, threads=threads,
+                      chunk_size=chunk_size, max_in_flight=max_in_flight)
+
+
+# ============================================================================
+# Converters
+# ============================================================================
+
+def _json_items(src: TextIO, json_format: str) -> Tuple[Iterator[Any], bool]:
+    if json_format == 'jsonl':
+        return iter_jsonl_lines(src), True
+    if json_format == 'array':
+        return iter_json_array(src), False
+    raise ValueError(f"Unknown JSON format: {json_format} (expected one of {JSON_FORMATS})")
+
+
+def json_to_lcb(src: TextIO, dst: BinaryIO, json_format: str = 'jsonl',
+                hashes: Optional[TextIO] = None, normalize: bool = False,
+                workers: int = 0, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                max_in_flight: int = DEFAULT_MAX_IN_FLIGHT) -> int:
+    """
+    Convert a JSONL (or JSON array) stream to an LC-B record stream.
+
+    Args:
+        src: Text input
+        dst: Binary output for framed LC-B records
+        json_format: 'jsonl' (one value per line) or 'array' (top-level array)
+        hashes: If given, one canonical hash per record is written here
+        normalize: Apply CONTRACT_804 normalization while encoding
+        workers: Worker processes (0 = single process)
+
+    Returns:
+        Number of records written
+    """
+    items, parse = _json_items(src, json_format)
+
+    count = 0
+    for data, h in encode_records(items, parse=parse, normalize=normalize,
+                                  with_hash=hashes is not None, workers=workers,
+                                  chunk_size=chunk_size, max_in_flight=max_in_flight):
+        write_record(dst, data)
+        if hashes is not None:
+            hashes.write(h + '\n')
+        count += 1
+    return count
+
+
+def lcb_to_json(src: BinaryIO, dst: TextIO) -> int:
+    """
+    Convert an LC-B record stream back to JSONL.
+
+    Returns:
+        Number of records written
+    """
+    count = 0
+    for data in iter_records(src):
+        dst.write(json.dumps(decode_lcb(data), ensure_ascii=False, sort_keys=True))
+        dst.write('\n')
+        count += 1
+    return count
+
+
+def json_to_record_log(src: TextIO, path: str, json_format: str = 'jsonl',
+                       with_hashes: bool = True, normalize: bool = False,
+                       workers: int = 0, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                       max_in_flight: int = DEFAULT_MAX_IN_FLIGHT) -> int:
+    """
+    Convert a JSONL (or JSON array) stream into a record log shard.
+
+    Returns:
+        Number of records in the log
+    """
+    items, parse = _json_items(src, json_format)
+    with RecordLogWriter(path, with_hashes=with_hashes) as log:
+        for data, h in encode_records(items, parse=parse, normalize=normalize,
+                                      with_hash=log.with_hashes, workers=workers,
+                                      chunk_size=chunk_size, max_in_flight=max_in_flight):
+            log.append_encoded(data, h)
+        return len(log)
+
+
+def record_log_to_json(path: str, dst: TextIO) -> int:
+    """
+    Convert a record log shard to JSONL.
+
+    Returns:
+        Number of records written
+    """
+    with RecordLogReader(path) as log:
+        for value in log:
+            dst.write(json.dumps(value, ensure_ascii=False, sort_keys=True))
+            dst.write('\n')
+        return len(log)
@@ -0,0 +1,92 @@
+"""
+Values encoded once.
+Reference: CONTRACT_802
+
+An EncodedValue carries a value together with its canonical LC-B bytes,
+their BLAKE2b-256 digest, the handle type tag and the encoded size, so
+every consumer of the same value (CASStore.store, StateTable.set,
+MerkleTree.add_leaf, ls_ops.collapse) shares a single encoding instead of
+each calling encode_lcb. The text forms (LC-R, LC-T and the runic form
+used by LSContext) are derived on first use and kept.
+
+The value must not be mutated after it is encoded.
+"""
+
+from typing import Any, Optional
+
+from .lc_codec import encode_lcb, compute_hash, get_type_tag, encode_runic
+from .lc_r_codec import encode_lcr
+from .lc_t_codec import encode_lct
+
+
+class EncodedValue:
+    """
+    A value and its LC-B encoding, computed once.
+
+    Attributes:
+        value: The original value
+        data: Canonical LC-B bytes of `value`
+        digest: Hex BLAKE2b-256 hash of `data` (the content hash)
+        tag: Handle type tag (see lc_codec.get_type_tag)
+    """
+    __slots__ = ('value', 'data', 'digest', 'tag', '_runic', '_lcr', '_lct')
+
+    def __init__(self, value: Any, data: Optional[bytes] = None, digest: Optional[str] = None):
+        if isinstance(value, EncodedValue):
+            raise TypeError("Value is already encoded")
+        self.value = value
+        self.data = data if data is not None else encode_lcb(value)
+        self.digest = digest if digest is not None else compute_hash(self.data)
+        self.tag = get_type_tag(value)
+        self._runic: Optional[str] = None
+        self._lcr: Optional[str] = None
+        self._lct: Optional[str] = None
+
+    @classmethod
+    def of(cls, value: Any) -> 'EncodedValue':
+        """`value` if it is already an EncodedValue, else its encoding."""
+        return value if isinstance(value, EncodedValue) else cls(value)
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+    @property
+    def handle(self) -> str:
+        """CAS handle of the value (what CASStore.store returns for it)."""
+        return f"&h_{self.tag}_{self.digest}"
+
+    @property
+    def runic(self) -> str:
+        """Runic text form (lc_codec.encode_runic)."""
+        if self._runic is None:
+            self._runic = encode_runic(self.value)
+        return self._runic
+
+    @property
+    def lcr(self) -> str:
+        """LC-R form (lc_r_codec.encode_lcr)."""
+        if self._lcr is None:
+            self._lcr = encode_lcr(self.value)
+        return self._lcr
+
+    @property
+    def lct(self) -> str:
+        """LC-T form (lc_t_codec.encode_lct)."""
+        if self._lct is None:
+            self._lct = encode_lct(self.value)
+        return self._lct
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, EncodedValue):
+            return NotImplemented
+        return self.digest == other.digest and self.tag == other.tag
+
+    def __hash__(self) -> int:
+        return hash(self.digest)
+
+    def __repr__(self) -> str:
+        return f"EncodedValue({self.handle}, {len(self.data)} bytes)"
@@ -36,6 +36,10 @@ LC_R_GLYPHS = {
     'COLLAPSE_L3': '⊙',     # U+2299 - Circled dot (level 3)
     'COLLAPSE_L12': '⟡',    # U+27E1 - White concave diamond (level 12 - maximal)
 
+    # Back-references (collapse levels 1+)
+    'DEFINE': '⊜',          # U+229C - Circled equals (define table entry)
+    'BACKREF': '↩',         # U+21A9 - Leftwards arrow with hook (reference entry)
+
     # Structural Elements
     'SEPARATOR': '⋅',       # U+22C5 - Dot operator
     'NEST': '◇',            # U+25C7 - White diamond (nesting)
@@ -168,6 +172,7 @@ EXAMPLES = {
     'simple_contract': '🜊902🜁0 "test"🜁1 ⟁shader🜂',
     'array': '⋔[🜃1⋅🜃2⋅🜃3]',
     'level_12_collapse': '⟡◇→⋯⟡◇◇⊗',  # Hyper-dense Windows 11 essence
+    'backref': '⋔[⊜⟁h_tex_albedo⋅↩0]',
 }
 
 
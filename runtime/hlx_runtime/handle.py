@@ -0,0 +1,128 @@
+"""
+Compact CAS handles.
+Reference: CONTRACT_802
+
+A handle is the text '&h_<tag>_<64 hex digits>': the value's type tag and
+the BLAKE2b-256 digest of its LC-B encoding. The CAS API takes and returns
+these strings; in memory they are 112 bytes each, while the digest they
+name is 32. Handle packs the tag and raw digest into 33 bytes instead, and
+handle_key() gives the raw digest of a handle string, which the in-memory
+stores use as their dict key.
+"""
+
+from typing import Dict, Optional, Tuple, Union
+
+from .errors import HandleError, E_HANDLE_FORMAT
+
+HANDLE_PREFIX = "&h_"
+DIGEST_SIZE = 32
+_HEX_LENGTH = 2 * DIGEST_SIZE
+_MIN_LENGTH = len(HANDLE_PREFIX) + 2 + _HEX_LENGTH  # One-letter tag
+
+# Type tags a handle can carry (lc_codec.get_type_tag, plus chunked
+# manifests); a Handle stores the tag's position here
+TAGS = ('null', 'bool', 'int', 'float', 'str', 'blob', 'list', 'map', 'unknown', 'chunked')
+_TAG_CODES = {tag: code for code, tag in enumerate(TAGS)}
+
+# Recently parsed handle strings; cleared when full
+_CACHE_SIZE = 4096
+_key_cache: Dict[str, bytes] = {}
+_handle_cache: Dict[str, 'Handle'] = {}
+
+
+def split_handle(handle: str) -> Optional[Tuple[str, str]]:
+    """Split '&h_<tag>_<hash>' into (tag, hash); None if malformed."""
+    if not isinstance(handle, str) or not handle.startswith(HANDLE_PREFIX):
+        return None
+    tag, sep, h = handle[len(HANDLE_PREFIX):].rpartition('_')
+    if not sep or not tag or len(h) != _HEX_LENGTH:
+        return None
+    return tag, h
+
+
+def _parse_digest(handle: str) -> Optional[bytes]:
+    if (not isinstance(handle, str) or len(handle) < _MIN_LENGTH
+            or handle[-_HEX_LENGTH - 1] != '_' or not handle.startswith(HANDLE_PREFIX)):
+        return None
+    text = handle[-_HEX_LENGTH:]
+    try:
+        digest = bytes.fromhex(text)
+    except ValueError:
+        return None
+    # fromhex also accepts upper case and spaces; handles are lower-case hex
+    return digest if len(digest) == DIGEST_SIZE and digest.hex() == text else None
+
+
+def handle_hash(handle: str) -> str:
+    """The content hash (64 hex digits) at the end of a handle string."""
+    return handle[-_HEX_LENGTH:]
+
+
+def handle_key(handle: str) -> Optional[bytes]:
+    """Raw 32-byte digest of a handle string; None if it is malformed."""
+    key = _key_cache.get(handle) if isinstance(handle, str) else None
+    if key is None:
+        key = _parse_digest(handle)
+        if key is not None:
+            if len(_key_cache) >= _CACHE_SIZE:
+                _key_cache.clear()
+            _key_cache[handle] = key
+    return key
+
+
+class Handle(bytes):
+    """
+    A CAS handle as 33 bytes: a type tag code followed by the raw 32-byte
+    digest.
+
+    Immutable and hashable like bytes, so it can stand in for handle
+    strings as dict keys and set members at three quarters of their size;
+    str() gives back the exact '&h_<tag>_<hex>' text. Handles order by
+    tag, then digest. Only the store's type tags (TAGS) are representable.
+    """
+    __slots__ = ()
+
+    def __new__(cls, tag: str, digest: bytes):
+        code = _TAG_CODES.get(tag)
+        if code is None or len(digest) != DIGEST_SIZE:
+            raise HandleError(f"Not a handle: tag {tag!r}, {len(digest)}-byte digest", E_HANDLE_FORMAT)
+        return super().__new__(cls, bytes((code,)) + bytes(digest))
+
+    @classmethod
+    def parse(cls, handle: Union[str, 'Handle']) -> 'Handle':
+        """Handle for a handle string (a Handle is returned as is)."""
+        if isinstance(handle, Handle):
+            return handle
+        cached = _handle_cache.get(handle) if isinstance(handle, str) else None
+        if cached is not None:
+            return cached
+        digest = _parse_digest(handle)
+        if digest is None:
+            raise HandleError(f"Malformed handle: {handle!r}", E_HANDLE_FORMAT)
+        result = cls(handle[len(HANDLE_PREFIX):-_HEX_LENGTH - 1], digest)
+        if len(_handle_cache) >= _CACHE_SIZE:
+            _handle_cache.clear()
+        _handle_cache[handle] = result
+        return result
+
+    @property
+    def tag(self) -> str:
+        return TAGS[self[0]]
+
+    @property
+    def digest(self) -> bytes:
+        return self[1:]
+
+    @property
+    def content_hash(self) -> str:
+        """The digest as 64 hex digits."""
+        return self[1:].hex()
+
+    def __str__(self) -> str:
+        return f"{HANDLE_PREFIX}{TAGS[self[0]]}_{self[1:].hex()}"
+
+    def __repr__(self) -> str:
+        return f"Handle({str(self)!r})"
+
+    def __reduce__(self):
+        return Handle, (self.tag, self.digest)
@@ -34,7 +34,11 @@ Reference: RUNTIME_ARCHITECTURE.md, glyphs.py, lc_r_codec.py
 
 from typing import Any, Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass
-import hashlib
+
+try:
+    from .simple_cas import SimpleCAS as _SimpleCAS
+except ImportError:  # Imported as a top-level module
+    from hlx_runtime.simple_cas import SimpleCAS as _SimpleCAS
 
 
 # ============================================================================
@@ -86,30 +90,9 @@ ALL_GLYPHS = {
 # Simple CAS Store (in-memory for runtime)
 # ============================================================================
 
-class SimpleCAS:
-    """Simple content-addressed store for runtime use"""
-    
-    def __init__(self):
-        self.store: Dict[str, Any] = {}
-    
-    def put(self, value: Any) -> str:
-        """Store value and return handle"""
-        # Serialize value for hashing
-        serialized = repr(value).encode('utf-8')
-        hash_val = hashlib.sha256(serialized).hexdigest()[:16]
-        handle = f"&h_{hash_val}"
-        self.store[handle] = value
-        return handle
-    
-    def get(self, handle: str) -> Any:
-        """Retrieve value by handle"""
-        if handle not in self.store:
-            raise HLXError(f"{E_HANDLE_UNRESOLVED}: Handle '{handle}' not found")
-        return self.store[handle]
-    
-    def has(self, handle: str) -> bool:
-        """Check if handle exists"""
-        return handle in self.store
+class SimpleCAS(_SimpleCAS):
+    """Simple content-addressed store for runtime use (see simple_cas.py)."""
+    error = HLXError
 
 
 # Global CAS instance
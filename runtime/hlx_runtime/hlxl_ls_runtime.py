@@ -30,7 +30,11 @@ Reference: RUNTIME_ARCHITECTURE.md, lc_codec.py, lc_t_codec.py
 
 from typing import Any, Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass
-import hashlib
+
+try:
+    from .simple_cas import SimpleCAS as _SimpleCAS
+except ImportError:  # Imported as a top-level module
+    from hlx_runtime.simple_cas import SimpleCAS as _SimpleCAS
 
 
 # ============================================================================
@@ -52,29 +56,9 @@ class HLXLError(Exception):
 # Simple CAS Store (in-memory for runtime)
 # ============================================================================
 
-class SimpleCAS:
-    """Simple content-addressed store for runtime use"""
-    
-    def __init__(self):
-        self.store: Dict[str, Any] = {}
-    
-    def put(self, value: Any) -> str:
-        """Store value and return handle"""
-        serialized = repr(value).encode('utf-8')
-        hash_val = hashlib.sha256(serialized).hexdigest()[:16]
-        handle = f"&h_{hash_val}"
-        self.store[handle] = value
-        return handle
-    
-    def get(self, handle: str) -> Any:
-        """Retrieve value by handle"""
-        if handle not in self.store:
-            raise HLXLError(f"{E_HANDLE_UNRESOLVED}: Handle '{handle}' not found")
-        return self.store[handle]
-    
-    def has(self, handle: str) -> bool:
-        """Check if handle exists"""
-        return handle in self.store
+class SimpleCAS(_SimpleCAS):
+    """Simple content-addressed store for runtime use (see simple_cas.py)."""
+    error = HLXLError
 
 
 # Global CAS instance
@@ -14,6 +14,7 @@ from .errors import (
     E_LC_PARSE, E_LC_DECODE, E_LC_ENCODE,
     E_FIELD_ORDER
 )
+from .pre_serialize import normalize_float, normalize_string
 
 LC_TAGS = {
     'NULL': 0x00, 'INT': 0x01, 'FLOAT': 0x02, 'TEXT': 0x03,
@@ -64,16 +65,13 @@ def decode_uleb128(data: bytes, offset: int = 0) -> Tuple[int, int]:
 
 def encode_sleb128(value: int) -> bytes:
     result = bytearray()
-    more = True
-    while more:
+    while True:
         byte = value & 0x7F
         value >>= 7
         if (value == 0 and (byte & 0x40) == 0) or (value == -1 and (byte & 0x40) != 0):
-            more = False
-        else:
-            byte |= 0x80
-        result.append(byte)
-    return bytes(result)
+            result.append(byte)
+            return bytes(result)
+        result.append(byte | 0x80)
 
 
 def decode_sleb128(data: bytes, offset: int = 0) -> Tuple[int, int]:
@@ -116,9 +114,38 @@ class LCBParser:
         return LCBinaryEncoder().encode(value)
 
 
+_TAG_INT = LC_TAGS['INT']
+_TAG_FLOAT = LC_TAGS['FLOAT']
+_TAG_TEXT = LC_TAGS['TEXT']
+_TAG_HANDLE_REF = LC_TAGS['HANDLE_REF']
+_TAG_ARR_START = LC_TAGS['ARR_START']
+_TAG_ARR_END = LC_TAGS['ARR_END']
+_TAG_OBJ_START = LC_TAGS['OBJ_START']
+_TAG_OBJ_END = LC_TAGS['OBJ_END']
+
+
+def _append_bytes(buffer: bytearray, data: bytes):
+    """Append ULEB128(len(data)) + data."""
+    size = len(data)
+    if size < 0x80:
+        buffer.append(size)
+    else:
+        buffer.extend(encode_uleb128(size))
+    buffer.extend(data)
+
+
 class LCBinaryEncoder:
-    def __init__(self):
+    """
+    LC-B encoder.
+
+    With normalize=True the CONTRACT_804 pre-serialize rules (float checks,
+    string NFC/line-ending/whitespace normalization, tuples as arrays) are
+    applied while encoding, producing the same bytes as
+    encode_lcb(pre_serialize(value)) without building a normalized copy.
+    """
+    def __init__(self, normalize: bool = False):
         self.buffer = bytearray()
+        self.normalize = normalize
 
     def encode(self, value: Any) -> bytes:
         self.buffer = bytearray()
@@ -129,6 +156,46 @@ class LCBinaryEncoder:
         if depth > 64:
             raise LCEncodeError(f"{E_DEPTH_EXCEEDED}: Max recursion depth 64 exceeded")
 
+        # Fast paths for the exact built-in types that dominate large values;
+        # subclasses and normalized floats and strings take the general path
+        buffer = self.buffer
+        kind = type(value)
+        if kind is int:
+            buffer.append(_TAG_INT)
+            if -64 <= value < 64:
+                buffer.append(value & 0x7F)  # One-byte SLEB128
+            else:
+                buffer.extend(encode_sleb128(value))
+            return
+        if kind is float and not self.normalize:
+            buffer.append(_TAG_FLOAT)
+            buffer.extend(encode_float64_be(value))
+            return
+        if kind is str and not self.normalize:
+            buffer.append(_TAG_HANDLE_REF if value.startswith('&h_') else _TAG_TEXT)
+            _append_bytes(buffer, value.encode('utf-8'))
+            return
+        if kind is list:
+            buffer.append(_TAG_ARR_START)
+            buffer.extend(encode_uleb128(len(value)))
+            encode, depth = self._encode_value, depth + 1
+            for item in value:
+                encode(item, depth)
+            buffer.append(_TAG_ARR_END)
+            return
+        if kind is dict:
+            buffer.append(_TAG_OBJ_START)
+            sorted_keys = sorted(value.keys())
+            buffer.extend(encode_uleb128(len(sorted_keys)))
+            encode, depth = self._encode_value, depth + 1
+            for key in sorted_keys:
+                if not isinstance(key, str):
+                    raise LCEncodeError(f"Keys must be strings, got {type(key)}")
+                _append_bytes(buffer, key.encode('utf-8'))
+                encode(value[key], depth)
+            buffer.append(_TAG_OBJ_END)
+            return
+
         if value is None:
             self.buffer.append(LC_TAGS['NULL'])
         elif isinstance(value, bool):
@@ -137,9 +204,13 @@ class LCBinaryEncoder:
             self.buffer.append(LC_TAGS['INT'])
             self.buffer.extend(encode_sleb128(value))
         elif isinstance(value, float):
+            if self.normalize:
+                value = normalize_float(value)
             self.buffer.append(LC_TAGS['FLOAT'])
             self.buffer.extend(encode_float64_be(value))
         elif isinstance(value, str):
+            if self.normalize:
+                value = normalize_string(value)
             if value.startswith('&h_'):
                 self.buffer.append(LC_TAGS['HANDLE_REF'])
             else:
@@ -151,7 +222,7 @@ class LCBinaryEncoder:
             self.buffer.append(LC_TAGS['BYTES'])
             self.buffer.extend(encode_uleb128(len(value)))
             self.buffer.extend(value)
-        elif isinstance(value, list):
+        elif isinstance(value, list) or (self.normalize and isinstance(value, tuple)):
             self.buffer.append(LC_TAGS['ARR_START'])
             self.buffer.extend(encode_uleb128(len(value)))
             for item in value:
@@ -174,6 +245,7 @@ class LCBinaryEncoder:
 
 
 class LCBinaryDecoder:
+    # `data` may be any buffer (bytes, memoryview, mmap); values are copied out
     def __init__(self, data: bytes):
         self.data = data
         self.offset = 0
@@ -201,7 +273,7 @@ class LCBinaryDecoder:
     def _read_bytes(self, count: int) -> bytes:
         if self.offset + count > len(self.data):
             raise LCDecodeError("Unexpected end of data")
-        result = self.data[self.offset:self.offset + count]
+        result = bytes(self.data[self.offset:self.offset + count])
         self.offset += count
         return result
 
@@ -464,8 +536,14 @@ def encode_runic(value: Any) -> str:
 encode_lct = encode_runic
 
 
-def encode_lcb(value: Any) -> bytes:
-    return LCBinaryEncoder().encode(value)
+def encode_lcb(value: Any, normalize: bool = False) -> bytes:
+    """
+    Encode a value to LC-B.
+
+    normalize=True fuses CONTRACT_804 pre-serialization into the encode pass:
+    encode_lcb(v, normalize=True) == encode_lcb(pre_serialize(v)).
+    """
+    return LCBinaryEncoder(normalize).encode(value)
 
 def decode_lcb(data: bytes) -> Any:
     return LCBinaryDecoder(data).decode()
@@ -6,20 +6,38 @@ Achieves 65-70% compression vs ASCII while maintaining aesthetic beauty.
 
 Wire format for HLX (Runic language):
 - HLX → HLX-LS → LC-R
-- Level 0-12 collapse support
+- Level 0-12 collapse support (back-references for repeated content)
 - Contract nesting and field indexing
 - Deterministic encoding with perfect reversibility
 
+Back-references (collapse_level >= 1):
+- ⊜<value>  defines the next table entry (indices assigned in pre-order)
+- ↩<n>      expands to a copy of table entry n
+
 Reference: RUNTIME_ARCHITECTURE.md, glyphs.py
 """
 
 from typing import Any, Dict, List, Tuple, Union
+import copy
 import json
 from .glyphs import LC_R_GLYPHS, GLYPH_TO_NAME, is_lc_r_glyph
 
 # Type alias for decoded values
 LCRValue = Union[None, bool, int, float, str, bytes, List[Any], Dict[str, Any]]
 
+MAX_COLLAPSE_LEVEL = 12
+
+# Literals shorter than this (UTF-8 bytes, estimated) are never back-referenced:
+# a reference costs a 3-byte glyph plus the decimal table index.
+MIN_BACKREF_SIZE = 10
+
+# Placeholder for a table entry whose definition is still being decoded
+_PENDING = object()
+
+
+def _is_handle(value: str) -> bool:
+    return value.startswith('&') or value.startswith('h_')
+
 
 class LCREncoder:
     """Encodes Python values to LC-R (Runic) format"""
@@ -30,9 +48,18 @@ class LCREncoder:
 
         Args:
             collapse_level: Compression level (0=basic, 12=maximal)
+
+        Levels:
+            0: Plain glyph encoding, no back-references
+            1: Repeated handles become back-references
+            2: Level 1 + repeated strings (text values and object keys)
+            3-12: Level 2 + repeated subtrees (arrays, objects, contracts)
         """
+        if not 0 <= collapse_level <= MAX_COLLAPSE_LEVEL:
+            raise ValueError(f"collapse_level must be 0-{MAX_COLLAPSE_LEVEL}, got {collapse_level}")
         self.collapse_level = collapse_level
         self.g = LC_R_GLYPHS  # Shorthand for glyphs
+        self._reset_backrefs()
 
     def encode(self, value: Any) -> str:
         """
@@ -44,6 +71,33 @@ class LCREncoder:
         Returns:
             LC-R string with beautiful runic glyphs
         """
+        if self.collapse_level > 0:
+            self._plan_backrefs(value)
+        try:
+            return self._encode_value(value)
+        finally:
+            self._reset_backrefs()
+
+    def _encode_value(self, value: Any, as_key: bool = False) -> str:
+        """Encode a value, emitting a definition or back-reference if planned"""
+        if self._defined:
+            node = self._node_of(value, as_key)
+            if node in self._defined:
+                index = self._emitted.get(node)
+                if index is not None:
+                    return self.g['BACKREF'] + str(index)
+                # Index is assigned before children are encoded (pre-order),
+                # matching the slot the decoder reserves on DEFINE
+                self._emitted[node] = len(self._emitted)
+                return self.g['DEFINE'] + self._encode_literal(value, as_key)
+        return self._encode_literal(value, as_key)
+
+    def _encode_literal(self, value: Any, as_key: bool = False) -> str:
+        """Encode a value in full (children may still use back-references)"""
+        # Object key
+        if as_key:
+            return self.g['TEXT'] + f'"{value}"'
+
         # Null
         if value is None:
             return self.g['NULL']
@@ -61,7 +115,7 @@ class LCREncoder:
             return self.g['FLOAT'] + str(value)
 
         # Handle reference (starts with '&' or 'h_')
-        if isinstance(value, str) and (value.startswith('&') or value.startswith('h_')):
+        if isinstance(value, str) and _is_handle(value):
             handle = value[1:] if value.startswith('&') else value
             return self.g['HANDLE'] + handle
 
@@ -79,7 +133,7 @@ class LCREncoder:
 
         # Array
         if isinstance(value, list):
-            elements = [self.encode(elem) for elem in value]
+            elements = [self._encode_value(elem) for elem in value]
             joined = self.g['SEPARATOR'].join(elements)
             return self.g['ARRAY'] + '[' + joined + ']'
 
@@ -92,8 +146,8 @@ class LCREncoder:
             # Regular object
             fields = []
             for key, val in value.items():
-                key_enc = self.g['TEXT'] + f'"{key}"'
-                val_enc = self.encode(val)
+                key_enc = self._encode_value(key, as_key=True)
+                val_enc = self._encode_value(val)
                 fields.append(key_enc + self.g['BIND'] + val_enc)
 
             joined = self.g['SEPARATOR'].join(fields)
@@ -127,7 +181,7 @@ class LCREncoder:
             result += self.g['FIELD'] + str(field_idx) + ' '
 
             # Field value
-            result += self.encode(value)
+            result += self._encode_value(value)
 
             field_idx += 1
 
@@ -136,6 +190,115 @@ class LCREncoder:
         return result
 
 
+    # ------------------------------------------------------------------
+    # Back-reference planning (collapse_level > 0)
+    # ------------------------------------------------------------------
+
+    def _reset_backrefs(self):
+        self._interned: Dict[tuple, int] = {}
+        self._node_kinds: List[str] = []
+        self._node_sizes: List[int] = []
+        self._containers: Dict[int, int] = {}
+        self._defined: set = set()
+        self._emitted: Dict[int, int] = {}
+
+    def _plan_backrefs(self, value: Any):
+        """
+        Decide which nodes are emitted as definitions.
+
+        Pass 1 interns every node structurally (equal subtrees share a node id).
+        Pass 2 counts uses in emission order, without descending into repeats
+        of subtrees that will themselves become back-references, so nested
+        content is only counted where it is actually written out.
+        """
+        self._reset_backrefs()
+        self._intern(value)
+        uses: Dict[int, int] = {}
+        self._count_uses(value, uses)
+        self._defined = {node for node, n in uses.items() if n > 1 and self._eligible(node)}
+
+    def _eligible(self, node: int) -> bool:
+        kind = self._node_kinds[node]
+        if self._node_sizes[node] < MIN_BACKREF_SIZE:
+            return False
+        if kind == 'handle':
+            return True
+        if kind == 'text':
+            return self.collapse_level >= 2
+        if kind == 'tree':
+            return self.collapse_level >= 3
+        return False
+
+    def _intern_key(self, key: tuple, kind: str, size: int) -> int:
+        node = self._interned.get(key)
+        if node is None:
+            node = len(self._node_kinds)
+            self._interned[key] = node
+            self._node_kinds.append(kind)
+            self._node_sizes.append(size)
+        return node
+
+    def _leaf_key(self, value: Any, as_key: bool) -> Tuple[tuple, str, int]:
+        if as_key:
+            text = str(value)  # Keys are written in text form (_encode_literal)
+            return ('t', text), 'text', len(text.encode('utf-8')) + 5
+        if isinstance(value, str):
+            if _is_handle(value):
+                return ('h', value), 'handle', len(value.encode('utf-8')) + 3
+            return ('t', value), 'text', len(value.encode('utf-8')) + 5
+        if isinstance(value, bytes):
+            return ('x', 'bytes', value), 'leaf', 2 * len(value) + 3
+        return ('x', type(value).__name__, repr(value)), 'leaf', 4
+
+    def _intern(self, value: Any, as_key: bool = False) -> int:
+        if as_key or not isinstance(value, (list, dict)):
+            return self._intern_key(*self._leaf_key(value, as_key))
+
+        if isinstance(value, list):
+            children = tuple(self._intern(elem) for elem in value)
+            key = ('a',) + children
+        elif 'contract_id' in value:
+            children = tuple(self._intern(v) for k, v in value.items() if k != 'contract_id')
+            key = ('c', str(value['contract_id'])) + children
+        else:
+            children = tuple(
+                node
+                for k, v in value.items()
+                for node in (self._intern(k, as_key=True), self._intern(v))
+            )
+            key = ('o',) + children
+
+        size = 5 + sum(self._node_sizes[child] for child in children)
+        node = self._intern_key(key, 'tree', size)
+        self._containers[id(value)] = node
+        return node
+
+    def _node_of(self, value: Any, as_key: bool = False) -> int:
+        if not as_key and isinstance(value, (list, dict)):
+            return self._containers[id(value)]
+        return self._interned[self._leaf_key(value, as_key)[0]]
+
+    def _count_uses(self, value: Any, uses: Dict[int, int], as_key: bool = False):
+        node = self._node_of(value, as_key)
+        uses[node] = uses.get(node, 0) + 1
+        if as_key or not isinstance(value, (list, dict)):
+            return
+        if uses[node] > 1 and self._eligible(node):
+            return  # Written as a back-reference; children are not re-emitted
+
+        if isinstance(value, list):
+            for elem in value:
+                self._count_uses(elem, uses)
+        elif 'contract_id' in value:
+            for k, v in value.items():
+                if k != 'contract_id':
+                    self._count_uses(v, uses)
+        else:
+            for k, v in value.items():
+                self._count_uses(k, uses, as_key=True)
+                self._count_uses(v, uses)
+
+
 class LCRDecoder:
     """Decodes LC-R (Runic) format to Python values"""
 
@@ -143,6 +306,7 @@ class LCRDecoder:
         self.g = LC_R_GLYPHS
         self.pos = 0
         self.text = ""
+        self.table: List[Any] = []
 
     def decode(self, lcr_str: str) -> Any:
         """
@@ -156,6 +320,7 @@ class LCRDecoder:
         """
         self.text = lcr_str
         self.pos = 0
+        self.table = []
         return self._parse_value()
 
     def _parse_value(self) -> Any:
@@ -165,6 +330,20 @@ class LCRDecoder:
 
         char = self.text[self.pos]
 
+        # Back-reference definition
+        if char == self.g['DEFINE']:
+            self.pos += 1
+            index = len(self.table)
+            self.table.append(_PENDING)
+            value = self._parse_value()
+            self.table[index] = value
+            return value
+
+        # Back-reference
+        if char == self.g['BACKREF']:
+            self.pos += 1
+            return self._read_backref()
+
         # Null
         if char == self.g['NULL']:
             self.pos += 1
@@ -235,6 +414,21 @@ class LCRDecoder:
                 break
         return self.text[start:self.pos]
 
+    def _read_backref(self) -> Any:
+        """Read a table index and expand it (containers are copied)"""
+        start = self.pos
+        while self.pos < len(self.text) and self.text[self.pos].isdigit():
+            self.pos += 1
+        if start == self.pos:
+            raise ValueError(f"Expected back-reference index at position {start}")
+        index = int(self.text[start:self.pos])
+        if index >= len(self.table) or self.table[index] is _PENDING:
+            raise ValueError(f"Back-reference to undefined entry {index} at position {start}")
+        value = self.table[index]
+        if isinstance(value, (list, dict)):
+            return copy.deepcopy(value)
+        return value
+
     def _read_string(self) -> str:
         """Read a quoted string with escape handling"""
         if self.pos >= len(self.text) or self.text[self.pos] != '"':
@@ -311,11 +505,18 @@ class LCRDecoder:
                 self.pos += 1
                 return result
 
-            # Parse key (must be text)
-            if self.text[self.pos] != self.g['TEXT']:
+            # Parse key (must be text, possibly defined/back-referenced)
+            char = self.text[self.pos]
+            if char == self.g['DEFINE'] or char == self.g['BACKREF']:
+                key_pos = self.pos
+                key = self._parse_value()
+                if not isinstance(key, str):
+                    raise ValueError(f"Expected text key at position {key_pos}")
+            elif char == self.g['TEXT']:
+                self.pos += 1
+                key = self._read_string()
+            else:
                 raise ValueError(f"Expected text key at position {self.pos}")
-            self.pos += 1
-            key = self._read_string()
 
             # Skip bind glyph
             if self.pos >= len(self.text) or self.text[self.pos] != self.g['BIND']:
@@ -392,6 +593,8 @@ def encode_lcr(value: Any, collapse_level: int = 0) -> str:
         LC-R string with beautiful runic glyphs
 
     Example:
+        >>> encode_lcr(['&h_tex_albedo', '&h_tex_albedo'], collapse_level=1)
+        '⋔[⊜⟁h_tex_albedo⋅↩0]'
         >>> encode_lcr(None)
         '∅'
         >>> encode_lcr(True)
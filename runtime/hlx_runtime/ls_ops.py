@@ -4,8 +4,12 @@ Core operations for the Latent Space (LS) system.
 Reference: CONTRACT_803
 """
 
-from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+import asyncio
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
 from .cas import CASStore, get_cas_store
+from .cas_async import AsyncCASStore
+from .handle import handle_hash
+from .encoded import EncodedValue
 from .lc_codec import encode_lcb, decode_lcb, canonical_hash, encode_runic, LCTParser
 from .errors import E_HANDLE_NOT_FOUND, E_IO_ERROR
 from .contracts import wrap_literal, unwrap_literal, validate_contract
@@ -17,7 +21,7 @@ def collapse(value: Any, cas: CASStore = None) -> str:
     ls.collapse(value) -> handle
     Encode to LC-B, store in CAS, return handle.
     """
-    cas = cas or get_cas_store()
+    cas = cas if cas is not None else get_cas_store()
     return cas.store(value)
 
 def resolve(handle: str, cas: CASStore = None) -> Any:
@@ -25,15 +29,34 @@ def resolve(handle: str, cas: CASStore = None) -> Any:
     ls.resolve(handle) -> value
     Retrieve from CAS, decode from LC-B.
     """
-    cas = cas or get_cas_store()
+    cas = cas if cas is not None else get_cas_store()
     return cas.retrieve(handle)
 
+def collapse_many(values: Iterable[Any], cas: CASStore = None, workers: int = 0,
+                  threads: bool = False) -> List[str]:
+    """
+    ls.collapse_many(values) -> [handle]
+    Collapse values in bulk; encoding runs on `workers` processes (or
+    threads). Handles are returned in input order.
+    """
+    cas = cas if cas is not None else get_cas_store()
+    return cas.store_many(values, workers=workers, threads=threads)
+
+def resolve_many(handles: Iterable[str], cas: CASStore = None, workers: int = 0,
+                 threads: bool = False) -> List[Any]:
+    """
+    ls.resolve_many(handles) -> [value]
+    Resolve handles in bulk, in input order.
+    """
+    cas = cas if cas is not None else get_cas_store()
+    return cas.retrieve_many(handles, workers=workers, threads=threads)
+
 def snapshot(cas: CASStore = None) -> Any:
     """
     ls.snapshot() -> checkpoint
     Capture current CAS state for rollback.
     """
-    cas = cas or get_cas_store()
+    cas = cas if cas is not None else get_cas_store()
     return cas.snapshot()
 
 def transaction(fn: Callable[[], T], cas: CASStore = None) -> T:
@@ -41,7 +64,7 @@ def transaction(fn: Callable[[], T], cas: CASStore = None) -> T:
     ls.transaction(fn) -> result
     Execute fn atomically, rollback on error.
     """
-    cas = cas or get_cas_store()
+    cas = cas if cas is not None else get_cas_store()
     checkpoint = cas.snapshot()
     try:
         return fn()
@@ -52,8 +75,12 @@ def transaction(fn: Callable[[], T], cas: CASStore = None) -> T:
 # Legacy/Compatibility aliases
 ls_collapse = collapse
 ls_resolve = resolve
+ls_collapse_many = collapse_many
+ls_resolve_many = resolve_many
 
 def ls_encode(value: Any, mode: str = 'LC-B') -> bytes:
+    if isinstance(value, EncodedValue):
+        return value.runic.encode('utf-8') if mode.upper() == 'LC-T' else value.data
     if mode.upper() == 'LC-T':
          return encode_runic(value).encode('utf-8')
     return encode_lcb(value)
@@ -64,6 +91,8 @@ def ls_decode(data: bytes, mode: str = 'LC-B') -> Any:
     return decode_lcb(data)
 
 def ls_hash(value: Any) -> str:
+    if isinstance(value, EncodedValue):
+        return value.digest
     return canonical_hash(value)
 
 def ls_validate(value: Any, wrapped: bool = True) -> Tuple[bool, Optional[str]]:
@@ -90,30 +119,60 @@ def ls_unwrap(wrapped: Dict) -> Any:
 # Class for context if needed for backward compat, but function API is preferred
 class LSContext:
     def __init__(self, cas_store: CASStore = None):
-        self.cas = cas_store or get_cas_store()
+        self.cas = cas_store if cas_store is not None else get_cas_store()
     
     def collapse(self, value: Any) -> Tuple[str, str]:
         # Emulate old behavior: return handle, hash
         handle = self.cas.store(value)
-        # handle is &h_tag_hash
-        # Extract hash from handle?
-        parts = handle.split('_')
-        h = parts[-1]
-        return handle, h
+        return handle, handle_hash(handle)
         
     def resolve(self, handle: str) -> Tuple[Optional[Any], Optional[str]]:
         try:
             val = self.cas.retrieve(handle)
-            return val, handle.split('_')[-1]
+            return val, handle_hash(handle)
         except Exception:
             return None, None
             
     def collapse_with_hash(self, value: Any) -> Dict:
-        handle = self.cas.store(value)
-        h = handle.split('_')[-1]
+        encoded = EncodedValue.of(value)
+        handle = self.cas.store(encoded)
+        return {
+            'handle': handle,
+            'content_hash': handle_hash(handle),
+            'lc_b_size': encoded.size,
+            'lc_t': encoded.runic
+        }
+
+class AsyncLSContext:
+    """LSContext for asyncio code, backed by an AsyncCASStore."""
+    def __init__(self, cas_store: Optional[AsyncCASStore] = None):
+        self.cas = cas_store if cas_store is not None else AsyncCASStore()
+
+    async def collapse(self, value: Any) -> Tuple[str, str]:
+        handle = await self.cas.store(value)
+        return handle, handle_hash(handle)
+
+    async def resolve(self, handle: str) -> Tuple[Optional[Any], Optional[str]]:
+        try:
+            val = await self.cas.retrieve(handle)
+            return val, handle_hash(handle)
+        except Exception:
+            return None, None
+
+    async def collapse_with_hash(self, value: Any) -> Dict:
+        loop = asyncio.get_running_loop()
+        encoded = await loop.run_in_executor(
+            self.cas.codec_executor, _encode_with_runic, value)
+        handle = await self.cas.store(encoded)
         return {
             'handle': handle,
-            'content_hash': h,
-            'lc_b_size': len(encode_lcb(value)),
-            'lc_t': encode_runic(value)
-        }
\ No newline at end of file
+            'content_hash': handle_hash(handle),
+            'lc_b_size': encoded.size,
+            'lc_t': encoded.runic
+        }
+
+
+def _encode_with_runic(value: Any) -> EncodedValue:
+    encoded = EncodedValue.of(value)
+    encoded.runic  # Derived in the executor, not on the event loop
+    return encoded
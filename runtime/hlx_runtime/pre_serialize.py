@@ -15,7 +15,8 @@ Requirements:
 import unicodedata
 import math
 import struct
-from typing import Any
+from collections import OrderedDict
+from typing import Any, Dict
 from .errors import E_FLOAT_SPECIAL, E_KEY_ORDER, E_TRAILING_COMMA, HLXError
 
 
@@ -92,6 +93,42 @@ def normalize_float(value: float) -> float:
     return value
 
 
+# Bounded memo of recently normalized long non-ASCII strings
+NORMALIZE_MEMO_SIZE = 1024
+NORMALIZE_MEMO_MIN_LENGTH = 64
+
+_normalize_memo: 'OrderedDict[str, str]' = OrderedDict()
+
+# How often each normalize_string path was taken
+_normalize_stats: Dict[str, int] = {
+    'ascii': 0,       # ASCII input, NFC skipped
+    'nfc_skip': 0,    # Non-ASCII input already in NFC
+    'memo_hit': 0,    # Served from the memo
+    'full': 0,        # Full NFC normalization
+}
+
+
+def get_normalize_stats() -> Dict[str, int]:
+    """Return a copy of the normalize_string path counters."""
+    return dict(_normalize_stats)
+
+
+def reset_normalize_stats() -> None:
+    """Reset path counters and clear the memo."""
+    for key in _normalize_stats:
+        _normalize_stats[key] = 0
+    _normalize_memo.clear()
+
+
+def _normalize_whitespace(value: str) -> str:
+    # Skip the copies when there is nothing to replace or strip
+    if '\r' in value:
+        value = value.replace('\r\n', '\n')
+    if value and value[-1].isspace():
+        value = value.rstrip()
+    return value
+
+
 def normalize_string(value: str) -> str:
     """
     Normalize string values according to CONTRACT_804 requirements.
@@ -100,6 +137,9 @@ def normalize_string(value: str) -> str:
     - Strips trailing whitespace
     - Normalizes line endings (\\r\\n → \\n)
 
+    ASCII and already-NFC strings skip normalization; long strings that do
+    need it are memoized. See get_normalize_stats() for path counts.
+
     Args:
         value: String to normalize
 
@@ -112,14 +152,35 @@ def normalize_string(value: str) -> str:
         >>> normalize_string('text  \\r\\n')
         'text\\n'
     """
+    # ASCII is always NFC
+    if value.isascii():
+        _normalize_stats['ascii'] += 1
+        return _normalize_whitespace(value)
+
+    if unicodedata.is_normalized('NFC', value):
+        _normalize_stats['nfc_skip'] += 1
+        return _normalize_whitespace(value)
+
+    memoize = len(value) >= NORMALIZE_MEMO_MIN_LENGTH
+    if memoize:
+        cached = _normalize_memo.get(value)
+        if cached is not None:
+            _normalize_memo.move_to_end(value)
+            _normalize_stats['memo_hit'] += 1
+            return cached
+
+    _normalize_stats['full'] += 1
+
     # UTF-8 NFC normalization (Canonical Decomposition followed by Canonical Composition)
     normalized = unicodedata.normalize('NFC', value)
 
-    # Normalize line endings: \r\n → \n
-    normalized = normalized.replace('\r\n', '\n')
+    # Normalize line endings (\r\n → \n) and strip trailing whitespace
+    normalized = _normalize_whitespace(normalized)
 
-    # Strip trailing whitespace
-    normalized = normalized.rstrip()
+    if memoize:
+        _normalize_memo[value] = normalized
+        if len(_normalize_memo) > NORMALIZE_MEMO_SIZE:
+            _normalize_memo.popitem(last=False)
 
     return normalized
 
@@ -0,0 +1,232 @@
+"""
+HLX Record Log
+Append-only, seekable container for many LC-B values.
+
+Layout (all integers big-endian):
+
+    header   MAGIC (8) | flags (1)
+    records  ULEB128(length) | [digest (32) if FLAG_HASHES] | LC-B payload
+    index    offset (u64) per record
+    trailer  record count (u64) | index offset (u64) | INDEX_MAGIC (8)
+
+The reader memory-maps the file: `reader[i]` is O(1) via the footer index and
+iteration walks the records sequentially. A log whose writer died before the
+footer was written is still readable; the index is rebuilt by a scan.
+"""
+
+import mmap
+import os
+import struct
+from typing import Any, Iterator, List, Optional
+
+from .lc_codec import encode_lcb, decode_lcb, compute_hash, encode_uleb128, decode_uleb128, LCDecodeError
+from .errors import IntegrityError
+
+MAGIC = b'HLXRLOG1'
+INDEX_MAGIC = b'HLXRIDX1'
+
+FLAG_HASHES = 0x01
+
+HEADER_SIZE = len(MAGIC) + 1
+DIGEST_SIZE = 32
+
+_OFFSET = struct.Struct('>Q')
+_TRAILER = struct.Struct('>QQ8s')
+
+
+def is_record_log(path: str) -> bool:
+    """Check whether a file starts with the record log magic"""
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def _read_trailer(data) -> Optional[tuple]:
+    if len(data) < HEADER_SIZE + _TRAILER.size:
+        return None
+    count, index_offset, magic = _TRAILER.unpack_from(data, len(data) - _TRAILER.size)
+    if magic != INDEX_MAGIC or index_offset + count * _OFFSET.size + _TRAILER.size != len(data):
+        return None
+    return count, index_offset
+
+
+def _scan_offsets(data, start: int, end: int, with_hashes: bool) -> List[int]:
+    """Rebuild record offsets by walking the records"""
+    offsets = []
+    pos = start
+    extra = DIGEST_SIZE if with_hashes else 0
+    while pos < end:
+        length, size = decode_uleb128(data, pos)
+        record_end = pos + size + extra + length
+        if size == 0 or length == 0 or record_end > end:
+            break  # Torn final record or footer (LC-B payloads are never empty)
+        offsets.append(pos)
+        pos = record_end
+    return offsets
+
+
+class RecordLogWriter:
+    """
+    Appends LC-B records to a record log.
+
+    Opening an existing log continues it: the footer is dropped and rewritten
+    on close().
+    """
+
+    def __init__(self, path: str, with_hashes: bool = False):
+        self.path = path
+        self._offsets: List[int] = []
+
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self._file = open(path, 'r+b')
+            self._resume()
+        else:
+            self.with_hashes = with_hashes
+            self._file = open(path, 'wb')
+            self._file.write(MAGIC + bytes([FLAG_HASHES if with_hashes else 0]))
+            self._pos = HEADER_SIZE
+
+    def _resume(self):
+        data = self._file.read()
+        if data[:len(MAGIC)] != MAGIC:
+            raise LCDecodeError(f"Not a record log: {self.path}")
+        self.with_hashes = bool(data[len(MAGIC)] & FLAG_HASHES)
+
+        trailer = _read_trailer(data)
+        if trailer is not None:
+            count, index_offset = trailer
+            self._offsets = [_OFFSET.unpack_from(data, index_offset + i * _OFFSET.size)[0]
+                             for i in range(count)]
+            end = index_offset
+        else:
+            self._offsets = _scan_offsets(data, HEADER_SIZE, len(data), self.with_hashes)
+            end = HEADER_SIZE
+            if self._offsets:
+                last = self._offsets[-1]
+                length, size = decode_uleb128(data, last)
+                end = last + size + (DIGEST_SIZE if self.with_hashes else 0) + length
+
+        self._file.seek(end)
+        self._file.truncate()
+        self._pos = end
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def append(self, value: Any) -> int:
+        """Encode and append a value; returns its record index"""
+        return self.append_encoded(encode_lcb(value))
+
+    def append_encoded(self, data: bytes, digest: Optional[str] = None) -> int:
+        """
+        Append an already-encoded LC-B record; returns its record index.
+
+        Args:
+            data: LC-B bytes
+            digest: Hex hash of `data` if already known (hashed logs only)
+        """
+        prefix = encode_uleb128(len(data))
+        self._offsets.append(self._pos)
+        self._file.write(prefix)
+        if self.with_hashes:
+            self._file.write(bytes.fromhex(digest or compute_hash(data)))
+        self._file.write(data)
+        self._pos += len(prefix) + (DIGEST_SIZE if self.with_hashes else 0) + len(data)
+        return len(self._offsets) - 1
+
+    def close(self):
+        """Write the footer index and close the file"""
+        if self._file.closed:
+            return
+        index_offset = self._pos
+        self._file.write(b''.join(_OFFSET.pack(o) for o in self._offsets))
+        self._file.write(_TRAILER.pack(len(self._offsets), index_offset, INDEX_MAGIC))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RecordLogReader:
+    """
+    Memory-mapped random access to a record log.
+
+    reader[i] decodes record i; reader.read_raw(i) returns its LC-B bytes as a
+    zero-copy memoryview; iteration decodes records in order.
+    """
+
+    def __init__(self, path: str, verify: bool = False):
+        self.path = path
+        self.verify = verify
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise LCDecodeError(f"Not a record log: {path}")
+        self.with_hashes = bool(self._mmap[len(MAGIC)] & FLAG_HASHES)
+
+        trailer = _read_trailer(self._mmap)
+        self._scanned: Optional[List[int]] = None
+        if trailer is not None:
+            self._count, self._index_offset = trailer
+        else:
+            # Unfinished log: no footer, rebuild the index by scanning
+            self._scanned = _scan_offsets(self._mmap, HEADER_SIZE, len(self._mmap), self.with_hashes)
+            self._count, self._index_offset = len(self._scanned), 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _offset(self, i: int) -> int:
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError(f"Record index out of range: {i}")
+        if self._scanned is not None:
+            return self._scanned[i]
+        return _OFFSET.unpack_from(self._mmap, self._index_offset + i * _OFFSET.size)[0]
+
+    def _locate(self, pos: int):
+        length, size = decode_uleb128(self._mmap, pos)
+        pos += size
+        digest = None
+        if self.with_hashes:
+            digest = self._view[pos:pos + DIGEST_SIZE]
+            pos += DIGEST_SIZE
+        return self._view[pos:pos + length], digest
+
+    def read_raw(self, i: int) -> memoryview:
+        """LC-B bytes of record i (view into the mapping)"""
+        data, digest = self._locate(self._offset(i))
+        if self.verify and digest is not None and compute_hash(data) != digest.hex():
+            raise IntegrityError(f"Record {i} hash mismatch in {self.path}")
+        return data
+
+    def hash_of(self, i: int) -> str:
+        """Stored hex hash of record i (computed if the log has no hashes)"""
+        data, digest = self._locate(self._offset(i))
+        return digest.hex() if digest is not None else compute_hash(data)
+
+    def __getitem__(self, i: int) -> Any:
+        return decode_lcb(bytes(self.read_raw(i)))
+
+    def __iter__(self) -> Iterator[Any]:
+        for i in range(self._count):
+            yield self[i]
+
+    def close(self):
+        if self._mmap.closed:
+            return
+        self._view.release()
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,113 @@
+"""
+Simple in-memory CAS shared by the HLX-LS and HLXL-LS runtimes.
+Reference: CONTRACT_802
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+from .lc_codec import encode_lcb, compute_hash, get_type_tag, LCEncodeError
+from .cas import copy_value
+
+E_HANDLE_UNRESOLVED = "E_HANDLE_UNRESOLVED"
+
+
+class SimpleCAS:
+    """
+    Simple content-addressed store for runtime use.
+
+    Handles are canonical: `&h_<tag>_<BLAKE2b-256 of the LC-B encoding>`,
+    the same handle CASStore.store gives, so equal values share a handle
+    whatever their dict order. Values with no LC-B form are keyed by
+    a hash of their repr.
+
+    Lists and dicts are copied on put(), so later changes to the caller's
+    object do not reach the store. get() returns the stored copy itself,
+    which must not be mutated: collapsing that object again returns its
+    handle without re-encoding it. Handles of recently collapsed long
+    strings and bytes are memoized.
+
+    With a `backend` CASStore, new values are also written to it from the
+    bytes already encoded for hashing, and get()/has() fall back to it.
+    """
+    HANDLE_MEMO_SIZE = 1024
+    HANDLE_MEMO_MIN_LENGTH = 64
+    tracer = None  # Optional cas_trace.AccessTracer (on_store/on_retrieve)
+    error = LookupError  # Raised by get() for unknown handles; set per runtime
+
+    def __init__(self, backend: Any = None):
+        self.store: Dict[str, Any] = {}
+        self.dedup_hits = 0
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._handle_memo: 'OrderedDict[Tuple[type, Any], str]' = OrderedDict()
+        self._handles_by_id: Dict[int, str] = {}  # Lists and dicts handed out by get()
+
+    def put(self, value: Any) -> str:
+        """Store value and return handle"""
+        handle = None
+        memo_key = None
+        with self._lock:
+            if isinstance(value, (list, dict)):
+                handle = self._handles_by_id.get(id(value))
+                if handle is not None and self.store.get(handle) is not value:
+                    handle = None  # Not the stored object (its id was reused)
+            elif isinstance(value, (str, bytes)) and len(value) >= self.HANDLE_MEMO_MIN_LENGTH:
+                memo_key = (type(value), value)
+                handle = self._handle_memo.get(memo_key)
+                if handle is not None and handle in self.store:
+                    self._handle_memo.move_to_end(memo_key)
+                else:
+                    handle = None
+            if handle is not None:
+                self.dedup_hits += 1
+        if handle is not None:
+            if self.tracer is not None:
+                self.tracer.on_store(handle)
+            return handle
+
+        try:
+            encoded = encode_lcb(value)
+            digest = compute_hash(encoded)
+            size = len(encoded)
+        except (LCEncodeError, TypeError):  # TypeError: unsortable (mixed-type) keys
+            encoded = None
+            serialized = repr(value).encode('utf-8')
+            digest = hashlib.blake2b(serialized, digest_size=32).hexdigest()
+            size = len(serialized)
+        handle = f"&h_{get_type_tag(value)}_{digest}"
+
+        with self._lock:
+            if memo_key is not None:
+                self._handle_memo[memo_key] = handle
+                if len(self._handle_memo) > self.HANDLE_MEMO_SIZE:
+                    self._handle_memo.popitem(last=False)
+            new = handle not in self.store
+            if new:
+                if isinstance(value, (list, dict)):
+                    value = copy_value(value)
+                    self._handles_by_id[id(value)] = handle
+                self.store[handle] = value
+            else:
+                self.dedup_hits += 1  # Already stored; keep the original object
+        if new and self.backend is not None and encoded is not None:
+            self.backend.store_encoded(encoded, digest)
+        if self.tracer is not None:
+            self.tracer.on_store(handle, size)
+        return handle
+
+    def get(self, handle: str) -> Any:
+        """Retrieve value by handle"""
+        if self.tracer is not None:
+            self.tracer.on_retrieve(handle)
+        if handle in self.store:
+            return self.store[handle]
+        if self.backend is not None and self.backend.exists(handle):
+            return self.backend.retrieve(handle)
+        raise self.error(f"{E_HANDLE_UNRESOLVED}: Handle '{handle}' not found")
+
+    def has(self, handle: str) -> bool:
+        """Check if handle exists"""
+        return handle in self.store or (self.backend is not None and self.backend.exists(handle))
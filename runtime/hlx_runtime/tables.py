@@ -5,6 +5,7 @@ Implements Merkle tree structure for state integrity.
 
 from typing import Any, Dict, List, Optional
 from .lc_codec import encode_lcb, compute_hash
+from .encoded import EncodedValue
 
 
 class MerkleNode:
@@ -35,10 +36,12 @@ class MerkleTree:
         return compute_hash(combined.encode('utf-8'))
 
     def add_leaf(self, value: Any) -> str:
-        lcb_bytes = encode_lcb(value)
-        leaf_hash = compute_hash(lcb_bytes)
-        leaf = MerkleNode(leaf_hash, data=value)
-        self.leaves.append(leaf)
+        if isinstance(value, EncodedValue):
+            return self._add_leaf(value.digest, value.value)
+        return self._add_leaf(compute_hash(encode_lcb(value)), value)
+
+    def _add_leaf(self, leaf_hash: str, value: Any) -> str:
+        self.leaves.append(MerkleNode(leaf_hash, data=value))
         return leaf_hash
 
     def build(self):
@@ -80,8 +83,10 @@ class StateTable:
         self._dirty = False
 
     def set(self, handle: str, value: Any) -> str:
-        lcb_bytes = encode_lcb(value)
-        value_hash = compute_hash(lcb_bytes)
+        if isinstance(value, EncodedValue):
+            value, value_hash = value.value, value.digest
+        else:
+            value_hash = compute_hash(encode_lcb(value))
         self.entries[handle] = (value, value_hash)
         self._dirty = True
         return value_hash
@@ -104,8 +109,8 @@ class StateTable:
     def rebuild_merkle(self):
         self.merkle = MerkleTree()
         for handle in sorted(self.entries.keys()):
-            value, _ = self.entries[handle]
-            self.merkle.add_leaf(value)
+            value, value_hash = self.entries[handle]
+            self.merkle._add_leaf(value_hash, value)  # Hashed by set()
         self.merkle.build()
         self._dirty = False
 
@@ -2,11 +2,20 @@
 import unittest
 import sys
 import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
-from hlx_runtime.cas import CASStore, get_cas_store
-from hlx_runtime.errors import HandleNotFoundError
+from hlx_runtime.cas import (
+    CASStore, CASSnapshot, ConcurrentCASStore, FileCASStore, DecodedValueCache,
+    get_cas_store, set_cas_store, split_handle,
+)
+from hlx_runtime.cas_sqlite import SQLiteCASStore
+from hlx_runtime.cas_pack import PackCASStore
+from hlx_runtime.errors import HandleNotFoundError, IntegrityError
+from hlx_runtime.lc_codec import encode_lcb, compute_hash
+from hlx_runtime import ls_ops
 
 class TestCAS(unittest.TestCase):
     def test_store_retrieve(self):
@@ -33,10 +42,417 @@ class TestCAS(unittest.TestCase):
         with self.assertRaises(HandleNotFoundError):
             cas.retrieve("&h_missing")
 
+    def test_dedup_hits(self):
+        cas = CASStore()
+        cas.store({"a": 1})
+        self.assertEqual(cas.dedup_hits, 0)
+        cas.store({"a": 1})
+        cas.store({"a": 1})
+        self.assertEqual(cas.dedup_hits, 2)
+        self.assertEqual(len(cas), 1)
+
+    def test_duplicate_not_rewritten(self):
+        cas = CASStore()
+        writes = []
+        put_blob = cas._put_blob
+        cas._put_blob = lambda handle, encoded: (writes.append(handle), put_blob(handle, encoded))
+        cas.store("same")
+        cas.store("same")
+        self.assertEqual(len(writes), 1)
+
+    def test_store_encoded(self):
+        cas = CASStore()
+        for value in [None, True, 7, 1.5, "text", "&h_ref", b"\x00", [1, "a"], {"k": [None]}]:
+            encoded = encode_lcb(value)
+            h = cas.store_encoded(encoded)
+            self.assertEqual(h, CASStore().store(value))
+            self.assertEqual(cas.retrieve(h), value)
+        h = cas.store_encoded(encode_lcb("text"), compute_hash(encode_lcb("text")))
+        self.assertEqual(cas.dedup_hits, 1)
+        with self.assertRaises(ValueError):
+            cas.store_encoded(b"")
+
+    def test_store_frozen_value(self):
+        cas = CASStore()
+        cas.decoded_cache = DecodedValueCache(frozen=True)
+        h = cas.store({"config": [1, 2, 3]})
+        value = cas.retrieve(h)
+        self.assertEqual(cas.store(value), h)
+        self.assertEqual(cas.dedup_hits, 1)
+
+        # Frozen values not (or no longer) cached are thawed and encoded
+        cas.decoded_cache.clear()
+        self.assertEqual(cas.store(value), h)
+        self.assertEqual(cas.store((1, 2)), cas.store([1, 2]))
+
     def test_global_cas(self):
         cas = get_cas_store()
         h = cas.store("global")
         self.assertTrue(cas.exists(h))
 
+class TestConcurrentCAS(unittest.TestCase):
+    def test_matches_plain_store(self):
+        cas = ConcurrentCASStore(stripes=8)
+        values = [None, 1, "text", b"raw", [1, 2], {"a": {"b": 1}}]
+        handles = [cas.store(v) for v in values]
+        self.assertEqual(handles, [CASStore().store(v) for v in values])
+        for h, v in zip(handles, values):
+            self.assertTrue(cas.exists(h))
+            self.assertEqual(cas.retrieve(h), v)
+        self.assertEqual(len(cas), len(values))
+        with self.assertRaises(HandleNotFoundError):
+            cas.retrieve("&h_missing")
+
+    def test_threaded_stores(self):
+        cas = ConcurrentCASStore(stripes=4)
+        values = [{"id": i % 50} for i in range(400)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            handles = list(pool.map(cas.store, values))
+        self.assertEqual(len(cas), 50)
+        self.assertEqual(cas.dedup_hits, 350)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            self.assertEqual(list(pool.map(cas.retrieve, handles)), values)
+
+    def test_snapshot_restore(self):
+        cas = ConcurrentCASStore()
+        h1 = cas.store("keep")
+        snap = cas.snapshot()
+        h2 = cas.store("drop")
+        cas.restore(snap)
+        self.assertTrue(cas.exists(h1))
+        self.assertFalse(cas.exists(h2))
+        self.assertEqual(cas.snapshot(), snap)
+
+    def test_transaction_rollback(self):
+        cas = ConcurrentCASStore()
+        def failing():
+            cas.store("partial")
+            raise ValueError("boom")
+        with self.assertRaises(ValueError):
+            ls_ops.transaction(failing, cas=cas)
+        self.assertEqual(len(cas), 0)
+
+    def test_invalid_stripes(self):
+        with self.assertRaises(ValueError):
+            ConcurrentCASStore(stripes=0)
+
+    def test_default_global(self):
+        if "HLX_CAS_DIR" not in os.environ:
+            self.assertIsInstance(get_cas_store(), ConcurrentCASStore)
+
+class TestBulkCAS(unittest.TestCase):
+    values = [None, True, 7, 1.5, "text", "&h_ref", b"raw", [1, 2], {"a": {"b": 1}}] * 3
+
+    def check(self, cas, **kwargs):
+        handles = cas.store_many(self.values, chunk_size=4, **kwargs)
+        self.assertEqual(handles, [CASStore().store(v) for v in self.values])
+        self.assertEqual(len(cas), 9)
+        self.assertEqual(cas.retrieve_many(handles, chunk_size=4, **kwargs), self.values)
+
+    def test_inline(self):
+        self.check(CASStore())
+
+    def test_threads(self):
+        self.check(ConcurrentCASStore(), workers=4, threads=True)
+
+    def test_processes(self):
+        self.check(CASStore(), workers=2)
+
+    def test_missing(self):
+        cas = CASStore()
+        h = cas.store(1)
+        with self.assertRaises(HandleNotFoundError):
+            cas.retrieve_many([h, "&h_missing"])
+
+    def test_repeated_handles_are_copies(self):
+        cas = CASStore()
+        h = cas.store({"k": [1]})
+        first, second = cas.retrieve_many([h, h])
+        first["k"].append(2)
+        self.assertEqual(second, {"k": [1]})
+
+    def test_decoded_cache(self):
+        cas = CASStore()
+        cas.decoded_cache = DecodedValueCache()
+        handles = cas.store_many(["a", "b"])
+        cas.retrieve_many(handles)
+        self.assertEqual(cas.retrieve_many(handles), ["a", "b"])
+        self.assertEqual(cas.decoded_cache.hits, 2)
+
+    def test_dedup_and_rollback(self):
+        cas = CASStore()
+        snap = cas.snapshot()
+        cas.store_many([1, 2, 1])
+        self.assertEqual(cas.dedup_hits, 1)
+        cas.restore(snap)
+        self.assertEqual(len(cas), 0)
+
+    def test_ls_ops(self):
+        cas = ConcurrentCASStore()
+        handles = ls_ops.collapse_many(self.values, cas=cas, workers=2, threads=True)
+        self.assertEqual(ls_ops.resolve_many(handles, cas=cas), self.values)
+
+class SnapshotTests:
+    store_class = CASStore
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        self.stores = []
+
+    def tearDown(self):
+        for cas in self.stores:
+            if hasattr(cas, 'close'):
+                cas.close()
+        self._tmp.cleanup()
+
+    def make_store(self):
+        cas = self.store_class()
+        self.stores.append(cas)
+        return cas
+
+    def test_snapshot_is_view(self):
+        cas = self.make_store()
+        h1 = cas.store("a")
+        snap = cas.snapshot()
+        self.assertIsInstance(snap, CASSnapshot)
+        h2 = cas.store("b")
+        self.assertEqual(len(snap), 1)
+        self.assertIn(h1, snap)
+        self.assertNotIn(h2, snap)
+        self.assertEqual(dict(snap), {h1: encode_lcb("a")})
+
+    def test_restore_removes_only_new_writes(self):
+        cas = self.make_store()
+        old = [cas.store(i) for i in range(20)]
+        snap = cas.snapshot()
+        new = [cas.store(i) for i in range(15, 30)]
+        cas.restore(snap)
+        self.assertEqual(len(cas), 20)
+        self.assertTrue(all(cas.exists(h) for h in old))
+        self.assertFalse(any(cas.exists(h) for h in new[5:]))
+
+    def test_nested_transactions(self):
+        cas = self.make_store()
+        def inner_fails():
+            cas.store("inner")
+            raise ValueError("inner")
+        def outer():
+            h = cas.store("outer")
+            with self.assertRaises(ValueError):
+                ls_ops.transaction(inner_fails, cas=cas)
+            return h
+        h = ls_ops.transaction(outer, cas=cas)
+        self.assertEqual(cas.snapshot().keys(), {h})
+
+        def outer_fails():
+            ls_ops.transaction(lambda: cas.store("committed inner"), cas=cas)
+            raise ValueError("outer")
+        with self.assertRaises(ValueError):
+            ls_ops.transaction(outer_fails, cas=cas)
+        self.assertEqual(cas.snapshot().keys(), {h})
+
+    def test_later_checkpoint_survives_rollback(self):
+        cas = self.make_store()
+        h1 = cas.store(1)
+        early = cas.snapshot()
+        h2 = cas.store(2)
+        late = cas.snapshot()
+        cas.restore(early)
+        self.assertFalse(cas.exists(h2))
+        self.assertEqual(late.keys(), {h1, h2})
+        h3 = cas.store(3)
+        cas.restore(late)
+        self.assertEqual(cas.snapshot().keys(), {h1, h2})
+        self.assertFalse(cas.exists(h3))
+        self.assertEqual(cas.retrieve(h2), 2)
+
+    def test_restore_from_mapping(self):
+        cas = self.make_store()
+        h1 = cas.store("x")
+        snap = cas.snapshot()
+        h2 = cas.store("y")
+        cas.restore({h2: encode_lcb("y")})
+        self.assertEqual(cas.snapshot().keys(), {h2})
+        # Existing checkpoints are detached, not corrupted
+        self.assertEqual(dict(snap), {h1: encode_lcb("x")})
+        cas.restore(snap)
+        self.assertEqual(cas.snapshot().keys(), {h1})
+
+    def test_rollback_drops_cached_values(self):
+        cas = self.make_store()
+        cas.decoded_cache = DecodedValueCache()
+        keep = cas.store("keep")
+        cas.retrieve(keep)
+        snap = cas.snapshot()
+        drop = cas.store("drop")
+        cas.retrieve(drop)
+        cas.restore(snap)
+        self.assertEqual(len(cas.decoded_cache), 1)
+        with self.assertRaises(HandleNotFoundError):
+            cas.retrieve(drop)
+
+class TestCASSnapshots(SnapshotTests, unittest.TestCase):
+    store_class = CASStore
+
+class TestConcurrentCASSnapshots(SnapshotTests, unittest.TestCase):
+    store_class = ConcurrentCASStore
+
+class TestFileCASSnapshots(SnapshotTests, unittest.TestCase):
+    def store_class(self):
+        return FileCASStore(self.root)
+
+class TestSQLiteCASSnapshots(SnapshotTests, unittest.TestCase):
+    def store_class(self):
+        return SQLiteCASStore(os.path.join(self.root, "cas.sqlite"))
+
+class TestPackCASSnapshots(SnapshotTests, unittest.TestCase):
+    def store_class(self):
+        return PackCASStore(self.root, pack_size=1024)
+
+class TestDecodedValueCache(unittest.TestCase):
+    def test_hits_and_misses(self):
+        cas = CASStore()
+        cas.decoded_cache = DecodedValueCache(max_entries=10)
+        h = cas.store({"config": [1, 2, 3]})
+        self.assertEqual(cas.retrieve(h), {"config": [1, 2, 3]})
+        self.assertEqual(cas.retrieve(h), {"config": [1, 2, 3]})
+        stats = cas.decoded_cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_defensive_copies(self):
+        cas = CASStore()
+        cas.decoded_cache = DecodedValueCache()
+        h = cas.store({"config": [1, 2, 3]})
+        cas.retrieve(h)["config"].append(4)
+        cas.retrieve(h)["config"].append(5)
+        self.assertEqual(cas.retrieve(h), {"config": [1, 2, 3]})
+
+    def test_frozen(self):
+        cas = CASStore()
+        cas.decoded_cache = DecodedValueCache(frozen=True)
+        h = cas.store({"config": [1, 2, 3]})
+        value = cas.retrieve(h)
+        self.assertEqual(value["config"], (1, 2, 3))
+        with self.assertRaises(TypeError):
+            value["config"] = None
+        self.assertIs(cas.retrieve(h), value)
+
+    def test_entry_bound(self):
+        cas = CASStore()
+        cas.decoded_cache = DecodedValueCache(max_entries=2)
+        handles = [cas.store(i) for i in range(3)]
+        for h in handles:
+            cas.retrieve(h)
+        self.assertEqual(len(cas.decoded_cache), 2)
+        self.assertEqual(cas.decoded_cache.evictions, 1)
+
+    def test_byte_bound(self):
+        cas = CASStore()
+        cas.decoded_cache = DecodedValueCache(max_bytes=100)
+        small = cas.store("x" * 40)
+        big = cas.store("y" * 200)
+        cas.retrieve(small)
+        cas.retrieve(big)
+        self.assertEqual(len(cas.decoded_cache), 1)
+        cas.retrieve(cas.store("z" * 40))
+        cas.retrieve(cas.store("w" * 40))
+        self.assertLessEqual(cas.decoded_cache.stats()['bytes'], 100)
+
+    def test_restore_clears(self):
+        cas = CASStore()
+        cas.decoded_cache = DecodedValueCache()
+        snap = cas.snapshot()
+        h = cas.store("temp")
+        cas.retrieve(h)
+        cas.restore(snap)
+        with self.assertRaises(HandleNotFoundError):
+            cas.retrieve(h)
+
+class TestFileCAS(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_store_retrieve(self):
+        cas = FileCASStore(self.root)
+        values = [None, True, 123, 1.5, "text", b"raw", [1, 2], {"a": {"b": 1}}]
+        handles = [cas.store(v) for v in values]
+        self.assertEqual(handles, [CASStore().store(v) for v in values])
+        for h, v in zip(handles, values):
+            self.assertTrue(cas.exists(h))
+            self.assertEqual(cas.retrieve(h), v)
+
+    def test_layout(self):
+        cas = FileCASStore(self.root)
+        h = cas.store("hello")
+        digest = split_handle(h)[1]
+        path = os.path.join(self.root, "objects", digest[:2], digest[2:])
+        self.assertTrue(os.path.isfile(path))
+
+    def test_persists_across_instances(self):
+        with FileCASStore(self.root) as cas:
+            h = cas.store({"persist": [1, 2, 3]})
+        self.assertEqual(FileCASStore(self.root).retrieve(h), {"persist": [1, 2, 3]})
+
+    def test_missing(self):
+        cas = FileCASStore(self.root)
+        with self.assertRaises(HandleNotFoundError):
+            cas.retrieve("&h_missing")
+        self.assertFalse(cas.exists("&h_int_" + "0" * 64))
+
+    def test_snapshot_restore(self):
+        cas = FileCASStore(self.root, memory_cache=8)
+        h1 = cas.store("one")
+        snap = cas.snapshot()
+        self.assertEqual(set(snap), {h1})
+        h2 = cas.store([2])
+        cas.restore(snap)
+        self.assertTrue(cas.exists(h1))
+        self.assertFalse(cas.exists(h2))
+        self.assertEqual(len(cas), 1)
+
+    def test_transaction_rollback(self):
+        cas = FileCASStore(self.root)
+        cas.store("kept")
+
+        def fail():
+            cas.store("discarded")
+            raise RuntimeError("boom")
+
+        with self.assertRaises(RuntimeError):
+            ls_ops.transaction(fail, cas)
+        self.assertEqual(len(cas), 1)
+
+    def test_fsync_modes(self):
+        for batch in (0, 1, 2):
+            root = os.path.join(self.root, str(batch))
+            with FileCASStore(root, fsync_batch=batch) as cas:
+                handles = [cas.store(i) for i in range(5)]
+            self.assertEqual([FileCASStore(root).retrieve(h) for h in handles], list(range(5)))
+
+    def test_verify(self):
+        cas = FileCASStore(self.root, verify=True)
+        h = cas.store("payload")
+        digest = split_handle(h)[1]
+        with open(os.path.join(self.root, "objects", digest[:2], digest[2:]), 'wb') as f:
+            f.write(b"\x03\x01x")
+        with self.assertRaises(IntegrityError):
+            cas.retrieve(h)
+
+    def test_global_configuration(self):
+        cas = FileCASStore(self.root)
+        previous = set_cas_store(cas)
+        try:
+            h = ls_ops.collapse("configured")
+            self.assertTrue(cas.exists(h))
+            self.assertEqual(ls_ops.resolve(h), "configured")
+        finally:
+            set_cas_store(previous)
+        self.assertIs(get_cas_store(), previous)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,144 @@
+
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from hlx_runtime.cas import CASStore
+from hlx_runtime.cas_chunk import Chunker
+from hlx_runtime.cas_async import AsyncCASStore
+from hlx_runtime.cas_sqlite import SQLiteCASStore
+from hlx_runtime.errors import HandleNotFoundError
+from hlx_runtime.ls_ops import LSContext, AsyncLSContext
+
+
+class SlowCAS(CASStore):
+    """Counts reads and holds each one long enough for callers to pile up."""
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+        self._lock = threading.Lock()
+
+    def retrieve(self, handle):
+        with self._lock:
+            self.reads += 1
+        time.sleep(0.05)
+        return super().retrieve(handle)
+
+
+class TestAsyncCAS(unittest.IsolatedAsyncioTestCase):
+    async def test_store_retrieve(self):
+        backend = CASStore()
+        async with AsyncCASStore(backend) as cas:
+            values = [None, 7, "text", b"raw", [1, 2], {"a": {"b": 1}}]
+            handles = await cas.store_many(values)
+            self.assertEqual(handles, [CASStore().store(v) for v in values])
+            self.assertEqual(await cas.retrieve_many(handles), values)
+            self.assertEqual(await cas.retrieve(handles[-1]), values[-1])
+        self.assertEqual(len(backend), len(values))
+
+    async def test_buffered_until_flush(self):
+        backend = CASStore()
+        cas = AsyncCASStore(backend, flush_interval=60)
+        h = await cas.store({"buffered": True})
+        self.assertFalse(backend.exists(h))
+        self.assertTrue(await cas.exists(h))
+        self.assertEqual(await cas.retrieve(h), {"buffered": True})
+        await cas.flush()
+        self.assertTrue(backend.exists(h))
+
+    async def test_periodic_flush(self):
+        backend = CASStore()
+        cas = AsyncCASStore(backend, flush_interval=0.01)
+        h = await cas.store("later")
+        await asyncio.sleep(0.1)
+        self.assertTrue(backend.exists(h))
+        await cas.close()
+
+    async def test_flush_batch(self):
+        backend = CASStore()
+        cas = AsyncCASStore(backend, flush_interval=60, flush_batch=4)
+        await cas.store_many(list(range(4)))
+        await asyncio.sleep(0.05)
+        self.assertEqual(len(backend), 4)
+        await cas.close()
+
+    async def test_coalesced_reads(self):
+        backend = SlowCAS()
+        h = backend.store({"shared": [1, 2, 3]})
+        cas = AsyncCASStore(backend)
+        results = await asyncio.gather(*(cas.retrieve(h) for _ in range(10)))
+        self.assertEqual(backend.reads, 1)
+        self.assertEqual(cas.coalesced_reads, 9)
+        self.assertTrue(all(r == {"shared": [1, 2, 3]} for r in results))
+        results[0]["shared"].append(4)
+        self.assertEqual(results[1], {"shared": [1, 2, 3]})
+
+    async def test_missing(self):
+        backend = CASStore()
+        h = backend.store("present")
+        cas = AsyncCASStore(backend)
+        with self.assertRaises(HandleNotFoundError):
+            await cas.retrieve("&h_missing")
+        results = await asyncio.gather(
+            cas.retrieve_many([h, "&h_missing"]), cas.retrieve(h),
+            return_exceptions=True)
+        self.assertIsInstance(results[0], HandleNotFoundError)
+        self.assertEqual(results[1], "present")
+
+    async def test_process_codec_executor(self):
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            cas = AsyncCASStore(CASStore(), codec_executor=pool)
+            values = [{"id": i} for i in range(20)]
+            handles = await cas.store_many(values)
+            await cas.flush()
+            self.assertEqual(await cas.retrieve_many(handles), values)
+            with self.assertRaises(HandleNotFoundError):
+                await cas.retrieve("&h_missing")
+
+    async def test_backend_chunking(self):
+        backend = CASStore()
+        backend.chunking = Chunker(avg_size=1024)
+        data = os.urandom(20_000)
+        expected = CASStore()
+        expected.chunking = Chunker(avg_size=1024)
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            cas = AsyncCASStore(backend, codec_executor=pool)
+            handles = await cas.store_many([1, data, "x"])
+            self.assertEqual(handles, [expected.store(v) for v in (1, data, "x")])
+            self.assertTrue(handles[1].startswith("&h_chunked_"))
+            self.assertEqual(await cas.store(data), handles[1])
+            self.assertEqual(await cas.retrieve_many(handles), [1, data, "x"])
+            await cas.flush()
+        self.assertEqual(backend.retrieve(handles[1]), data)
+
+    async def test_sqlite_backend(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            backend = SQLiteCASStore(os.path.join(tmp, "cas.sqlite"))
+            async with AsyncCASStore(backend) as cas:
+                handles = await cas.store_many([{"row": i} for i in range(50)])
+            self.assertEqual(len(backend), 50)
+            self.assertEqual(backend.retrieve(handles[3]), {"row": 3})
+            backend.close()
+
+
+class TestAsyncLSContext(unittest.IsolatedAsyncioTestCase):
+    async def test_matches_sync_context(self):
+        value = {"name": "tex", "size": [512, 512]}
+        ctx = AsyncLSContext(AsyncCASStore(CASStore()))
+        sync_ctx = LSContext(CASStore())
+        self.assertEqual(await ctx.collapse(value), sync_ctx.collapse(value))
+        self.assertEqual(await ctx.collapse_with_hash(value), sync_ctx.collapse_with_hash(value))
+        handle, h = await ctx.collapse(value)
+        self.assertEqual(await ctx.resolve(handle), (value, h))
+        self.assertEqual(await ctx.resolve("&h_missing"), (None, None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,231 @@
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from hlx_runtime.cas import CASStore, ConcurrentCASStore, FileCASStore
+from hlx_runtime.cas_sqlite import SQLiteCASStore
+from hlx_runtime.cas_pack import PackCASStore
+from hlx_runtime.cas_bloom import BloomFilter
+from hlx_runtime.cas_chunk import Chunker
+from hlx_runtime.lc_codec import encode_lcb, compute_hash
+
+
+def handle_of(value):
+    return f"&h_int_{compute_hash(encode_lcb(value))}"
+
+
+class TestBloomFilter(unittest.TestCase):
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(capacity=5000, fp_rate=0.01)
+        handles = [handle_of(i) for i in range(5000)]
+        for h in handles:
+            bloom.add(h)
+        self.assertTrue(all(h in bloom for h in handles))
+        self.assertEqual(len(bloom), 5000)
+
+    def test_fp_rate(self):
+        bloom = BloomFilter(capacity=5000, fp_rate=0.01)
+        for i in range(5000):
+            bloom.add(handle_of(i))
+        hits = sum(handle_of(-i) in bloom for i in range(1, 20001))
+        self.assertLess(hits / 20000, 0.02)
+        stats = bloom.stats()
+        self.assertLess(stats['estimated_fp_rate'], 0.01)
+        self.assertEqual(stats['negatives'], 20000 - hits)
+
+    def test_grows_past_capacity(self):
+        bloom = BloomFilter(capacity=100, fp_rate=0.01)
+        handles = [handle_of(i) for i in range(2000)]
+        for h in handles:
+            bloom.add(h)
+        self.assertGreater(bloom.stats()['layers'], 1)
+        self.assertTrue(all(h in bloom for h in handles))
+        self.assertLess(bloom.estimated_fp_rate(), 0.01)
+        hits = sum(handle_of(-i) in bloom for i in range(1, 10001))
+        self.assertLess(hits / 10000, 0.02)
+
+    def test_malformed_handles(self):
+        bloom = BloomFilter(capacity=10)
+        bloom.add("&h_missing")
+        self.assertIn("&h_missing", bloom)
+
+    def test_concurrent_adds(self):
+        bloom = BloomFilter(capacity=500)
+        handles = [handle_of(i) for i in range(4000)]
+
+        def worker(part):
+            for h in part:
+                bloom.add(h)
+
+        threads = [threading.Thread(target=worker, args=(handles[t::4],)) for t in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(bloom.count, 4000)
+        self.assertTrue(all(h in bloom for h in handles))
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "bloom")
+            bloom = BloomFilter(capacity=100, fp_rate=0.05)
+            handles = [handle_of(i) for i in range(300)]
+            for h in handles:
+                bloom.add(h)
+            bloom.save(path, stamp=300)
+            loaded = BloomFilter.load(path, stamp=300)
+            self.assertEqual(loaded.stats()['layers'], bloom.stats()['layers'])
+            self.assertEqual((loaded.count, loaded.fp_rate), (300, 0.05))
+            self.assertTrue(all(h in loaded for h in handles))
+            self.assertIsNone(BloomFilter.load(path, stamp=299))
+            with open(path, 'r+b') as f:
+                f.truncate(os.path.getsize(path) - 1)
+            self.assertIsNone(BloomFilter.load(path))
+            self.assertIsNone(BloomFilter.load(os.path.join(root, "absent")))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            BloomFilter(fp_rate=0)
+        with self.assertRaises(ValueError):
+            BloomFilter(capacity=0)
+
+
+class BloomTests:
+    def make_store(self):
+        return CASStore()
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        self.cas = self.make_store()
+        self.handles = self.cas.store_many(list(range(200)))
+
+    def tearDown(self):
+        if hasattr(self.cas, 'close'):
+            self.cas.close()
+        self._tmp.cleanup()
+
+    def forbid_lookups(self):
+        def fail(handle):
+            raise AssertionError(f"backend lookup for {handle}")
+        self.cas._has_blob = fail
+
+    def test_negative_exists_skips_backend(self):
+        bloom = self.cas.enable_bloom(fp_rate=0.001)
+        self.assertTrue(all(self.cas.exists(h) for h in self.handles))
+        absent = [handle_of(-i) for i in range(1, 201)]
+        self.forbid_lookups()
+        for h in absent:
+            if h not in bloom:
+                self.assertFalse(self.cas.exists(h))
+        self.assertGreaterEqual(bloom.stats()['negatives'], 190)
+
+    def test_false_positive_counted(self):
+        bloom = self.cas.enable_bloom()
+        absent = handle_of(-1)
+        bloom.add(absent)
+        self.assertFalse(self.cas.exists(absent))
+        self.assertEqual(bloom.stats()['false_positives'], 1)
+
+    def test_writes_update_filter(self):
+        bloom = self.cas.enable_bloom()
+        h = self.cas.store("single")
+        many = self.cas.store_many([{"batch": i} for i in range(50)])
+        self.assertIn(h, bloom)
+        self.assertTrue(all(m in bloom for m in many))
+        self.assertEqual(len(bloom), 251)
+
+        # New content is written without a dedup lookup
+        self.forbid_lookups()
+        self.cas.store("another")
+        self.cas.store_many([{"new": i} for i in range(5)])
+        del self.cas._has_blob
+        self.assertTrue(self.cas.exists(self.cas.store("another")))
+
+    def test_chunked(self):
+        self.cas.chunking = Chunker(avg_size=1024)
+        self.cas.enable_bloom()
+        data = os.urandom(20_000)
+        h = self.cas.store(data)
+        self.assertTrue(self.cas.exists(h))
+        self.assertEqual(self.cas.retrieve(h), data)
+
+    def test_restore_rebuilds(self):
+        bloom = self.cas.enable_bloom()
+        snap = dict(self.cas.snapshot())
+        h = self.cas.store("after snapshot")
+        self.cas.restore(snap)
+        self.assertIsNot(self.cas.bloom, bloom)
+        self.assertNotIn(h, self.cas.bloom)
+        self.assertFalse(self.cas.exists(h))
+        self.assertTrue(all(self.cas.exists(x) for x in self.handles))
+
+
+class TestMemoryBloom(BloomTests, unittest.TestCase):
+    pass
+
+
+class TestConcurrentBloom(BloomTests, unittest.TestCase):
+    def make_store(self):
+        return ConcurrentCASStore(stripes=4)
+
+
+class PersistentBloomTests(BloomTests):
+    def reopen(self):
+        self.cas.close()
+        self.cas = self.make_store()
+        return self.cas
+
+    def test_saved_on_close(self):
+        self.cas.enable_bloom(fp_rate=0.02)
+        h = self.cas.store("saved")
+        path = self.cas._bloom_path
+        cas = self.reopen()
+        self.assertTrue(os.path.exists(path))
+        cas._build_bloom = None  # Must be loaded, not rebuilt
+        bloom = cas.enable_bloom(fp_rate=0.02)
+        self.assertFalse(os.path.exists(path))
+        self.assertIn(h, bloom)
+        self.assertEqual(len(bloom), 201)
+
+    def test_stale_file_rebuilt(self):
+        self.cas.enable_bloom()
+        cas = self.reopen()
+        h = cas.store("written without the filter")
+        bloom = cas.enable_bloom()
+        self.assertIn(h, bloom)
+        self.assertTrue(cas.exists(h))
+
+
+class TestFileBloom(PersistentBloomTests, unittest.TestCase):
+    def make_store(self):
+        return FileCASStore(self.root)
+
+    def test_rebuild_reads_no_blobs(self):
+        self.cas.enable_bloom()
+        self.cas.close()
+        os.remove(self.cas._bloom_path)
+        cas = self.make_store()
+        cas._get_stored = None
+        self.assertEqual(len(cas.enable_bloom()), 200)
+        del cas._get_stored
+        self.cas = cas
+
+
+class TestSQLiteBloom(PersistentBloomTests, unittest.TestCase):
+    def make_store(self):
+        return SQLiteCASStore(os.path.join(self.root, "cas.sqlite"))
+
+
+class TestPackBloom(PersistentBloomTests, unittest.TestCase):
+    def make_store(self):
+        return PackCASStore(self.root, pack_size=4096)
+
+
+if __name__ == '__main__':
+    unittest.main()
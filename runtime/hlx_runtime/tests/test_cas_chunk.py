@@ -0,0 +1,201 @@
+
+import io
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from hlx_runtime.cas import CASStore, ConcurrentCASStore, FileCASStore, DecodedValueCache
+from hlx_runtime.cas_sqlite import SQLiteCASStore
+from hlx_runtime.cas_pack import PackCASStore
+from hlx_runtime.cas_chunk import Chunker, is_manifest
+from hlx_runtime.cas_compress import BlobCompressor
+from hlx_runtime.cas_gc import collect_garbage
+from hlx_runtime.errors import HandleNotFoundError
+
+
+def random_bytes(n, seed):
+    return random.Random(seed).randbytes(n)
+
+
+class TestChunker(unittest.TestCase):
+    def test_bounds(self):
+        chunker = Chunker(avg_size=1024)
+        data = random_bytes(200_000, 1)
+        ends = list(chunker.cut_points(data))
+        self.assertEqual(ends[-1], len(data))
+        sizes = [b - a for a, b in zip([0] + ends, ends)]
+        self.assertTrue(all(chunker.min_size <= s <= chunker.max_size for s in sizes[:-1]))
+        average = len(data) / len(sizes)
+        self.assertTrue(512 <= average <= 2048, average)
+
+    def test_boundaries_resync_after_edit(self):
+        chunker = Chunker(avg_size=1024)
+        data = random_bytes(100_000, 2)
+        edited = data[:50_000] + b"inserted" + data[50_000:]
+        before = set(chunker.cut_points(data))
+        after = {end - 8 for end in chunker.cut_points(edited) if end > 50_000}
+        self.assertGreater(len(before & after), len([e for e in before if e > 50_000]) - 3)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            Chunker(avg_size=1000)
+        with self.assertRaises(ValueError):
+            Chunker(avg_size=1024, min_size=4096)
+
+
+class ChunkingTests:
+    def make_store(self):
+        return CASStore()
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        self.cas = self.make_store()
+        self.cas.chunking = Chunker(avg_size=1024)
+        self.data = random_bytes(64_000, 3)
+
+    def tearDown(self):
+        if hasattr(self.cas, 'close'):
+            self.cas.close()
+        self._tmp.cleanup()
+
+    def test_round_trip(self):
+        h = self.cas.store(self.data)
+        self.assertTrue(h.startswith("&h_chunked_"))
+        self.assertEqual(self.cas.retrieve(h), self.data)
+        self.assertEqual(b"".join(self.cas.iter_chunks(h)), self.data)
+        self.assertTrue(is_manifest(self.cas._get_blob(h)))
+
+    def test_small_values_unchunked(self):
+        small = b"x" * 100
+        h = self.cas.store(small)
+        self.assertEqual(h, CASStore().store(small))
+        self.assertEqual(self.cas.retrieve(h), small)
+
+    def test_revision_writes_only_changed_chunks(self):
+        self.cas.store(self.data)
+        before = len(self.cas)
+        revision = bytearray(self.data)
+        revision[30_000:30_010] = b"0123456789"
+        h = self.cas.store(bytes(revision))
+        # Only the chunks around the edit, plus the new manifest
+        self.assertLessEqual(len(self.cas) - before, 4)
+        self.assertEqual(self.cas.retrieve(h), bytes(revision))
+
+    def test_same_value_same_handle(self):
+        self.assertEqual(self.cas.store(self.data), self.cas.store(bytearray(self.data)))
+
+    def test_reader(self):
+        h = self.cas.store(self.data)
+        with self.cas.open_blob(h) as reader:
+            self.assertEqual(reader.size, len(self.data))
+            reader.seek(10_000)
+            self.assertEqual(reader.read(5_000), self.data[10_000:15_000])
+            reader.seek(-100, io.SEEK_END)
+            self.assertEqual(reader.read(), self.data[-100:])
+            self.assertEqual(reader.read(10), b"")
+        buffered = io.BufferedReader(self.cas.open_blob(h))
+        self.assertEqual(buffered.read(), self.data)
+
+    def test_reader_plain_blob(self):
+        h = self.cas.store(b"plain bytes")
+        self.assertEqual(self.cas.open_blob(h).read(), b"plain bytes")
+        self.assertEqual(b"".join(self.cas.iter_chunks(h)), b"plain bytes")
+
+    def test_many(self):
+        values = [1, self.data, "text", self.data[:10_000]]
+        handles = self.cas.store_many(values)
+        self.assertEqual(handles, [self.cas.store(v) for v in values])
+        self.assertEqual(self.cas.retrieve_many(handles), values)
+
+    def test_missing_chunk(self):
+        h = self.cas.store(self.data)
+        chunk = [c for c in self.cas._iter_handles() if c != h][0]
+        self.cas._delete_blob(chunk)
+        if hasattr(self.cas, 'flush'):
+            self.cas.flush()
+        with self.assertRaises(HandleNotFoundError):
+            self.cas.retrieve(h)
+
+    def test_gc_keeps_chunks(self):
+        h = self.cas.store(self.data)
+        dropped = self.cas.store(random_bytes(20_000, 4))
+        collect_garbage(self.cas, [h])
+        self.assertEqual(self.cas.retrieve(h), self.data)
+        self.assertFalse(self.cas.exists(dropped))
+
+    def test_with_compression(self):
+        self.cas.compression = BlobCompressor()
+        text = b"repetitive line of text\n" * 4000
+        h = self.cas.store(text)
+        self.assertTrue(is_manifest(self.cas._get_stored(h)))
+        self.assertEqual(self.cas.retrieve(h), text)
+        self.assertIn(h, self.cas._iter_handles())
+
+    def test_manifest_lookalike_map(self):
+        lookalike = {'$chunked': 1, 'a': 1, 'b': 2, 'c': 3}
+        h = self.cas.store(lookalike)
+        self.assertTrue(h.startswith("&h_map_"))
+        self.assertEqual(self.cas.store_encoded(self.cas._get_blob(h)), h)
+        self.assertIn(h, self.cas._iter_handles())
+        self.assertEqual(self.cas.retrieve(h), lookalike)
+        collect_garbage(self.cas, [h])
+        self.assertTrue(self.cas.exists(h))
+
+    def test_dedup_chunk_shaded_before_lookup(self):
+        self.cas.store(self.data)
+        order = []
+        contains = self.cas._contains_blob
+        self.cas._contains_blob = lambda handle: order.append('lookup') or contains(handle)
+        self.cas._gc_barrier = lambda handle, encoded: order.append('barrier')
+        try:
+            self.cas.store(self.data)
+        finally:
+            self.cas._gc_barrier = None
+            del self.cas._contains_blob
+        self.assertEqual(order[:2], ['barrier', 'lookup'])
+
+
+class TestMemoryChunking(ChunkingTests, unittest.TestCase):
+    def test_decoded_cache(self):
+        self.cas.decoded_cache = DecodedValueCache()
+        h = self.cas.store(self.data)
+        self.assertEqual(self.cas.retrieve(h), self.data)
+        self.assertEqual(self.cas.decoded_cache.get(h), (True, self.data))
+
+
+class TestConcurrentChunking(ChunkingTests, unittest.TestCase):
+    def make_store(self):
+        return ConcurrentCASStore(stripes=4)
+
+
+class TestFileChunking(ChunkingTests, unittest.TestCase):
+    def make_store(self):
+        return FileCASStore(self.root, verify=True)
+
+
+class TestSQLiteChunking(ChunkingTests, unittest.TestCase):
+    def make_store(self):
+        return SQLiteCASStore(os.path.join(self.root, "cas.sqlite"))
+
+
+class TestPackChunking(ChunkingTests, unittest.TestCase):
+    def make_store(self):
+        return PackCASStore(self.root, pack_size=16 * 1024)
+
+    def test_chunks_are_views(self):
+        h = self.cas.store(self.data)
+        self.cas._seal_active()
+        chunks = list(self.cas.iter_chunks(h))
+        self.assertTrue(all(isinstance(c.obj, type(self.cas._packs[0].data)) for c in chunks))
+        self.assertEqual(b"".join(chunks), self.data)
+        for c in chunks:
+            c.release()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from hlx_runtime.cas import CASStore, ConcurrentCASStore, FileCASStore
+from hlx_runtime.cas_sqlite import SQLiteCASStore
+from hlx_runtime.cas_compress import (
+    BlobCompressor, COMPRESSION_CODECS, is_compressed, unpack_blob, blob_size, blob_lead_byte,
+)
+from hlx_runtime.lc_codec import encode_lcb, LCDecodeError
+from hlx_runtime.errors import HandleNotFoundError
+
+
+REPETITIVE = {"rows": [{"name": "texture", "size": [512, 512]}] * 50}
+
+
+class TestBlobCompressor(unittest.TestCase):
+    def test_round_trip_every_codec(self):
+        encoded = encode_lcb(REPETITIVE)
+        for codec in COMPRESSION_CODECS:
+            for level in (None, 1, 9):
+                with self.subTest(codec=codec, level=level):
+                    stored = BlobCompressor(codec, level).pack(encoded)
+                    self.assertTrue(is_compressed(stored))
+                    self.assertLess(len(stored), len(encoded))
+                    self.assertEqual(unpack_blob(stored), encoded)
+                    self.assertEqual(blob_size(stored), len(encoded))
+                    self.assertEqual(blob_lead_byte(stored), encoded[0])
+
+    def test_only_if_smaller(self):
+        compressor = BlobCompressor(min_size=0)
+        incompressible = encode_lcb(os.urandom(256))
+        self.assertIs(compressor.pack(incompressible), incompressible)
+        tiny = encode_lcb(1)
+        self.assertIs(compressor.pack(tiny), tiny)
+        self.assertEqual(compressor.stats()['compressed'], 0)
+        self.assertEqual(compressor.stats()['skipped'], 2)
+
+    def test_min_size(self):
+        encoded = encode_lcb("a" * 100)
+        self.assertIs(BlobCompressor(min_size=1000).pack(encoded), encoded)
+        self.assertTrue(is_compressed(BlobCompressor(min_size=10).pack(encoded)))
+
+    def test_invalid_settings(self):
+        with self.assertRaises(ValueError):
+            BlobCompressor('zstd')
+        with self.assertRaises(ValueError):
+            BlobCompressor('bz2', 0)
+        with self.assertRaises(ValueError):
+            BlobCompressor('zlib', 10)
+
+    def test_corrupt_header(self):
+        stored = BlobCompressor().pack(encode_lcb(REPETITIVE))
+        with self.assertRaises(LCDecodeError):
+            unpack_blob(b"\x8f" + stored[1:])
+        with self.assertRaises(LCDecodeError):
+            unpack_blob(stored[:2] + b"\x01" + stored[3:])
+
+
+class CompressionTests:
+    def make_store(self):
+        return CASStore()
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        self.cas = self.make_store()
+        self.cas.compression = BlobCompressor('zlib')
+
+    def tearDown(self):
+        if hasattr(self.cas, 'close'):
+            self.cas.close()
+        self._tmp.cleanup()
+
+    def test_handles_unchanged(self):
+        values = [REPETITIVE, "x" * 500, 42, b"\x00" * 300]
+        handles = [self.cas.store(v) for v in values]
+        self.assertEqual(handles, [CASStore().store(v) for v in values])
+        self.assertEqual([self.cas.retrieve(h) for h in handles], values)
+        self.assertEqual(self.cas.retrieve_many(handles), values)
+        self.assertEqual(self.cas.compression.compressed, 3)
+
+    def test_blob_size(self):
+        h = self.cas.store(REPETITIVE)
+        self.assertTrue(self.cas.exists(h))
+        self.assertEqual(self.cas.blob_size(h), len(encode_lcb(REPETITIVE)))
+        self.assertTrue(is_compressed(self.cas._get_stored(h)))
+        with self.assertRaises(HandleNotFoundError):
+            self.cas.blob_size("&h_map_" + "0" * 64)
+
+    def test_readable_without_compression(self):
+        h = self.cas.store(REPETITIVE)
+        self.cas.compression = None
+        self.assertEqual(self.cas.retrieve(h), REPETITIVE)
+        plain = self.cas.store("y" * 500)
+        self.assertFalse(is_compressed(self.cas._get_stored(plain)))
+
+    def test_store_many_and_snapshot(self):
+        handles = self.cas.store_many([{"id": i, "pad": "z" * 200} for i in range(20)])
+        snap = self.cas.snapshot()
+        extra = self.cas.store(REPETITIVE)
+        self.cas.restore(snap)
+        self.assertFalse(self.cas.exists(extra))
+        self.assertEqual(self.cas.retrieve(handles[7]), {"id": 7, "pad": "z" * 200})
+        self.assertEqual(snap[handles[7]], encode_lcb({"id": 7, "pad": "z" * 200}))
+
+
+class TestMemoryCompression(CompressionTests, unittest.TestCase):
+    pass
+
+
+class TestConcurrentCompression(CompressionTests, unittest.TestCase):
+    def make_store(self):
+        return ConcurrentCASStore(stripes=4)
+
+
+class TestFileCompression(CompressionTests, unittest.TestCase):
+    def make_store(self):
+        return FileCASStore(self.root, verify=True)
+
+    def test_reopen(self):
+        h = self.cas.store(REPETITIVE)
+        reopened = FileCASStore(self.root, verify=True)
+        self.assertEqual(reopened.retrieve(h), REPETITIVE)
+        self.assertIn(h, reopened._iter_handles())
+
+
+class TestSQLiteCompression(CompressionTests, unittest.TestCase):
+    def make_store(self):
+        return SQLiteCASStore(os.path.join(self.root, "cas.sqlite"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,236 @@
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from hlx_runtime.cas import CASStore, ConcurrentCASStore, FileCASStore, DecodedValueCache
+from hlx_runtime.cas_sqlite import SQLiteCASStore
+from hlx_runtime.cas_pack import PackCASStore
+from hlx_runtime.cas_gc import (
+    CASCollector, collect_garbage, iter_handle_refs, handles_in, state_table_roots,
+)
+from hlx_runtime.lc_codec import encode_lcb, LCDecodeError
+from hlx_runtime.tables import StateTable
+from hlx_runtime.ls_ops import transaction
+
+
+class TestHandleRefScan(unittest.TestCase):
+    def test_matches_decoded_handles(self):
+        a = "&h_int_" + "1" * 64
+        b = "&h_map_" + "2" * 64
+        values = [
+            a,
+            [1, -300, 2.5, None, True, False, a, b"&h_not_a_ref", "plain"],
+            {"&h_key_is_not_a_ref": 1, "nested": {"list": [[b], {"x": a}]}, "f": -0.5},
+            {"big": 10 ** 30, "neg": -(10 ** 30), "text": "é" * 200},
+            [],
+            {},
+        ]
+        for value in values:
+            self.assertEqual(set(iter_handle_refs(encode_lcb(value))), handles_in(value))
+
+    def test_truncated(self):
+        data = encode_lcb({"ref": "&h_str_" + "3" * 64})
+        with self.assertRaises(LCDecodeError):
+            list(iter_handle_refs(data[:-10]))
+
+
+class GCTests:
+    def make_store(self):
+        return CASStore()
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        self.cas = self.make_store()
+
+    def tearDown(self):
+        if hasattr(self.cas, 'close'):
+            self.cas.close()
+        self._tmp.cleanup()
+
+    def build(self):
+        cas = self.cas
+        leaf = cas.store(b"leaf" * 100)
+        mid = cas.store({"child": leaf, "n": 1})
+        top = cas.store([mid, "text", mid])
+        garbage_leaf = cas.store("unreachable leaf")
+        garbage = cas.store({"child": garbage_leaf, "also": leaf})
+        return top, [top, mid, leaf], [garbage, garbage_leaf]
+
+    def test_collect(self):
+        root, live, dead = self.build()
+        stats = collect_garbage(self.cas, [root])
+        self.assertEqual(stats['freed'], 2)
+        self.assertEqual(stats['scanned'], 5)
+        for h in live:
+            self.assertTrue(self.cas.exists(h))
+        for h in dead:
+            self.assertFalse(self.cas.exists(h))
+        self.assertEqual(len(self.cas), 3)
+
+    def test_no_roots_frees_everything(self):
+        self.build()
+        collect_garbage(self.cas, [])
+        self.assertEqual(len(self.cas), 0)
+
+    def test_missing_root_ignored(self):
+        root, live, _ = self.build()
+        collect_garbage(self.cas, [root, "&h_map_" + "f" * 64])
+        self.assertEqual(len(self.cas), len(live))
+
+    def test_incremental_with_writes(self):
+        root, live, (garbage, garbage_leaf) = self.build()
+        gc = CASCollector(self.cas, [root])
+        self.assertFalse(gc.step(0))
+        self.assertTrue(gc.running)
+        # Mid-cycle: a new value referencing unrooted content keeps it alive
+        new = self.cas.store({"keeps": garbage_leaf})
+        while not gc.step(0):
+            pass
+        self.assertFalse(gc.running)
+        self.assertTrue(self.cas.exists(new))
+        self.assertTrue(self.cas.exists(garbage_leaf))
+        self.assertFalse(self.cas.exists(garbage))
+
+    def test_incremental_dedup_survives(self):
+        root, _, (garbage, _) = self.build()
+        gc = CASCollector(self.cas, [root])
+        gc.step(0)
+        self.cas.store("unreachable leaf")
+        gc.collect()
+        self.assertTrue(self.cas.exists(self.cas.store("unreachable leaf")))
+        self.assertFalse(self.cas.exists(garbage))
+
+    def test_concurrent_writer(self):
+        root, live, _ = self.build()
+        gc = CASCollector(self.cas, [root])
+        done = threading.Event()
+        errors = []
+
+        def write():
+            try:
+                for i in range(500):
+                    self.cas.store({"w": i, "ref": root})
+                    self.cas.store_many([[i, root], f"s{i}"])
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                done.set()
+
+        def collect():
+            try:
+                while not done.is_set():
+                    gc.step(0.001)
+                gc.collect()
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=f, daemon=True) for f in (write, collect)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(30)
+        if any(t.is_alive() for t in threads):
+            self.cas = None  # close() would block on the deadlocked lock
+            self.fail("writer and collector deadlocked")
+        self.assertEqual(errors, [])
+        self.assertGreater(gc.cycles, 0)
+        gc.collect()  # Writes made during the last cycle survive it
+        self.assertEqual(len(self.cas), len(live))
+
+    def test_swept_blob_kept_in_snapshot(self):
+        h = self.cas.store({"a": 1})
+        snap = self.cas.snapshot()
+        CASCollector(self.cas, roots=[]).collect()
+        self.assertFalse(self.cas.exists(h))
+        self.assertIn(h, snap)
+        self.assertEqual(len(snap), 1)
+        self.assertEqual(dict(snap), {h: encode_lcb({"a": 1})})
+        self.cas.restore(snap)
+        self.assertEqual(self.cas.retrieve(h), {"a": 1})
+
+    def test_gc_inside_transaction(self):
+        h = self.cas.store("before")
+
+        def fail():
+            self.cas.store("inside")
+            collect_garbage(self.cas, [])
+            raise RuntimeError("boom")
+
+        with self.assertRaises(RuntimeError):
+            transaction(fail, self.cas)
+        self.assertEqual(self.cas.retrieve(h), "before")
+        self.assertEqual(len(self.cas), 1)
+
+    def test_next_cycle_collects(self):
+        root, _, _ = self.build()
+        gc = CASCollector(self.cas, [root])
+        gc.collect()
+        gc.collect(roots=[])
+        self.assertEqual(gc.cycles, 2)
+        self.assertEqual(len(self.cas), 0)
+
+
+class TestMemoryGC(GCTests, unittest.TestCase):
+    def test_live_snapshot_writes_kept(self):
+        root, _, (garbage, _) = self.build()
+        snap = self.cas.snapshot()
+        pending = self.cas.store("written in transaction")
+        collect_garbage(self.cas, [root])
+        self.assertTrue(self.cas.exists(pending))
+        self.assertFalse(self.cas.exists(garbage))
+        self.cas.restore(snap)
+        self.assertFalse(self.cas.exists(pending))
+        self.assertTrue(self.cas.exists(garbage))
+        self.assertEqual(len(self.cas), 5)
+
+    def test_decoded_cache_dropped(self):
+        self.cas.decoded_cache = DecodedValueCache()
+        root, _, (garbage, _) = self.build()
+        self.cas.retrieve(garbage)
+        collect_garbage(self.cas, [root])
+        self.assertEqual(self.cas.decoded_cache.get(garbage), (False, None))
+
+
+class TestConcurrentGC(GCTests, unittest.TestCase):
+    def make_store(self):
+        return ConcurrentCASStore(stripes=4)
+
+
+class TestFileGC(GCTests, unittest.TestCase):
+    def make_store(self):
+        return FileCASStore(self.root)
+
+
+class TestSQLiteGC(GCTests, unittest.TestCase):
+    def make_store(self):
+        return SQLiteCASStore(os.path.join(self.root, "cas.sqlite"))
+
+
+class TestPackGC(GCTests, unittest.TestCase):
+    def make_store(self):
+        return PackCASStore(self.root, pack_size=1024)
+
+
+class TestRoots(unittest.TestCase):
+    def test_state_table_roots(self):
+        cas = CASStore()
+        kept = cas.store("referenced")
+        table = StateTable()
+        table.set("&h_map_" + "a" * 64, {"ref": kept})
+        table.set("plain_key", [kept])
+        dropped = cas.store("dropped")
+        roots = state_table_roots(table)
+        self.assertEqual(roots, {"&h_map_" + "a" * 64, kept})
+        collect_garbage(cas, roots)
+        self.assertTrue(cas.exists(kept))
+        self.assertFalse(cas.exists(dropped))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from hlx_runtime.cas import CASStore, ConcurrentCASStore, FileCASStore
+from hlx_runtime.cas_sqlite import SQLiteCASStore
+from hlx_runtime.cas_pack import PackCASStore
+from hlx_runtime.cas_index import HandleIndex
+from hlx_runtime.cas_gc import collect_garbage
+from hlx_runtime.errors import HandleError, HandleNotFoundError, E_HANDLE_COLLISION, E_HANDLE_FORMAT
+
+
+def digest(n):
+    return f"{n:04x}".ljust(64, "0")
+
+
+class TestHandleIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = HandleIndex()
+        for n in (0x3fa1, 0x3fa2, 0x3fb0, 0x1234):
+            self.index.add(f"&h_map_{digest(n)}")
+        self.index.add(f"&h_list_{digest(0x3fa1)}")
+
+    def test_by_type(self):
+        maps = list(self.index.iter_by_type('map'))
+        self.assertEqual(len(maps), 4)
+        self.assertEqual(maps, sorted(maps))
+        self.assertEqual(self.index.count_by_type(), {'list': 1, 'map': 4})
+        self.assertEqual(list(self.index.iter_by_type('float')), [])
+
+    def test_prefix(self):
+        self.assertEqual(self.index.resolve_prefix("&h_map_3fb"), f"&h_map_{digest(0x3fb0)}")
+        self.assertEqual(len(self.index.match_prefix("&h_map_3fa")), 2)
+        self.assertEqual(len(self.index.match_prefix("3fa")), 3)  # Every type
+        self.assertEqual(self.index.resolve_prefix("&h_list_3FA"), f"&h_list_{digest(0x3fa1)}")
+        with self.assertRaises(HandleError) as ctx:
+            self.index.resolve_prefix("&h_3fa1")
+        self.assertEqual(ctx.exception.code, E_HANDLE_COLLISION)
+        with self.assertRaises(HandleNotFoundError):
+            self.index.resolve_prefix("&h_map_ffff")
+        for bad in ("&h_map_", "&h_map_xyz", "z" * 3, "a" * 65):
+            with self.assertRaises(HandleError) as ctx:
+                self.index.match_prefix(bad)
+            self.assertEqual(ctx.exception.code, E_HANDLE_FORMAT)
+
+    def test_add_discard(self):
+        handle = f"&h_map_{digest(0x3fa1)}"
+        self.index.discard(handle)
+        self.assertNotIn(handle, self.index)
+        self.assertEqual(self.index.count_by_type()['map'], 3)
+        self.index.add(handle)
+        self.index.add(handle)
+        self.assertIn(handle, self.index)
+        self.assertEqual(list(self.index.iter_by_type('map')).count(handle), 1)
+        self.index.add("&h_malformed")
+        self.assertEqual(len(self.index), 5)
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "handles")
+            self.index.save(path, stamp=5)
+            loaded = HandleIndex.load(path, stamp=5)
+            self.assertEqual(loaded.count_by_type(), self.index.count_by_type())
+            self.assertEqual(list(loaded.iter_by_type('map')), list(self.index.iter_by_type('map')))
+            self.assertIsNone(HandleIndex.load(path, stamp=4))
+            with open(path, 'r+b') as f:
+                f.truncate(os.path.getsize(path) - 1)
+            self.assertIsNone(HandleIndex.load(path))
+            self.assertIsNone(HandleIndex.load(os.path.join(root, "absent")))
+
+
+class IndexTests:
+    def make_store(self):
+        return CASStore()
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        self.cas = self.make_store()
+        self.maps = self.cas.store_many([{"i": i} for i in range(30)])
+        self.lists = self.cas.store_many([[i] for i in range(10)])
+        self.ints = self.cas.store_many(list(range(5)))
+
+    def tearDown(self):
+        if hasattr(self.cas, 'close'):
+            self.cas.close()
+        self._tmp.cleanup()
+
+    def test_queries(self):
+        self.assertEqual(self.cas.count_by_type(), {'int': 5, 'list': 10, 'map': 30})
+        self.assertEqual(list(self.cas.iter_by_type('map')), sorted(self.maps))
+        h = self.lists[3]
+        self.assertEqual(self.cas.resolve_prefix(h[:len("&h_list_") + 12]), h)
+        self.assertEqual(self.cas.resolve_prefix(h[-64:-52]), h)
+
+    def test_no_scan_after_build(self):
+        self.cas.enable_index()
+        self.cas._iter_handles = None
+        h = self.cas.store({"new": True})
+        self.assertIn(h, list(self.cas.iter_by_type('map')))
+        self.assertEqual(self.cas.count_by_type()['map'], 31)
+        self.assertEqual(self.cas.resolve_prefix(h[:20]), h)
+        del self.cas._iter_handles
+
+    def test_rollback_and_gc(self):
+        self.cas.enable_index()
+        snap = self.cas.snapshot()
+        h = self.cas.store({"rolled": "back"})
+        self.cas.restore(snap)
+        with self.assertRaises(HandleNotFoundError):
+            self.cas.resolve_prefix(h[:24])
+        del snap
+        collect_garbage(self.cas, self.maps)
+        self.assertEqual(self.cas.count_by_type(), {'map': 30})
+
+    def test_restore_rebuilds(self):
+        index = self.cas.enable_index()
+        snap = dict(self.cas.snapshot())
+        self.cas.store("after snapshot")
+        self.cas.restore(snap)
+        self.assertIsNot(self.cas.index, index)
+        self.assertNotIn('str', self.cas.count_by_type())
+
+
+class TestMemoryIndex(IndexTests, unittest.TestCase):
+    pass
+
+
+class TestConcurrentIndex(IndexTests, unittest.TestCase):
+    def make_store(self):
+        return ConcurrentCASStore(stripes=4)
+
+
+class PersistentIndexTests(IndexTests):
+    def test_saved_on_close(self):
+        self.cas.enable_index()
+        h = self.cas.store("saved")
+        path = self.cas._handles_path
+        self.cas.close()
+        self.cas = self.make_store()
+        self.assertTrue(os.path.exists(path))
+        self.cas._build_index = None  # Must be loaded, not rebuilt
+        self.assertEqual(self.cas.resolve_prefix(h[:16]), h)
+        self.assertFalse(os.path.exists(path))
+
+    def test_stale_file_rebuilt(self):
+        self.cas.enable_index()
+        self.cas.close()
+        self.cas = self.make_store()
+        h = self.cas.store("written without the index")
+        self.assertEqual(self.cas.count_by_type()['str'], 1)
+        self.assertEqual(self.cas.resolve_prefix(h[-64:-50]), h)
+
+
+class TestFileIndex(PersistentIndexTests, unittest.TestCase):
+    def make_store(self):
+        return FileCASStore(self.root)
+
+
+class TestSQLiteIndex(PersistentIndexTests, unittest.TestCase):
+    def make_store(self):
+        return SQLiteCASStore(os.path.join(self.root, "cas.sqlite"))
+
+
+class TestPackIndex(PersistentIndexTests, unittest.TestCase):
+    def make_store(self):
+        return PackCASStore(self.root, pack_size=4096)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,242 @@
+
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from hlx_runtime.cas import CASStore
+from hlx_runtime.cas_pack import PackCASStore, PACK_MAGIC
+from hlx_runtime.cas_compress import BlobCompressor
+from hlx_runtime.errors import HandleNotFoundError
+from hlx_runtime.lc_codec import encode_lcb, LCDecodeError
+from hlx_runtime.ls_ops import transaction
+
+
+class TestPackCAS(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def packs(self):
+        return sorted(n for n in os.listdir(self.root) if n.endswith('.pack'))
+
+    def test_store_retrieve(self):
+        with PackCASStore(self.root) as cas:
+            values = [None, 123, "text", b"raw", [1, 2], {"a": 1}]
+            handles = [cas.store(v) for v in values]
+            self.assertEqual(handles, [CASStore().store(v) for v in values])
+            for h, v in zip(handles, values):
+                self.assertTrue(cas.exists(h))
+                self.assertEqual(cas.retrieve(h), v)
+            self.assertEqual(len(cas), len(values))
+            self.assertEqual(sorted(cas._iter_handles()), sorted(handles))
+
+    def test_missing(self):
+        with PackCASStore(self.root) as cas:
+            cas.store("present")
+            for handle in ("&h_missing", "&h_str_" + "0" * 64):
+                self.assertFalse(cas.exists(handle))
+                with self.assertRaises(HandleNotFoundError):
+                    cas.retrieve(handle)
+
+    def test_persists_and_seals(self):
+        with PackCASStore(self.root, pack_size=4096) as cas:
+            handles = cas.store_many([{"row": i, "pad": "x" * 100} for i in range(200)])
+            self.assertGreater(len(cas._packs), 1)
+        self.assertTrue(all(os.path.exists(os.path.join(self.root, p[:-5] + ".idx"))
+                            for p in self.packs()))
+        with PackCASStore(self.root) as cas:
+            self.assertEqual(len(cas), 200)
+            self.assertEqual(cas.retrieve(handles[150]), {"row": 150, "pad": "x" * 100})
+            self.assertEqual(cas.retrieve_many(handles[:5]),
+                             [{"row": i, "pad": "x" * 100} for i in range(5)])
+
+    def test_fanout_lookup(self):
+        with PackCASStore(self.root) as cas:
+            handles = cas.store_many(list(range(2000)))
+        with PackCASStore(self.root) as cas:
+            pack = cas._packs[0]
+            self.assertEqual(pack.count, 2000)
+            for i in (0, 1, 999, 1999):
+                self.assertEqual(cas.retrieve(handles[i]), i)
+            for h in handles:
+                self.assertIsNotNone(pack.find(bytes.fromhex(h[-64:])))
+            self.assertIsNone(pack.find(b"\xff" * 32))
+
+    def test_resume_torn_active_pack(self):
+        cas = PackCASStore(self.root)
+        h1 = cas.store("kept")
+        h2 = cas.store("torn")
+        cas.flush()
+        path = os.path.join(self.root, self.packs()[0])
+        os.close(cas._active_fd)  # Simulate a crash: no index written
+        cas._active_fd = None
+        os.truncate(path, os.path.getsize(path) - 2)
+        with PackCASStore(self.root) as reopened:
+            self.assertEqual(reopened.retrieve(h1), "kept")
+            self.assertFalse(reopened.exists(h2))
+            h3 = reopened.store("after")
+        with PackCASStore(self.root) as reopened:
+            self.assertEqual(reopened.retrieve(h3), "after")
+
+    def test_read_raw_zero_copy(self):
+        with PackCASStore(self.root) as cas:
+            h = cas.store({"mapped": True})
+            self.assertEqual(bytes(cas.read_raw(h)), encode_lcb({"mapped": True}))
+            cas._seal_active()
+            view = cas.read_raw(h)
+            self.assertIs(view.obj, cas._packs[0].data)
+            self.assertEqual(bytes(view), encode_lcb({"mapped": True}))
+            view.release()
+            # retrieve() decodes straight from the mapping
+            with mock.patch.object(cas, '_get_stored', side_effect=AssertionError):
+                self.assertEqual(cas.retrieve(h), {"mapped": True})
+
+    def test_delete_and_repack(self):
+        with PackCASStore(self.root, pack_size=2048) as cas:
+            handles = cas.store_many([{"n": i, "pad": "y" * 50} for i in range(100)])
+            for h in handles[::2]:
+                cas._delete_blob(h)
+            self.assertEqual(len(cas), 50)
+            self.assertFalse(cas.exists(handles[0]))
+            before = len(self.packs())
+            stats = cas.repack()
+            self.assertEqual(stats['blobs'], 50)
+            self.assertEqual(stats['packs_before'], before)
+            self.assertLess(stats['bytes_after'], stats['bytes_before'])
+            self.assertFalse(os.path.exists(os.path.join(self.root, "tombstones")))
+            self.assertEqual(len(self.packs()), stats['packs_after'])
+            self.assertEqual(cas.retrieve(handles[1]), {"n": 1, "pad": "y" * 50})
+            self.assertFalse(cas.exists(handles[2]))
+            cas.store("after repack")
+        with PackCASStore(self.root) as cas:
+            self.assertEqual(len(cas), 51)
+            self.assertEqual(cas.retrieve(handles[99]), {"n": 99, "pad": "y" * 50})
+
+    def test_tombstones_persist_and_restore(self):
+        with PackCASStore(self.root) as cas:
+            h = cas.store("deleted")
+            cas._delete_blob(h)
+        with PackCASStore(self.root) as cas:
+            self.assertFalse(cas.exists(h))
+            self.assertEqual(cas.store("deleted"), h)
+            self.assertEqual(cas.retrieve(h), "deleted")
+        with PackCASStore(self.root) as cas:
+            self.assertTrue(cas.exists(h))
+
+    def test_snapshot_restore_transaction(self):
+        with PackCASStore(self.root) as cas:
+            h1 = cas.store("one")
+            snap = cas.snapshot()
+            h2 = cas.store("two")
+            cas.restore(snap)
+            self.assertTrue(cas.exists(h1))
+            self.assertFalse(cas.exists(h2))
+
+            def fail():
+                cas.store("three")
+                raise RuntimeError("boom")
+
+            with self.assertRaises(RuntimeError):
+                transaction(fail, cas)
+            self.assertEqual(len(cas), 1)
+
+    def test_compression(self):
+        with PackCASStore(self.root) as cas:
+            cas.compression = BlobCompressor()
+            value = {"rows": ["same text"] * 200}
+            h = cas.store(value)
+            self.assertLess(len(cas._get_stored(h)), len(encode_lcb(value)))
+            cas.compression = None
+        with PackCASStore(self.root) as cas:
+            self.assertEqual(cas.retrieve(h), value)
+            self.assertEqual(bytes(cas.read_raw(h)), encode_lcb(value))
+            self.assertIn(h, cas._iter_handles())
+
+    def test_threads(self):
+        with PackCASStore(self.root, pack_size=8192) as cas:
+            results = {}
+
+            def worker(t):
+                results[t] = [cas.store({"t": t, "i": i}) for i in range(100)]
+
+            threads = [threading.Thread(target=worker, args=(t,)) for t in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            self.assertEqual(len(cas), 400)
+            for t, handles in results.items():
+                self.assertEqual(cas.retrieve(handles[-1]), {"t": t, "i": 99})
+
+    def _read_concurrently(self, cas, handles, values, write):
+        """Run `write` while reader threads retrieve the last of `handles`; return reader errors."""
+        errors = []
+        done = threading.Event()
+
+        def reader():
+            try:
+                while not done.is_set():
+                    for h, v in list(zip(handles, values))[-8:]:
+                        self.assertEqual(cas.retrieve(h), v)
+                        self.assertEqual(bytes(cas.read_raw(h)), encode_lcb(v))
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=reader) for _ in range(4)]
+        for t in threads:
+            t.start()
+        try:
+            write()
+        finally:
+            done.set()
+            for t in threads:
+                t.join()
+        return errors
+
+    def test_reads_during_seal(self):
+        with PackCASStore(self.root, pack_size=1024, fsync=False) as cas:
+            values = [{"w": -1}]
+            handles = cas.store_many(values)
+
+            def write():
+                # Readers chase the newest blobs, which are in the active pack
+                for i in range(400):
+                    value = {"w": i, "pad": "z" * 40}
+                    handles.append(cas.store(value))
+                    values.append(value)
+
+            self.assertEqual(self._read_concurrently(cas, handles, values, write), [])
+            self.assertGreater(len(self.packs()), 5)
+            self.assertEqual(cas.retrieve_many(handles), values)
+
+    def test_reads_during_repack(self):
+        with PackCASStore(self.root, pack_size=1024, fsync=False) as cas:
+            values = [{"r": i, "pad": "q" * 30} for i in range(60)]
+            handles = cas.store_many(values)
+            cas.flush()
+
+            def write():
+                for _ in range(20):
+                    cas.repack()
+
+            self.assertEqual(self._read_concurrently(cas, handles, values, write), [])
+            self.assertEqual(cas._retired, [])
+            self.assertEqual(cas.retrieve_many(handles), values)
+
+    def test_not_a_pack(self):
+        with open(os.path.join(self.root, "pack-000001.pack"), 'wb') as f:
+            f.write(b"garbage!" + PACK_MAGIC)
+        with self.assertRaises(LCDecodeError):
+            PackCASStore(self.root)
+
+
+if __name__ == '__main__':
+    unittest.main()
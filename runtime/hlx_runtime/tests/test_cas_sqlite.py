@@ -0,0 +1,113 @@
+
+import unittest
+import sys
+import os
+import tempfile
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from hlx_runtime.cas import CASStore
+from hlx_runtime.cas_sqlite import SQLiteCASStore
+from hlx_runtime.errors import HandleNotFoundError
+from hlx_runtime.ls_ops import LSContext, transaction
+
+class TestSQLiteCAS(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "cas.sqlite")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_store_retrieve(self):
+        with SQLiteCASStore(self.path) as cas:
+            values = [None, 123, "text", b"raw", [1, 2], {"a": 1}]
+            handles = [cas.store(v) for v in values]
+            self.assertEqual(handles, [CASStore().store(v) for v in values])
+            for h, v in zip(handles, values):
+                self.assertTrue(cas.exists(h))
+                self.assertEqual(cas.retrieve(h), v)
+
+    def test_persists(self):
+        with SQLiteCASStore(self.path) as cas:
+            h = cas.store({"persist": True})
+        with SQLiteCASStore(self.path) as cas:
+            self.assertEqual(cas.retrieve(h), {"persist": True})
+            self.assertEqual(len(cas), 1)
+
+    def test_missing(self):
+        with SQLiteCASStore(self.path) as cas:
+            with self.assertRaises(HandleNotFoundError):
+                cas.retrieve("&h_missing")
+            self.assertFalse(cas.exists("&h_missing"))
+
+    def test_batch_apis(self):
+        with SQLiteCASStore(self.path, batch_size=7) as cas:
+            values = [{"i": i} for i in range(1200)]
+            handles = cas.store_many(values)
+            cas.store("buffered")
+            self.assertEqual(cas.retrieve_many(handles), values)
+            self.assertEqual(cas.retrieve_many([handles[3], handles[3]]), [values[3]] * 2)
+            with self.assertRaises(HandleNotFoundError):
+                cas.retrieve_many([handles[0], "&h_missing"])
+
+    def test_batch_dedup(self):
+        values = [{"i": i} for i in range(5)]
+        batch = values[2:] + [values[0], "new", "new"]
+        memory = CASStore()
+        memory.store_many(values[:3])
+        memory.store_many(batch)
+        with SQLiteCASStore(self.path) as cas:
+            cas.store_many(values[:3])
+            added = []
+            cas._blob_added = added.append
+            handles = cas.store_many(batch)
+            self.assertEqual(cas.dedup_hits, memory.dedup_hits)
+            self.assertEqual(sorted(added), sorted({handles[1], handles[2], handles[4]}))
+            self.assertEqual(len(cas), 6)
+
+    def test_snapshot_restore_transaction(self):
+        with SQLiteCASStore(self.path) as cas:
+            h1 = cas.store("one")
+            snap = cas.snapshot()
+            h2 = cas.store("two")
+            cas.restore(snap)
+            self.assertTrue(cas.exists(h1))
+            self.assertFalse(cas.exists(h2))
+
+            def fail():
+                cas.store("three")
+                raise RuntimeError("boom")
+
+            with self.assertRaises(RuntimeError):
+                transaction(fail, cas)
+            self.assertEqual(len(cas), 1)
+
+    def test_threaded_readers(self):
+        with SQLiteCASStore(self.path) as cas:
+            handles = cas.store_many(list(range(100)))
+            errors = []
+
+            def read():
+                try:
+                    for i, h in enumerate(handles):
+                        assert cas.retrieve(h) == i
+                except Exception as e:  # pragma: no cover - reported below
+                    errors.append(e)
+
+            threads = [threading.Thread(target=read) for _ in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            self.assertEqual(errors, [])
+
+    def test_ls_context(self):
+        with SQLiteCASStore(self.path) as cas:
+            ctx = LSContext(cas)
+            handle, _ = ctx.collapse([1, 2, 3])
+            self.assertEqual(ctx.resolve(handle)[0], [1, 2, 3])
+
+if __name__ == '__main__':
+    unittest.main()
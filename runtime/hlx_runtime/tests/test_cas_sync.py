@@ -0,0 +1,154 @@
+
+import os
+import socket
+import sys
+import tempfile
+import threading
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from hlx_runtime.cas import CASStore, ConcurrentCASStore
+from hlx_runtime.cas_sqlite import SQLiteCASStore
+from hlx_runtime.cas_pack import PackCASStore
+from hlx_runtime.cas_sync import serve, sync, sync_unix, make_unix_server, _store_received, _Channel
+from hlx_runtime.errors import HLXError, IntegrityError
+from hlx_runtime.lc_codec import encode_lcb
+
+
+def run_sync(client, server, **kwargs):
+    """sync() over a socketpair, with serve() on a thread."""
+    a, b = socket.socketpair()
+    with a, b, a.makefile('rb') as ar, a.makefile('wb') as aw, \
+            b.makefile('rb') as br, b.makefile('wb') as bw:
+        thread = threading.Thread(target=serve, args=(server, br, bw))
+        thread.start()
+        try:
+            return sync(client, ar, aw, **kwargs)
+        finally:
+            thread.join()
+
+
+def contents(cas):
+    return set(cas._iter_handles())
+
+
+class TestSync(unittest.TestCase):
+    def setUp(self):
+        self.client = CASStore()
+        self.server = CASStore()
+        shared = [{"shared": i} for i in range(2000)]
+        self.client.store_many(shared)
+        self.server.store_many(shared)
+        self.client_only = [self.client.store({"client": i}) for i in range(5)]
+        self.server_only = [self.server.store({"server": i, "pad": "z" * 100}) for i in range(7)]
+
+    def test_converges(self):
+        stats = run_sync(self.client, self.server)
+        self.assertEqual(stats['want'], 7)
+        self.assertEqual(stats['have'], 5)
+        self.assertEqual(contents(self.client), contents(self.server))
+        self.assertEqual(len(self.client), 2012)
+        self.assertEqual(self.client.retrieve(self.server_only[3]), {"server": 3, "pad": "z" * 100})
+        self.assertEqual(self.server.retrieve(self.client_only[0]), {"client": 0})
+
+        # Far less on the wire than exchanging handle lists
+        listing = sum(len(h) for h in contents(self.client))
+        self.assertLess(stats['sent_bytes'] + stats['received_bytes'], listing / 4)
+
+    def test_in_sync(self):
+        run_sync(self.client, self.server)
+        stats = run_sync(self.client, self.server)
+        self.assertEqual((stats['want'], stats['have'], stats['rounds']), (0, 0, 1))
+
+    def test_dry_run(self):
+        stats = run_sync(self.client, self.server, dry_run=True)
+        self.assertEqual(stats['want'], 7)
+        self.assertEqual(stats['have'], 5)
+        self.assertEqual(stats['want_bytes'],
+                         sum(len(encode_lcb({"server": i, "pad": "z" * 100})) for i in range(7)))
+        self.assertEqual(stats['have_bytes'], sum(len(encode_lcb({"client": i})) for i in range(5)))
+        self.assertEqual(len(self.client), 2005)
+        self.assertEqual(len(self.server), 2007)
+
+    def test_pull_only(self):
+        stats = run_sync(self.client, self.server, push=False)
+        self.assertEqual(stats['have'], 0)
+        self.assertEqual(len(self.client), 2012)
+        self.assertEqual(len(self.server), 2007)
+
+    def test_empty_client(self):
+        empty = CASStore()
+        stats = run_sync(empty, self.server, push=False)
+        self.assertEqual(stats['want'], 2007)
+        self.assertEqual(contents(empty), contents(self.server))
+
+    def test_tampered_blob(self):
+        h = self.client_only[0]
+        with self.assertRaises(IntegrityError):
+            _store_received(self.server, [[h, encode_lcb({"client": 99})]])
+        self.assertFalse(self.server.exists(h))
+
+    def test_server_error(self):
+        a, b = socket.socketpair()
+        with a, b, a.makefile('rb') as ar, a.makefile('wb') as aw, \
+                b.makefile('rb') as br, b.makefile('wb') as bw:
+            thread = threading.Thread(target=serve, args=(self.server, br, bw))
+            thread.start()
+            channel = _Channel(ar, aw)
+            with self.assertRaises(HLXError):
+                channel.call({"op": "bogus"})
+            channel.send({"op": "done"})
+            thread.join()
+
+
+class TestSyncTransports(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_unix_socket(self):
+        server_cas = ConcurrentCASStore()
+        server_cas.store_many(range(300))
+        path = os.path.join(self.root, "sync.sock")
+        server = make_unix_server(server_cas, path)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            client = CASStore()
+            client.store_many(range(250, 400))
+            stats = sync_unix(client, path)
+            self.assertEqual((stats['want'], stats['have']), (250, 100))
+            self.assertEqual(len(client), 400)
+            stats = sync_unix(client, path)
+            self.assertEqual((stats['want'], stats['have']), (0, 0))
+        finally:
+            server.shutdown()
+            server.server_close()
+            thread.join()
+        self.assertEqual(len(server_cas), 400)
+
+    def test_pipes_between_backends(self):
+        client = SQLiteCASStore(os.path.join(self.root, "client.sqlite"))
+        server = PackCASStore(os.path.join(self.root, "packs"))
+        client.store_many([{"a": i} for i in range(100)])
+        server.store_many([{"a": i} for i in range(50, 150)])
+        up_r, up_w = os.pipe()
+        down_r, down_w = os.pipe()
+        with open(up_r, 'rb') as sr, open(down_w, 'wb') as sw, \
+                open(down_r, 'rb') as cr, open(up_w, 'wb') as cw:
+            thread = threading.Thread(target=serve, args=(server, sr, sw))
+            thread.start()
+            stats = sync(client, cr, cw)
+            thread.join()
+        self.assertEqual((stats['want'], stats['have']), (50, 50))
+        self.assertEqual(contents(client), contents(server))
+        client.close()
+        server.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,249 @@
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from hlx_runtime.cas import CASStore, FileCASStore
+from hlx_runtime.cas_sqlite import SQLiteCASStore
+from hlx_runtime.cas_pack import PackCASStore
+from hlx_runtime.cas_tier import TieredCASStore
+from hlx_runtime.cas_gc import collect_garbage
+from hlx_runtime.errors import HandleNotFoundError
+from hlx_runtime.lc_codec import encode_lcb
+
+
+def value(i):
+    return {"id": i, "pad": "x" * 100}
+
+
+SIZE = len(encode_lcb(value(0)))
+
+
+class TierTests:
+    def make_backend(self):
+        return CASStore()
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        self.backend = self.make_backend()
+        self.tiers = []
+
+    def tearDown(self):
+        for tier in self.tiers:
+            tier.close()
+        if hasattr(self.backend, 'close'):
+            self.backend.close()
+        self._tmp.cleanup()
+
+    def tier(self, **kwargs):
+        tier = TieredCASStore(self.backend, **kwargs)
+        self.tiers.append(tier)
+        return tier
+
+    def test_read_through(self):
+        handles = self.backend.store_many([value(i) for i in range(20)])
+        tier = self.tier()
+        self.assertEqual(tier.retrieve(handles[3]), value(3))
+        self.backend._get_blob = None  # Hot handles never reach the backend
+        self.assertEqual(tier.retrieve(handles[3]), value(3))
+        self.assertEqual(tier.retrieve_many(handles[3:4]), [value(3)])
+        del self.backend._get_blob
+        self.assertEqual(tier.retrieve_many(handles), [value(i) for i in range(20)])
+        stats = tier.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (3, 20))
+        with self.assertRaises(HandleNotFoundError):
+            tier.retrieve("&h_int_" + "0" * 64)
+
+    def test_evicts_by_bytes(self):
+        tier = self.tier(memory_bytes=10 * SIZE)
+        handles = [tier.store(value(i)) for i in range(50)]
+        stats = tier.stats()
+        self.assertEqual(stats['entries'], 10)
+        self.assertEqual(stats['bytes'], 10 * SIZE)
+        self.assertEqual(stats['evictions'], 40)
+        self.assertEqual(tier.retrieve(handles[0]), value(0))  # From the backend
+        self.assertEqual(tier.stats()['misses'], 1)
+        tier.resize(memory_bytes=2 * SIZE)
+        self.assertEqual(tier.stats()['entries'], 2)
+
+    def test_write_through(self):
+        tier = self.tier()
+        h = tier.store(value(1))
+        many = tier.store_many([value(i) for i in range(2, 30)] + [value(1)])
+        self.assertTrue(self.backend.exists(h))
+        self.assertTrue(all(self.backend.exists(m) for m in many))
+        self.assertEqual(tier.dedup_hits, 1)
+        self.assertEqual(len(tier), 29)
+
+    def test_write_back(self):
+        tier = self.tier(write_back=True, flush_interval=60)
+        handles = tier.store_many([value(i) for i in range(10)])
+        self.assertFalse(any(self.backend._has_blob(h) for h in handles))
+        self.assertTrue(all(tier.exists(h) for h in handles))
+        self.assertEqual(tier.retrieve(handles[4]), value(4))
+        self.assertEqual(len(tier), 10)
+        self.assertEqual(tier.stats()['dirty'], 10)
+        tier.flush()
+        self.assertEqual(tier.stats()['dirty'], 0)
+        self.assertEqual(self.backend.retrieve_many(handles), [value(i) for i in range(10)])
+
+    def test_background_flusher(self):
+        tier = self.tier(write_back=True, flush_interval=0.01, flush_batch=4)
+        handles = [tier.store(value(i)) for i in range(25)]
+        deadline = time.monotonic() + 5
+        while tier.stats()['dirty'] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(tier.stats()['dirty'], 0)
+        self.assertGreaterEqual(tier.stats()['flushes'], 1)
+        self.assertTrue(all(self.backend._has_blob(h) for h in handles))
+
+    def test_dirty_never_evicted(self):
+        tier = self.tier(write_back=True, memory_bytes=3 * SIZE, flush_interval=60)
+        handles = [tier.store(value(i)) for i in range(3)]
+        self.assertEqual(tier.stats()['dirty'], 3)
+        # Over budget with nothing clean to evict: the writer flushes
+        handles.append(tier.store(value(3)))
+        self.assertEqual(tier.stats()['dirty'], 0)
+        self.assertLessEqual(tier.stats()['bytes'], 3 * SIZE)
+        self.assertEqual(self.backend.retrieve_many(handles), [value(i) for i in range(4)])
+
+    def test_close_flushes(self):
+        tier = TieredCASStore(self.backend, write_back=True, flush_interval=60)
+        h = tier.store(value(7))
+        tier.close()
+        self.assertEqual(self.backend.retrieve(h), value(7))
+
+    def test_pinned_survive_pressure(self):
+        root = self.backend.store({"root": True})
+        tier = self.tier(memory_bytes=5 * SIZE)
+        tier.pin([root])
+        for i in range(40):
+            tier.store(value(i))
+        self.backend._get_blob = None
+        self.assertEqual(tier.retrieve(root), {"root": True})
+        del self.backend._get_blob
+        tier.unpin([root])
+        for i in range(40, 50):
+            tier.store(value(i))
+        self.assertEqual(tier.stats()['pinned'], 0)
+        self.assertEqual(tier.stats()['entries'], 5)
+        with self.assertRaises(HandleNotFoundError):
+            tier.pin(["&h_int_" + "0" * 64])
+
+    def test_decoded_tier(self):
+        tier = self.tier(decoded_bytes=1 << 20)
+        h = tier.store(value(1))
+        tier.retrieve(h)
+        first = tier.retrieve(h)
+        first["id"] = -1  # Callers get copies
+        self.assertEqual(tier.retrieve(h), value(1))
+        self.assertEqual(tier.decoded_cache.stats()['hits'], 2)
+        tier.resize(decoded_bytes=0)
+        self.assertEqual(len(tier.decoded_cache), 0)
+
+    def test_snapshot_restore(self):
+        tier = self.tier(write_back=True, flush_interval=60)
+        keep = tier.store(value(1))
+        snap = tier.snapshot()
+        drop = tier.store(value(2))
+        tier.restore(snap)
+        self.assertTrue(tier.exists(keep))
+        self.assertFalse(tier.exists(drop))
+        tier.flush()
+        self.assertFalse(self.backend.exists(drop))
+
+    def test_gc(self):
+        tier = self.tier(write_back=True, flush_interval=60)
+        leaf = tier.store(value(1))
+        root = tier.store({"child": leaf})
+        garbage = tier.store(value(2))
+        stats = collect_garbage(tier, [root])
+        self.assertEqual(stats['freed'], 1)
+        self.assertFalse(tier.exists(garbage))
+        self.assertFalse(self.backend.exists(garbage))
+        self.assertTrue(self.backend.exists(leaf))
+
+    def test_delete_during_flush(self):
+        tier = self.tier(write_back=True, flush_interval=60)
+        h = tier.store(value(1))
+        deleter = threading.Thread(target=tier._delete_blob, args=(h,))
+        store_entries = self.backend._store_entries
+
+        def slow_write(entries):
+            # The delete lands after the batch was taken, before it is written
+            deleter.start()
+            deleter.join(0.2)
+            return store_entries(entries)
+
+        self.backend._store_entries = slow_write
+        tier.flush()
+        deleter.join()
+        del self.backend._store_entries
+        self.assertFalse(tier.exists(h))
+        self.assertFalse(self.backend.exists(h))
+
+    def test_concurrent_writers(self):
+        tier = self.tier(write_back=True, memory_bytes=20 * SIZE, flush_interval=0.005,
+                         flush_batch=16)
+
+        def worker(t):
+            for i in range(100):
+                tier.store(value(t * 1000 + i))
+                tier.retrieve(tier.store(value(i)))
+
+        threads = [threading.Thread(target=worker, args=(t,)) for t in range(1, 5)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        tier.flush()
+        self.assertEqual(len(self.backend), 500)
+
+
+class TestMemoryTier(TierTests, unittest.TestCase):
+    def test_flush_error(self):
+        tier = self.tier(write_back=True, flush_interval=60)
+        tier.store(value(1))
+
+        def fail(entries):
+            raise OSError("disk full")
+        self.backend._store_entries = fail
+        with self.assertRaises(OSError):
+            tier.flush()
+        self.assertEqual(tier.stats()['dirty'], 1)  # Kept for a retry
+        del self.backend._store_entries
+        tier.flush()
+        self.assertEqual(len(self.backend), 1)
+
+    def test_write_through_batches(self):
+        tier = self.tier()
+        calls = []
+        store_entries = self.backend._store_entries
+        self.backend._store_entries = lambda entries: calls.append(len(entries)) or store_entries(entries)
+        tier.store_many([value(i) for i in range(40)])
+        self.assertEqual(calls, [40])
+
+
+class TestFileTier(TierTests, unittest.TestCase):
+    def make_backend(self):
+        return FileCASStore(self.root)
+
+
+class TestSQLiteTier(TierTests, unittest.TestCase):
+    def make_backend(self):
+        return SQLiteCASStore(os.path.join(self.root, "cas.sqlite"))
+
+
+class TestPackTier(TierTests, unittest.TestCase):
+    def make_backend(self):
+        return PackCASStore(self.root, pack_size=8192)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from hlx_runtime.cas import CASStore, DecodedValueCache
+from hlx_runtime.cas_trace import (
+    AccessTracer, TraceRecord, read_trace, simulate, format_curves, POLICIES,
+    TRACE_STORE, TRACE_RETRIEVE, TRACE_EXISTS,
+)
+from hlx_runtime.hlx_ls_runtime import SimpleCAS
+from hlx_runtime.errors import HandleNotFoundError
+from hlx_runtime.lc_codec import encode_lcb, LCDecodeError
+
+
+def reads(keys):
+    return [TraceRecord(TRACE_RETRIEVE, f"{k:016x}", 10, 0.0) for k in keys]
+
+
+class TestTracer(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "cas.trace")
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_cas_calls(self):
+        cas = CASStore()
+        with AccessTracer(self.path) as tracer:
+            cas.tracer = tracer
+            h = cas.store({"a": 1})
+            cas.retrieve(h)
+            cas.exists(h)
+            many = cas.store_many([1, 2])
+            cas.retrieve_many(many + [many[0]])
+            with self.assertRaises(HandleNotFoundError):
+                cas.retrieve("&h_int_" + "0" * 64)
+            self.assertEqual(tracer.records, 9)
+        records = list(read_trace(self.path))
+        self.assertEqual([r.op for r in records],
+                         [TRACE_STORE, TRACE_RETRIEVE, TRACE_EXISTS, TRACE_STORE, TRACE_STORE,
+                          TRACE_RETRIEVE, TRACE_RETRIEVE, TRACE_RETRIEVE, TRACE_RETRIEVE])
+        self.assertEqual(records[0].key, h[-64:-48])
+        self.assertEqual(records[0].size, len(encode_lcb({"a": 1})))
+        self.assertEqual(records[-1].size, 0)
+        self.assertEqual(records[7].key, records[5].key)
+        timestamps = [r.timestamp for r in records]
+        self.assertEqual(timestamps, sorted(timestamps))
+
+    def test_decoded_cache_hit_has_unknown_size(self):
+        cas = CASStore()
+        cas.decoded_cache = DecodedValueCache()
+        h = cas.store("cached")
+        cas.retrieve(h)
+        with AccessTracer(self.path) as tracer:
+            cas.tracer = tracer
+            cas.retrieve(h)
+        self.assertEqual([(r.op, r.size) for r in read_trace(self.path)], [(TRACE_RETRIEVE, 0)])
+
+    def test_simple_cas(self):
+        cas = SimpleCAS()
+        with AccessTracer(self.path) as tracer:
+            cas.tracer = tracer
+            h = cas.put([1, 2, 3])
+            cas.get(h)
+        records = list(read_trace(self.path))
+        self.assertEqual([(r.op, r.key) for r in records], [(TRACE_STORE, h[-64:-48]), (TRACE_RETRIEVE, h[-64:-48])])
+        self.assertEqual(records[0].size, len(encode_lcb([1, 2, 3])))
+
+    def test_not_a_trace(self):
+        with self.assertRaises(LCDecodeError):
+            list(read_trace(b"garbage!" * 4))
+        with AccessTracer(self.path) as tracer:
+            tracer.on_exists("&h_x")
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        with self.assertRaises(LCDecodeError):
+            list(read_trace(data[:-5]))
+
+
+class TestSimulator(unittest.TestCase):
+    def test_policies_respect_capacity(self):
+        rng = random.Random(1)
+        keys = [str(int(rng.paretovariate(1.2))) for _ in range(5000)]
+        for name, policy in POLICIES.items():
+            for capacity in (1, 7, 64):
+                cache = policy(capacity)
+                for key in keys:
+                    cache.access(key)
+                    self.assertLessEqual(len(cache), capacity, name)
+
+    def test_lru_cyclic_scan(self):
+        curves = simulate(reads(list(range(10)) * 5), capacities=[9, 10], policies=['lru'])
+        self.assertEqual([p['hit_ratio'] for p in curves['lru']], [0.0, 0.8])
+
+    def test_scan_resistance(self):
+        # A hot set read twice, then a one-off scan that flushes it from LRU
+        keys = []
+        scan = 1000
+        for _ in range(30):
+            keys.extend(list(range(20)) * 2)
+            keys.extend(range(scan, scan + 100))
+            scan += 100
+        curves = simulate(reads(keys), capacities=[100], policies=list(POLICIES))
+        ratios = {name: curve[0]['hit_ratio'] for name, curve in curves.items()}
+        self.assertAlmostEqual(ratios['lru'], 20 / 140)
+        for name in ('lfu', 'arc', '2q'):
+            self.assertGreater(ratios[name], 0.25, name)
+
+    def test_curve_from_file(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "cas.trace")
+            cas = CASStore()
+            rng = random.Random(3)
+            with AccessTracer(path) as tracer:
+                cas.tracer = tracer
+                handles = [cas.store({"v": i, "pad": "x" * i}) for i in range(64)]
+                for _ in range(2000):
+                    cas.retrieve(handles[min(int(rng.expovariate(0.1)), 63)])
+            curves = simulate(path)
+        for curve in curves.values():
+            self.assertEqual([p['capacity'] for p in curve], [1, 2, 4, 8, 16, 32, 64])
+            self.assertEqual(curve[-1]['hit_ratio'], 1.0)  # Stores admitted everything
+            self.assertGreater(curve[-1]['byte_hit_ratio'], 0.99)
+        lru = [p['hit_ratio'] for p in curves['lru']]
+        self.assertEqual(lru, sorted(lru))
+        table = format_curves(curves).splitlines()
+        self.assertEqual(len(table), 8)
+        self.assertIn("arc", table[0])
+
+    def test_sizes_resolved_from_stores(self):
+        records = [TraceRecord(TRACE_STORE, "a" * 16, 100, 0.0),
+                   TraceRecord(TRACE_RETRIEVE, "a" * 16, 0, 0.0),
+                   TraceRecord(TRACE_RETRIEVE, "b" * 16, 300, 0.0)]
+        curve = simulate(records, capacities=[1], policies=['lru'])['lru']
+        self.assertEqual(curve[0]['byte_hit_ratio'], 0.25)
+        curve = simulate(records, capacities=[1], policies=['lru'], admit_writes=False)['lru']
+        self.assertEqual(curve[0]['hit_ratio'], 0.0)
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            simulate(reads([1]), policies=['mru'])
+
+
+if __name__ == '__main__':
+    unittest.main()
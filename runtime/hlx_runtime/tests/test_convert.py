@@ -0,0 +1,126 @@
+"""
+Tests for the streaming JSON/JSONL ⇄ LC-B record stream converter
+"""
+
+import io
+import json
+import pytest
+
+from hlx_runtime.convert import (
+    json_to_lcb, lcb_to_json, iter_records, iter_json_array, write_record,
+    encode_records,
+)
+from hlx_runtime.lc_codec import encode_lcb, decode_lcb, compute_hash, LCDecodeError
+
+
+RECORDS = [
+    {"input": "Hello world", "output": "Hello world"},
+    {"input": "café", "n": 3, "x": [1.5, None, True]},
+    [1, 2, 3],
+    "plain string",
+]
+
+
+def _jsonl(records):
+    return io.StringIO(''.join(json.dumps(r) + '\n' for r in records))
+
+
+class TestFraming:
+    def test_write_and_iter(self):
+        buf = io.BytesIO()
+        for data in [b'', b'\x01', b'x' * 300]:
+            write_record(buf, data)
+        buf.seek(0)
+        assert list(iter_records(buf)) == [b'', b'\x01', b'x' * 300]
+
+    def test_truncated(self):
+        buf = io.BytesIO()
+        write_record(buf, b'abcdef')
+        buf = io.BytesIO(buf.getvalue()[:-2])
+        with pytest.raises(LCDecodeError):
+            list(iter_records(buf))
+
+
+class TestJsonToLcb:
+    def test_jsonl(self):
+        dst = io.BytesIO()
+        assert json_to_lcb(_jsonl(RECORDS), dst) == len(RECORDS)
+        dst.seek(0)
+        assert [decode_lcb(r) for r in iter_records(dst)] == RECORDS
+
+    def test_blank_lines_skipped(self):
+        src = io.StringIO('{"a": 1}\n\n  \n{"b": 2}\n')
+        dst = io.BytesIO()
+        assert json_to_lcb(src, dst) == 2
+
+    def test_hashes(self):
+        dst, hashes = io.BytesIO(), io.StringIO()
+        json_to_lcb(_jsonl(RECORDS), dst, hashes=hashes)
+        expected = [compute_hash(encode_lcb(r)) for r in RECORDS]
+        assert hashes.getvalue().splitlines() == expected
+
+    def test_array(self):
+        src = io.StringIO(json.dumps(RECORDS, indent=2))
+        dst = io.BytesIO()
+        assert json_to_lcb(src, dst, json_format='array') == len(RECORDS)
+        dst.seek(0)
+        assert [decode_lcb(r) for r in iter_records(dst)] == RECORDS
+
+    def test_normalize(self):
+        src = io.StringIO('{"a": "x  ", "b": -0.0}\n')
+        dst = io.BytesIO()
+        json_to_lcb(src, dst, normalize=True)
+        dst.seek(0)
+        assert decode_lcb(next(iter_records(dst))) == {"a": "x", "b": 0.0}
+
+    def test_workers_preserve_order(self):
+        records = [{"i": i, "s": str(i) * (i % 7)} for i in range(200)]
+        dst = io.BytesIO()
+        json_to_lcb(_jsonl(records), dst, workers=2, chunk_size=16, max_in_flight=2)
+        dst.seek(0)
+        assert [decode_lcb(r) for r in iter_records(dst)] == records
+
+    def test_unknown_format(self):
+        with pytest.raises(ValueError):
+            json_to_lcb(io.StringIO(''), io.BytesIO(), json_format='xml')
+
+
+class TestJsonArrayReader:
+    def test_empty(self):
+        assert list(iter_json_array(io.StringIO(' [ ] '))) == []
+
+    def test_number_at_buffer_edge(self, monkeypatch):
+        import hlx_runtime.convert as convert
+        monkeypatch.setattr(convert, '_READ_SIZE', 3)
+        src = io.StringIO('[12345, "abcdef", {"k": [1, 2]}]')
+        assert list(iter_json_array(src)) == [12345, "abcdef", {"k": [1, 2]}]
+
+    def test_large_element_reads_grow(self, monkeypatch):
+        import hlx_runtime.convert as convert
+        monkeypatch.setattr(convert, '_READ_SIZE', 64)
+        big = {"rows": [{"i": i, "s": "x" * 20} for i in range(5000)]}
+        src = io.StringIO(json.dumps([big, 1]))
+        reads = []
+        read = src.read
+        monkeypatch.setattr(src, 'read', lambda n: reads.append(n) or read(n))
+        assert list(iter_json_array(src)) == [big, 1]
+        assert len(reads) < 30
+
+    def test_not_array(self):
+        with pytest.raises(LCDecodeError):
+            list(iter_json_array(io.StringIO('{"a": 1}')))
+
+
+class TestLcbToJson:
+    def test_roundtrip(self):
+        lcb = io.BytesIO()
+        json_to_lcb(_jsonl(RECORDS), lcb)
+        lcb.seek(0)
+        out = io.StringIO()
+        assert lcb_to_json(lcb, out) == len(RECORDS)
+        assert [json.loads(line) for line in out.getvalue().splitlines()] == RECORDS
+
+    def test_encode_records_inline(self):
+        out = list(encode_records(RECORDS, with_hash=True))
+        assert [d for d, _ in out] == [encode_lcb(r) for r in RECORDS]
+        assert all(h == compute_hash(d) for d, h in out)
@@ -0,0 +1,137 @@
+
+import asyncio
+import os
+import pickle
+import sys
+import unittest
+from unittest import mock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from hlx_runtime import lc_codec
+from hlx_runtime.cas import CASStore, ConcurrentCASStore
+from hlx_runtime.cas_async import AsyncCASStore
+from hlx_runtime.cas_chunk import Chunker
+from hlx_runtime.encoded import EncodedValue
+from hlx_runtime.lc_codec import encode_lcb, encode_runic, compute_hash
+from hlx_runtime.lc_r_codec import encode_lcr
+from hlx_runtime.lc_t_codec import encode_lct
+from hlx_runtime.ls_ops import LSContext, AsyncLSContext, ls_encode, ls_hash
+from hlx_runtime.tables import StateTable, MerkleTree
+
+VALUE = {"name": "probe", "xs": [1, 2.5, None, True], "blob": b"\x00\x01"}
+
+
+class TestEncodedValue(unittest.TestCase):
+    def test_fields(self):
+        enc = EncodedValue(VALUE)
+        self.assertEqual(enc.data, encode_lcb(VALUE))
+        self.assertEqual(enc.digest, compute_hash(enc.data))
+        self.assertEqual((enc.tag, enc.size, len(enc)), ('map', len(enc.data), len(enc.data)))
+        self.assertEqual(enc.handle, CASStore().store(VALUE))
+        self.assertIs(EncodedValue.of(enc), enc)
+        self.assertEqual(EncodedValue(dict(VALUE)), enc)
+        with self.assertRaises(TypeError):
+            EncodedValue(enc)
+
+    def test_text_forms_cached(self):
+        enc = EncodedValue(VALUE)
+        self.assertEqual(enc.runic, encode_runic(VALUE))
+        self.assertEqual(enc.lcr, encode_lcr(VALUE))
+        self.assertEqual(enc.lct, encode_lct(VALUE))
+        self.assertIs(enc.runic, enc.runic)
+        self.assertIs(enc.lct, enc.lct)
+
+    def test_pickle(self):
+        enc = EncodedValue(VALUE)
+        enc.runic
+        copy = pickle.loads(pickle.dumps(enc))
+        self.assertEqual((copy.value, copy.data, copy.runic), (VALUE, enc.data, enc.runic))
+
+
+class EncodedStoreTests:
+    def make_store(self):
+        return CASStore()
+
+    def setUp(self):
+        self.cas = self.make_store()
+
+    def test_store_reuses_encoding(self):
+        enc = EncodedValue(VALUE)
+        with mock.patch('hlx_runtime.cas.encode_lcb', side_effect=AssertionError), \
+                mock.patch('hlx_runtime.convert.encode_lcb', side_effect=AssertionError):
+            self.assertEqual(self.cas.store(enc), enc.handle)
+            handles = self.cas.store_many([enc, EncodedValue([1, 2])])
+        self.assertEqual(handles, [enc.handle, EncodedValue([1, 2]).handle])
+        self.assertEqual(self.cas.retrieve(enc.handle), VALUE)
+        self.assertEqual(self.cas.dedup_hits, 1)
+
+    def test_mixed_many(self):
+        values = [VALUE, "s", 3, [1]]
+        mixed = [EncodedValue(v) if i % 2 else v for i, v in enumerate(values)]
+        self.assertEqual(self.cas.store_many(mixed), self.make_store().store_many(values))
+
+    def test_chunked(self):
+        self.cas.chunking = Chunker(min_size=256, avg_size=512, max_size=1024, threshold=2048)
+        data = os.urandom(8192)
+        plain = self.cas.store(data)
+        self.assertTrue(plain.startswith("&h_chunked_"))
+        self.assertEqual(self.cas.store(EncodedValue(data)), plain)
+        self.assertEqual(self.cas.store_many([EncodedValue(data), EncodedValue(1)])[0], plain)
+
+
+class TestMemoryEncoded(EncodedStoreTests, unittest.TestCase):
+    pass
+
+
+class TestConcurrentEncoded(EncodedStoreTests, unittest.TestCase):
+    def make_store(self):
+        return ConcurrentCASStore(stripes=4)
+
+
+class TestEncodedConsumers(unittest.TestCase):
+    def test_tables(self):
+        enc = EncodedValue(VALUE)
+        table, plain = StateTable(), StateTable()
+        with mock.patch('hlx_runtime.tables.encode_lcb', side_effect=AssertionError):
+            self.assertEqual(table.set("k", enc), enc.digest)
+            self.assertEqual(table.get("k"), VALUE)
+            root = table.get_state_hash()
+        plain.set("k", VALUE)
+        self.assertEqual(root, plain.get_state_hash())
+        self.assertTrue(table.verify_integrity())
+        tree = MerkleTree()
+        self.assertEqual(tree.add_leaf(enc), MerkleTree().add_leaf(VALUE))
+        self.assertEqual(tree.leaves[0].data, VALUE)
+
+    def test_collapse_with_hash(self):
+        ctx = LSContext(CASStore())
+        calls = []
+        real = lc_codec.LCBinaryEncoder.encode
+        with mock.patch.object(lc_codec.LCBinaryEncoder, 'encode',
+                               lambda self, v: calls.append(1) or real(self, v)):
+            info = ctx.collapse_with_hash(VALUE)
+        self.assertEqual(len(calls), 1)
+        enc = EncodedValue(VALUE)
+        self.assertEqual(info, {'handle': enc.handle, 'content_hash': enc.digest,
+                                'lc_b_size': enc.size, 'lc_t': enc.runic})
+        self.assertEqual(ls_encode(enc), enc.data)
+        self.assertEqual(ls_encode(enc, 'LC-T'), ls_encode(VALUE, 'LC-T'))
+        self.assertEqual(ls_hash(enc), ls_hash(VALUE))
+
+    def test_async(self):
+        async def run():
+            cas = AsyncCASStore(CASStore())
+            ctx = AsyncLSContext(cas)
+            info = await ctx.collapse_with_hash(VALUE)
+            handle = await cas.store(EncodedValue([1, 2]))
+            await cas.flush()
+            return info, handle, cas
+        info, handle, cas = asyncio.run(run())
+        self.assertEqual(info['handle'], EncodedValue(VALUE).handle)
+        self.assertEqual(info['lc_t'], encode_runic(VALUE))
+        self.assertEqual(cas.backend.retrieve(handle), [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+
+import os
+import pickle
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from hlx_runtime.cas import CASStore, ConcurrentCASStore, FileCASStore
+from hlx_runtime.cas_sqlite import SQLiteCASStore
+from hlx_runtime.cas_pack import PackCASStore
+from hlx_runtime.cas_chunk import Chunker
+from hlx_runtime.handle import Handle, handle_key, handle_hash, split_handle
+from hlx_runtime.ls_ops import LSContext
+from hlx_runtime.errors import HandleError, HandleNotFoundError, E_HANDLE_FORMAT
+
+
+class TestHandle(unittest.TestCase):
+    def setUp(self):
+        self.text = CASStore().store({"a": [1, 2.5, "x"]})
+
+    def test_round_trip(self):
+        h = Handle.parse(self.text)
+        self.assertEqual(str(h), self.text)
+        self.assertEqual(h.tag, 'map')
+        self.assertEqual(h.content_hash, self.text[-64:])
+        self.assertEqual(len(h.digest), 32)
+        self.assertEqual(Handle(h.tag, h.digest), h)
+        self.assertIs(Handle.parse(h), h)
+        self.assertEqual(pickle.loads(pickle.dumps(h)), h)
+        self.assertIs(type(pickle.loads(pickle.dumps(h))), Handle)
+        self.assertLess(sys.getsizeof(h), sys.getsizeof(self.text) * 0.75)
+
+    def test_hash_eq(self):
+        a = Handle.parse(self.text)
+        b = Handle(a.tag, bytearray(a.digest))
+        self.assertEqual(hash(a), hash(b))
+        self.assertEqual({a: 1}[b], 1)
+        self.assertNotEqual(a, Handle('list', a.digest))
+        self.assertNotEqual(a, self.text)
+        self.assertLess(Handle('list', a.digest), a)
+        with self.assertRaises(AttributeError):
+            a.tag = 'int'
+
+    def test_parse_cached(self):
+        self.assertIs(Handle.parse(self.text), Handle.parse(self.text))
+        chunked = "&h_chunked_" + self.text[-64:]
+        self.assertEqual(str(Handle.parse(chunked)), chunked)
+        self.assertNotEqual(Handle.parse(chunked), Handle.parse(self.text))
+
+    def test_malformed(self):
+        digest = self.text[-64:]
+        for bad in ("&h_map_" + digest.upper(), "&h_" + digest, "&h_map_" + digest[:-1],
+                    "&h_map_" + digest[:-2] + " 0", "h_map_" + digest, 42):
+            self.assertIsNone(handle_key(bad))
+            with self.assertRaises(HandleError) as ctx:
+                Handle.parse(bad)
+            self.assertEqual(ctx.exception.code, E_HANDLE_FORMAT)
+        with self.assertRaises(HandleError):
+            Handle('map', b'\x00' * 31)
+        with self.assertRaises(HandleError):
+            Handle('a_b', b'\x00' * 32)
+        with self.assertRaises(HandleError):
+            Handle.parse("&h_other_" + digest)
+
+    def test_helpers(self):
+        self.assertEqual(handle_key(self.text), bytes.fromhex(self.text[-64:]))
+        self.assertEqual(handle_hash(self.text), self.text[-64:])
+        self.assertEqual(split_handle(self.text), ('map', self.text[-64:]))
+        self.assertEqual(LSContext(CASStore()).collapse({"a": [1, 2.5, "x"]}),
+                         (self.text, self.text[-64:]))
+
+
+class DigestKeyTests:
+    def make_store(self):
+        return CASStore()
+
+    def test_keyed_by_digest(self):
+        cas = self.make_store()
+        values = [{"i": i} for i in range(20)] + [[1], "s", 3, None, b"\x00" * 10]
+        handles = cas.store_many(values)
+        shards = getattr(cas, '_shards', None) or [cas._store]
+        keys = [key for shard in shards for key in shard]
+        self.assertTrue(all(isinstance(key, bytes) and len(key) == 32 for key in keys))
+        self.assertEqual(sorted(cas._iter_handles()), sorted(handles))
+        self.assertEqual(sorted(cas._iter_digests()), sorted(h[-64:] for h in handles))
+        self.assertEqual(cas.retrieve_many(handles), values)
+        self.assertFalse(cas.exists("&h_map_" + "0" * 64))
+        self.assertFalse(cas.exists("not a handle"))
+        with self.assertRaises(HandleNotFoundError):
+            cas._put_stored("not a handle", b"")
+        snap = cas.snapshot()
+        cas.store("later")
+        cas.restore(dict(snap))
+        self.assertEqual(len(cas), len(values))
+
+
+class TestMemoryDigestKeys(DigestKeyTests, unittest.TestCase):
+    pass
+
+
+class TestConcurrentDigestKeys(DigestKeyTests, unittest.TestCase):
+    def make_store(self):
+        return ConcurrentCASStore(stripes=4)
+
+
+class TagMismatchTests:
+    def make_store(self):
+        return CASStore()
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        self.cas = self.make_store()
+
+    def tearDown(self):
+        if hasattr(self.cas, 'close'):
+            self.cas.close()
+        self._tmp.cleanup()
+
+    def test_other_tag_not_found(self):
+        h = self.cas.store({"k": "v"})
+        blob = self.cas.store(b"plain")
+        for wrong in ("&h_list_" + h[-64:], "&h_chunked_" + blob[-64:]):
+            self.assertFalse(self.cas.exists(wrong))
+            with self.assertRaises(HandleNotFoundError):
+                self.cas.retrieve(wrong)
+        self.cas._delete_blob("&h_list_" + h[-64:])
+        self.assertEqual(self.cas.retrieve(h), {"k": "v"})
+        self.assertTrue(self.cas.exists(blob))
+
+    def test_chunked_blob_wrong_tag(self):
+        self.cas.chunking = Chunker(avg_size=1024)
+        h = self.cas.store(os.urandom(16_000))
+        with self.assertRaises(HandleNotFoundError):
+            self.cas.retrieve("&h_blob_" + h[-64:])
+
+
+class TestMemoryTagMismatch(TagMismatchTests, unittest.TestCase):
+    pass
+
+
+class TestConcurrentTagMismatch(TagMismatchTests, unittest.TestCase):
+    def make_store(self):
+        return ConcurrentCASStore(stripes=4)
+
+
+class TestFileTagMismatch(TagMismatchTests, unittest.TestCase):
+    def make_store(self):
+        return FileCASStore(self.root)
+
+
+class TestSQLiteTagMismatch(TagMismatchTests, unittest.TestCase):
+    def make_store(self):
+        return SQLiteCASStore(os.path.join(self.root, "cas.sqlite"))
+
+
+class TestPackTagMismatch(TagMismatchTests, unittest.TestCase):
+    def make_store(self):
+        return PackCASStore(self.root, pack_size=4096)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,12 +9,14 @@ import os
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from hlx_ls_runtime import (
     HLXRuntime, execute_hlx,
     HLXTokenizer, HLXParser, HLXEvaluator,
     SimpleCAS, get_cas_store
 )
+from hlx_runtime.cas import CASStore
 
 
 class TestHLXTokenizer:
@@ -208,6 +210,74 @@ class TestHLXLatentSpace:
         recovered = runtime.execute('⊖(h)')
         assert recovered == [1, 2, 3]
 
+    def test_collapse_duplicate(self):
+        cas = SimpleCAS()
+        h1 = cas.put([1, 2, 3])
+        h2 = cas.put([1, 2, 3])
+        assert h1 == h2
+        assert cas.dedup_hits == 1
+        assert len(cas.store) == 1
+
+    def test_canonical_handles(self):
+        cas = SimpleCAS()
+        h1 = cas.put({"a": 1, "b": [1.5, None]})
+        h2 = cas.put({"b": [1.5, None], "a": 1})
+        assert h1 == h2
+        assert h1 == CASStore().store({"a": 1, "b": [1.5, None]})
+        assert cas.dedup_hits == 1
+
+    def test_long_string_handle_memo(self):
+        cas = SimpleCAS()
+        text = "x" * 1000
+        h = cas.put(text)
+        assert len(cas._handle_memo) == 1
+        assert cas.put("x" * 1000) == h
+        assert cas.dedup_hits == 1
+        assert cas.put("short") not in cas._handle_memo.values()
+
+    def test_recollapse_stored_object(self):
+        cas = SimpleCAS()
+        value = {"rows": list(range(100))}
+        h = cas.put(value)
+        assert cas._handles_by_id == {id(cas.get(h)): h}
+        assert cas.get(h) is not value  # Copied on put
+        assert cas.put(cas.get(h)) == h
+        assert cas.put({"rows": list(range(100))}) == h
+        assert cas.dedup_hits == 2
+        assert len(cas._handles_by_id) == 1
+
+    def test_caller_mutation_after_put(self):
+        cas = SimpleCAS()
+        a = [1, 2]
+        h = cas.put(a)
+        a.append(3)
+        assert cas.put(a) != h
+        assert cas.get(h) == [1, 2]
+        assert cas.get(cas.put(a)) == [1, 2, 3]
+
+    def test_mixed_type_keys(self):
+        cas = SimpleCAS()
+        h = cas.put({1: 'x', 'a': 'y'})
+        assert h.startswith('&h_map_')
+        assert cas.get(h) == {1: 'x', 'a': 'y'}
+
+    def test_value_without_lcb_form(self):
+        cas = SimpleCAS()
+        h = cas.put((1, 2))
+        assert h.startswith('&h_unknown_')
+        assert cas.put((1, 2)) == h
+        assert cas.get(h) == (1, 2)
+
+    def test_backend(self):
+        backend = CASStore()
+        cas = SimpleCAS(backend=backend)
+        h = cas.put([1, {"k": "v"}])
+        assert backend.retrieve(h) == [1, {"k": "v"}]
+        fresh = SimpleCAS(backend=backend)
+        assert fresh.has(h)
+        assert fresh.get(h) == [1, {"k": "v"}]
+        assert not fresh.has("&h_list_" + "0" * 64)
+
 
 class TestHLXBuiltins:
     """Test built-in functions"""
@@ -9,6 +9,7 @@ import os
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from hlxl_ls_runtime import (
     HLXLRuntime, execute_hlxl,
@@ -192,6 +193,13 @@ class TestHLXLLatentSpace:
         recovered = runtime.execute('ls.resolve(h)')
         assert recovered == "hello"
 
+    def test_collapse_ignores_key_order(self):
+        runtime = HLXLRuntime()
+        h1 = runtime.execute('ls.collapse({x: 1, y: [2, 3]})')
+        h2 = runtime.execute('ls.collapse({y: [2, 3], x: 1})')
+        assert h1 == h2
+        assert h1.startswith('&h_map_')
+
     def test_snapshot(self):
         runtime = HLXLRuntime()
         runtime.execute('ls.collapse(1)')
@@ -349,5 +349,86 @@ class TestGlyphUsage:
         assert LC_R_GLYPHS['FIELD'] in encoded
 
 
+class TestCollapseLevels:
+    """Test back-references at collapse levels 1-12"""
+
+    HANDLE = '&h_map_' + 'ab' * 32
+
+    def _descriptor_sets(self):
+        binding = {'binding': 0, 'type': 'uniform_buffer', 'stage': 'vertex', 'buffer': self.HANDLE}
+        return {'sets': [dict(binding, binding=i % 3) for i in range(12)]}
+
+    def test_level_zero_has_no_backrefs(self):
+        encoded = encode_lcr([self.HANDLE, self.HANDLE])
+        assert LC_R_GLYPHS['DEFINE'] not in encoded
+        assert LC_R_GLYPHS['BACKREF'] not in encoded
+
+    def test_repeated_handle(self):
+        encoded = encode_lcr([self.HANDLE, self.HANDLE, self.HANDLE], collapse_level=1)
+        assert encoded.count(LC_R_GLYPHS['DEFINE']) == 1
+        assert encoded.count(LC_R_GLYPHS['BACKREF'] + '0') == 2
+        assert decode_lcr(encoded) == [self.HANDLE] * 3
+
+    def test_level_one_leaves_strings(self):
+        text = 'a fairly long repeated string'
+        encoded = encode_lcr([text, text], collapse_level=1)
+        assert LC_R_GLYPHS['BACKREF'] not in encoded
+        encoded = encode_lcr([text, text], collapse_level=2)
+        assert LC_R_GLYPHS['BACKREF'] in encoded
+        assert decode_lcr(encoded) == [text, text]
+
+    def test_repeated_keys(self):
+        objs = [{'descriptor_binding': i} for i in range(4)]
+        encoded = encode_lcr(objs, collapse_level=2)
+        assert encoded.count('descriptor_binding') == 1
+        assert decode_lcr(encoded) == objs
+
+    def test_non_str_keys(self):
+        value = [{1: 'x'}, {True: 'y'}, {'1': 'z'}]
+        for level in range(4):
+            assert decode_lcr(encode_lcr(value, level)) == [{'1': 'x'}, {'True': 'y'}, {'1': 'z'}]
+        key = 10 ** 30  # Long enough to back-reference, shared with its str form
+        encoded = encode_lcr([{key: 1}, {str(key): 2}], collapse_level=2)
+        assert encoded.count(str(key)) == 1
+        assert decode_lcr(encoded) == [{str(key): 1}, {str(key): 2}]
+
+    def test_repeated_subtree(self):
+        value = self._descriptor_sets()
+        encoded = encode_lcr(value, collapse_level=3)
+        assert encoded.count('uniform_buffer') == 1
+        assert decode_lcr(encoded) == value
+
+    def test_sizes_decrease_with_level(self):
+        value = self._descriptor_sets()
+        sizes = [len(encode_lcr(value, level).encode('utf-8')) for level in range(4)]
+        assert sizes == sorted(sizes, reverse=True)
+        assert sizes[3] < sizes[0] // 2
+
+    def test_all_levels_roundtrip(self):
+        value = self._descriptor_sets()
+        value['contract'] = {'contract_id': 902, 'a': [1, 2, 3, 4], 'b': [1, 2, 3, 4]}
+        expected = decode_lcr(encode_lcr(value))
+        for level in range(13):
+            assert decode_lcr(encode_lcr(value, level)) == expected
+
+    def test_backref_returns_copy(self):
+        arr = ['x' * 16, 'y' * 16]
+        decoded = decode_lcr(encode_lcr([arr, arr], collapse_level=3))
+        decoded[0].append('z')
+        assert decoded[1] == arr
+
+    def test_determinism(self):
+        value = self._descriptor_sets()
+        assert encode_lcr(value, 12) == encode_lcr(value, 12)
+
+    def test_invalid_level(self):
+        with pytest.raises(ValueError):
+            encode_lcr(1, collapse_level=13)
+
+    def test_undefined_backref(self):
+        with pytest.raises(ValueError):
+            decode_lcr(LC_R_GLYPHS['BACKREF'] + '0')
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
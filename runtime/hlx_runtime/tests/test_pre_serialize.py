@@ -19,7 +19,10 @@ from hlx_runtime.pre_serialize import (
     FloatSpecialError,
     KeyOrderError,
     TrailingCommaError,
+    get_normalize_stats,
+    reset_normalize_stats,
 )
+from hlx_runtime.lc_codec import encode_lcb
 
 
 # ============================================================================
@@ -152,6 +155,41 @@ class TestStringNormalization:
         assert normalize_string(emoji) == emoji
 
 
+class TestNormalizeFastPaths:
+    """Test ASCII/already-NFC fast paths and the memo."""
+
+    def setup_method(self):
+        reset_normalize_stats()
+
+    def test_ascii_path(self):
+        assert normalize_string('binding_0') == 'binding_0'
+        assert normalize_string('line\r\nend  ') == 'line\nend'
+        assert get_normalize_stats()['ascii'] == 2
+        assert get_normalize_stats()['full'] == 0
+
+    def test_already_nfc_path(self):
+        assert normalize_string('caf\u00e9 ') == 'caf\u00e9'
+        assert get_normalize_stats()['nfc_skip'] == 1
+
+    def test_full_path(self):
+        assert normalize_string('cafe\u0301') == 'caf\u00e9'
+        assert get_normalize_stats()['full'] == 1
+
+    def test_memo_for_long_strings(self):
+        long_text = 'e\u0301' * 64 + '\r\n'
+        first = normalize_string(long_text)
+        second = normalize_string(long_text)
+        assert first == second == unicodedata.normalize('NFC', long_text).rstrip()
+        stats = get_normalize_stats()
+        assert stats['full'] == 1
+        assert stats['memo_hit'] == 1
+
+    def test_reset(self):
+        normalize_string('x')
+        reset_normalize_stats()
+        assert sum(get_normalize_stats().values()) == 0
+
+
 # ============================================================================
 # Key Ordering Tests
 # ============================================================================
@@ -546,5 +584,45 @@ class TestPerformance:
         assert current['value'] == 0.0
 
 
+# ============================================================================
+# Fused Normalize + Encode Tests
+# ============================================================================
+
+class TestFusedEncode:
+    """Test encode_lcb(value, normalize=True) against pre_serialize + encode_lcb."""
+
+    CASES = [
+        None,
+        True,
+        -0.0,
+        3.14,
+        'cafe\u0301  \r\n',
+        '&h_str_abc  ',
+        b'\x00\x01',
+        [1, -0.0, 'x\r\ny  ', ('a', 'b ')],
+        {'z': {'b': 'e\u0301', 'a': [-0.0]}, 'a': ('t', 1.5)},
+        {'contract_id': 902, 'name': 'pipeline\t', 'stages': ['&h_vert', '&h_frag']},
+    ]
+
+    def test_identical_bytes(self):
+        for value in self.CASES:
+            assert encode_lcb(value, normalize=True) == encode_lcb(pre_serialize(value))
+
+    def test_does_not_mutate_input(self):
+        value = {'b': 'x  ', 'a': [-0.0]}
+        encode_lcb(value, normalize=True)
+        assert value == {'b': 'x  ', 'a': [-0.0]}
+        assert list(value.keys()) == ['b', 'a']
+
+    def test_rejects_special_floats(self):
+        with pytest.raises(FloatSpecialError):
+            encode_lcb({'x': [float('nan')]}, normalize=True)
+        with pytest.raises(FloatSpecialError):
+            encode_lcb(float('inf'), normalize=True)
+
+    def test_default_is_unnormalized(self):
+        assert encode_lcb('a  ') != encode_lcb('a  ', normalize=True)
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v'])
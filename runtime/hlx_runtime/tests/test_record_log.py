@@ -0,0 +1,125 @@
+"""
+Tests for the seekable LC-B record log format
+"""
+
+import io
+import json
+import pytest
+
+from hlx_runtime.record_log import (
+    RecordLogWriter, RecordLogReader, is_record_log,
+)
+from hlx_runtime.convert import json_to_record_log, record_log_to_json
+from hlx_runtime.lc_codec import encode_lcb, compute_hash
+from hlx_runtime.errors import IntegrityError
+
+
+VALUES = [None, 42, "text", b'\x00\x01', [1, 2.5, "x"], {"k": {"nested": True}}]
+
+
+@pytest.fixture
+def log_path(tmp_path):
+    return str(tmp_path / 'shard.rlog')
+
+
+class TestRecordLog:
+    def test_roundtrip(self, log_path):
+        with RecordLogWriter(log_path) as log:
+            for v in VALUES:
+                log.append(v)
+        with RecordLogReader(log_path) as reader:
+            assert len(reader) == len(VALUES)
+            assert list(reader) == VALUES
+            assert reader[3] == VALUES[3]
+            assert reader[-1] == VALUES[-1]
+
+    def test_random_access(self, log_path):
+        with RecordLogWriter(log_path) as log:
+            for i in range(1000):
+                log.append({"i": i})
+        with RecordLogReader(log_path) as reader:
+            assert reader[777] == {"i": 777}
+            assert bytes(reader.read_raw(5)) == encode_lcb({"i": 5})
+            with pytest.raises(IndexError):
+                reader[1000]
+
+    def test_hashes(self, log_path):
+        with RecordLogWriter(log_path, with_hashes=True) as log:
+            for v in VALUES:
+                log.append(v)
+        with RecordLogReader(log_path, verify=True) as reader:
+            assert reader.with_hashes
+            assert reader.hash_of(1) == compute_hash(encode_lcb(42))
+            assert list(reader) == VALUES
+
+    def test_corrupt_record_detected(self, log_path):
+        with RecordLogWriter(log_path, with_hashes=True) as log:
+            log.append("payload")
+        with open(log_path, 'r+b') as f:
+            data = bytearray(f.read())
+            data[data.index(b'payload')] ^= 0xFF
+            f.seek(0)
+            f.write(data)
+        with RecordLogReader(log_path, verify=True) as reader:
+            with pytest.raises(IntegrityError):
+                reader[0]
+
+    def test_append_after_close(self, log_path):
+        with RecordLogWriter(log_path) as log:
+            log.append(1)
+        with RecordLogWriter(log_path) as log:
+            assert len(log) == 1
+            log.append(2)
+        with RecordLogReader(log_path) as reader:
+            assert list(reader) == [1, 2]
+
+    def test_missing_footer(self, log_path):
+        log = RecordLogWriter(log_path)
+        for v in VALUES:
+            log.append(v)
+        log._file.flush()
+        with RecordLogReader(log_path) as reader:
+            assert list(reader) == VALUES
+        log._file.close()
+
+        # Resuming an unfinished log keeps its records
+        with RecordLogWriter(log_path) as log:
+            log.append("more")
+        with RecordLogReader(log_path) as reader:
+            assert list(reader) == VALUES + ["more"]
+
+    def test_torn_footer(self, log_path):
+        with RecordLogWriter(log_path) as log:
+            for v in VALUES:
+                log.append(v)
+        with open(log_path, 'r+b') as f:
+            f.truncate(f.seek(0, 2) - 5)  # Index offsets start with zero bytes
+        with RecordLogReader(log_path) as reader:
+            assert list(reader) == VALUES
+        with RecordLogWriter(log_path) as log:
+            assert len(log) == len(VALUES)
+
+    def test_empty(self, log_path):
+        RecordLogWriter(log_path).close()
+        with RecordLogReader(log_path) as reader:
+            assert len(reader) == 0
+            assert list(reader) == []
+
+    def test_is_record_log(self, log_path, tmp_path):
+        RecordLogWriter(log_path).close()
+        assert is_record_log(log_path)
+        other = tmp_path / 'other'
+        other.write_bytes(b'not a log')
+        assert not is_record_log(str(other))
+
+
+class TestConvert:
+    def test_json_roundtrip(self, log_path):
+        records = [{"input": "a", "n": i} for i in range(50)]
+        src = io.StringIO(''.join(json.dumps(r) + '\n' for r in records))
+        assert json_to_record_log(src, log_path) == 50
+        with RecordLogReader(log_path, verify=True) as reader:
+            assert reader[49] == records[49]
+        out = io.StringIO()
+        assert record_log_to_json(log_path, out) == 50
+        assert [json.loads(line) for line in out.getvalue().splitlines()] == records